@@ -1,8 +1,34 @@
-from .game import Arena, Board, Mathematico, Player
-from .players import HumanPlayer, RandomPlayer, SimulationPlayer
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .game import Arena, Board, Mathematico, Player
+    from .players import HeuristicPlayer, HumanPlayer, RandomPlayer, \
+        SimulationPlayer
 
 
 __all__ = [
     "Arena", "Board", "Mathematico", "Player",
-    "HumanPlayer", "RandomPlayer", "SimulationPlayer"
+    "HeuristicPlayer", "HumanPlayer", "RandomPlayer", "SimulationPlayer"
 ]
+
+# the submodules are imported on the first access to their names (PEP 562),
+# so that the command line tools start fast
+_SUBMODULES = {
+    "Arena": ".game", "Board": ".game", "Mathematico": ".game",
+    "Player": ".game", "HeuristicPlayer": ".players",
+    "HumanPlayer": ".players", "RandomPlayer": ".players",
+    "SimulationPlayer": ".players",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _SUBMODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_SUBMODULES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,218 @@
+"""
+Benchmarks of the hot paths of the package: board moves and scoring, line
+evaluation, simulations and games played in the arena.
+
+Usage:
+------
+    python -m mathematico.bench [--time SECONDS] [--only NAME ...]
+        [--output FILE] [--baseline FILE] [--threshold FRACTION]
+
+The results (operations per second of each benchmark) are printed as JSON,
+and optionally saved to a file. If a baseline file with previous results is
+given, the benchmarks slower than `(1 - threshold)` times the baseline are
+reported as regressions and the exit code is 1.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Any
+
+from .game import Arena, Board, Player
+from .game.eval import evaluate_line
+from .players import RandomPlayer, SimulationPlayer
+
+
+def _rate(step: Callable[[], int], min_time: float) -> float:
+    """
+    Call `step` repeatedly for at least `min_time` seconds.
+
+    :param step: function returning the number of operations done
+    :param min_time: minimum time to run, in seconds
+    :return: number of operations per second
+    """
+    operations = 0
+    start = perf_counter()
+    while True:
+        operations += step()
+        elapsed = perf_counter() - start
+        if elapsed >= min_time:
+            return operations / elapsed
+
+
+def _filled_board(cells: int, seed: int = 0) -> Board:
+    """Return board with `cells` random cards from the deck."""
+    rng = random.Random(seed)
+    board = Board()
+    deck = [i for i in range(1, 14) for _ in range(4)]
+    rng.shuffle(deck)
+    moves = list(board.possible_moves())
+    rng.shuffle(moves)
+    for move, card in zip(moves[:cells], deck):
+        board.make_move(move, card)
+    return board
+
+
+def bench_make_unmake(min_time: float) -> float:
+    """Pairs of Board.make_move and Board.unmake_move per second."""
+    board = _filled_board(12)
+    moves = list(board.possible_moves())
+
+    def step() -> int:
+        for move in moves:
+            board.make_move(move, 7)
+            board.unmake_move(move)
+        return len(moves)
+    return _rate(step, min_time)
+
+
+def bench_score(min_time: float) -> float:
+    """Board.score calls on a full board per second."""
+    board = _filled_board(25)
+
+    def step() -> int:
+        for _ in range(1000):
+            board.score()
+        return 1000
+    return _rate(step, min_time)
+
+
+def bench_evaluate_line(min_time: float) -> float:
+    """evaluate_line calls per second."""
+    board = _filled_board(25)
+    lines = [board.row_rle(i) for i in range(board.size)] \
+        + [board.col_rle(i) for i in range(board.size)]
+
+    def step() -> int:
+        for line in lines:
+            evaluate_line(line)
+        return len(lines)
+    return _rate(step, min_time)
+
+
+def bench_rollouts(min_time: float) -> float:
+    """Random rollouts of SimulationPlayer from an empty board per second."""
+    random.seed(0)
+    player = SimulationPlayer(None, 1)
+    card = player.deck.draw()
+
+    def step() -> int:
+        for _ in range(10):
+            player.simulate_move((2, 2), card)
+        return 10
+    return _rate(step, min_time)
+
+
+def _arena_rate(player: Player, min_time: float) -> float:
+    """Games per second played by the player in the arena."""
+    arena = Arena()
+    arena.add_player(player)
+    rounds = 0
+
+    def step() -> int:
+        nonlocal rounds
+        arena.run(rounds=1, verbose=False, seed=rounds)
+        rounds += 1
+        return 1
+    return _rate(step, min_time)
+
+
+def bench_arena_random(min_time: float) -> float:
+    """Games per second of RandomPlayer in the Arena."""
+    random.seed(0)
+    return _arena_rate(RandomPlayer(), min_time)
+
+
+def bench_arena_simulation(min_time: float) -> float:
+    """Games per second of SimulationPlayer with 100 simulations per move in
+    the Arena."""
+    random.seed(0)
+    return _arena_rate(SimulationPlayer(None, 100), min_time)
+
+
+BENCHMARKS: Dict[str, Callable[[float], float]] = {
+    "make_unmake": bench_make_unmake,
+    "score": bench_score,
+    "evaluate_line": bench_evaluate_line,
+    "rollouts": bench_rollouts,
+    "arena_random": bench_arena_random,
+    "arena_simulation": bench_arena_simulation,
+}
+
+
+def run_benchmarks(names: Optional[List[str]] = None,
+                   min_time: float = 1.0) -> Dict[str, Any]:
+    """
+    Run the benchmarks.
+
+    :param names: names of the benchmarks to run, all if None
+    :param min_time: minimum time of each benchmark, in seconds
+    :return: results, with the operations per second of each benchmark
+        under "benchmarks"
+    """
+    names = list(BENCHMARKS) if names is None else names
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {sorted(unknown)}")
+    return {
+        "python": platform.python_version(),
+        "benchmarks": {name: BENCHMARKS[name](min_time) for name in names},
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float = 0.1) -> Dict[str, float]:
+    """
+    Compare the results with the baseline.
+
+    :param results: results of `run_benchmarks`
+    :param baseline: previous results of `run_benchmarks`
+    :param threshold: allowed relative slowdown
+    :return: the regressed benchmarks, with the ratio of the current and
+        the baseline speed
+    """
+    regressions = {}
+    for name, rate in results["benchmarks"].items():
+        previous = baseline["benchmarks"].get(name)
+        if previous and rate < (1 - threshold) * previous:
+            regressions[name] = rate / previous
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmarks from the command line, return the exit code."""
+    parser = argparse.ArgumentParser(
+        prog="python -m mathematico.bench",
+        description="Measure the throughput of the hot paths.")
+    parser.add_argument("--time", type=float, default=1.0,
+                        help="minimum time of each benchmark in seconds")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS),
+                        help="run only these benchmarks")
+    parser.add_argument("--output", help="save the results to this file")
+    parser.add_argument("--baseline", help="compare with results in file")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="allowed relative slowdown against baseline")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.only, args.time)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        for name, ratio in regressions.items():
+            print(f"Regression in {name}: {ratio:.2%} of the baseline",
+                  file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""
+The `mathematico` command, which runs the tools of the package without
+writing any glue code. The subcommands and the players are imported only
+when used, so that e.g. `mathematico --help` starts instantly.
+
+Usage:
+------
+    mathematico arena PLAYER [PLAYER ...] [--rounds N] [--seed N]
+        [--workers N] [--format {json,csv}] [--output FILE]
+    mathematico tournament PLAYER PLAYER [PLAYER ...] [--alpha P]
+        [--tolerance POINTS] [--max-rounds N] [--look-every N] [--seed N]
+        [--workers N] [--format {json,csv}] [--output FILE]
+    mathematico bench ...       see `python -m mathematico.bench --help`
+    mathematico selfplay ...    see `python -m mathematico.selfplay --help`
+    mathematico server ...      see `python -m mathematico.server --help`
+
+The players are given as `NAME[:KEY=VALUE,...]`, where the keys are the
+arguments of the player class, e.g. `random`, `simulation:max_simulations=100`
+or `simulation:maxtime=1e8,batch_size=50`.
+"""
+import argparse
+import csv
+import io
+import json
+import random
+import sys
+from functools import partial
+from importlib import import_module
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+# name of the player -> (module, class, default arguments)
+PLAYERS: Dict[str, Tuple[str, str, Dict[str, Any]]] = {
+    "heuristic": ("mathematico.players._heuristic_player", "HeuristicPlayer",
+                  {}),
+    "random": ("mathematico.players._random_player", "RandomPlayer", {}),
+    "simulation": ("mathematico.players._random_simulations",
+                   "SimulationPlayer",
+                   {"maxtime": None, "max_simulations": None}),
+}
+
+# subcommands implemented by the `main` of other modules
+COMMANDS: Dict[str, Tuple[str, str]] = {
+    "bench": ("mathematico.bench", "measure the throughput of the hot paths"),
+    "selfplay": ("mathematico.selfplay",
+                 "generate a dataset of self-play games"),
+    "server": ("mathematico.server", "host games for remote players"),
+}
+
+SUMMARY_FIELDS = ["player", "count", "mean", "std", "min", "max",
+                  "q25", "median", "q75"]
+PAIRING_FIELDS = ["first", "second", "rounds", "mean", "std", "decided",
+                  "winner"]
+
+
+def _parse_value(text: str) -> Any:
+    """Convert the value of a player argument to int, float, bool or None,
+    the integral floats such as `1e8` are converted to int."""
+    lowered = text.lower()
+    if lowered in ("none", "null"):
+        return None
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        value = float(text)
+    except ValueError:
+        return text
+    return int(value) if value.is_integer() else value
+
+
+def parse_player_spec(spec: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Split the player specification `NAME[:KEY=VALUE,...]` into the name
+    and the keyword arguments of the player.
+
+    :raises ValueError: if the specification is malformed or the player
+        is unknown
+    """
+    name, _, arguments = spec.partition(":")
+    if name not in PLAYERS:
+        raise ValueError(f"Unknown player {name!r}, "
+                         f"expected one of {sorted(PLAYERS)}")
+    kwargs: Dict[str, Any] = {}
+    for argument in filter(None, arguments.split(",")):
+        key, equals, value = argument.partition("=")
+        if not equals or not key.isidentifier():
+            raise ValueError(f"Invalid argument {argument!r} of {spec!r}, "
+                             f"expected KEY=VALUE")
+        kwargs[key] = _parse_value(value)
+    return name, kwargs
+
+
+def player_factory(spec: str) -> Callable[[], Any]:
+    """
+    Return picklable callable creating the player given by the
+    specification, only the module of the player is imported.
+
+    :raises ValueError: if the specification is invalid
+    """
+    name, kwargs = parse_player_spec(spec)
+    module, cls_name, defaults = PLAYERS[name]
+    cls = getattr(import_module(module), cls_name)
+    factory = partial(cls, **{**defaults, **kwargs})
+    try:
+        factory()
+    except (AssertionError, TypeError, ValueError) as error:
+        raise ValueError(f"Invalid player {spec!r}: {error}") from error
+    return factory
+
+
+def run_arena(specs: List[str], rounds: int, seed: int,
+              workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Play the rounds with the players given by the specifications and return
+    the summary of their scores.
+
+    :param specs: specifications of the players, see `parse_player_spec`
+    :param rounds: number of rounds
+    :param seed: the round `i` is played with seed `seed + i`
+    :param workers: number of worker processes
+    :return: the parameters of the run, the elapsed time and the summary
+        of the scores of each player
+    """
+    from .game import Arena, ArenaStats
+
+    arena = Arena()
+    for spec in specs:
+        factory = player_factory(spec)
+        arena.add_player(factory(), factory)
+    stats = ArenaStats(len(specs))
+    start = perf_counter()
+    for scores in arena.iter_rounds(rounds, seed, workers):
+        stats.update(scores)
+    return {
+        "rounds": rounds,
+        "seed": seed,
+        "workers": workers or 1,
+        "elapsed": perf_counter() - start,
+        "players": [{"player": spec, **summary}
+                    for spec, summary in zip(specs, stats.as_dict())],
+    }
+
+
+def format_summary(summary: Dict[str, Any], fmt: str, rows: str = "players",
+                   fields: List[str] = SUMMARY_FIELDS) -> str:
+    """
+    Format the summary from `run_arena` as JSON or CSV.
+
+    :param rows: key of the list in the summary written as the CSV rows
+    :param fields: columns of the CSV
+    """
+    if fmt == "json":
+        return json.dumps(summary, indent=2) + "\n"
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fields, extrasaction="ignore",
+                            lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(summary[rows])
+    return output.getvalue()
+
+
+def _write_output(text: str, path: Optional[str]) -> None:
+    """Write the text to the file, or to the standard output if None."""
+    if path:
+        with open(path, "w", newline="") as file:
+            file.write(text)
+    else:
+        sys.stdout.write(text)
+
+
+def arena_main(argv: Optional[List[str]] = None) -> int:
+    """Run the `arena` subcommand, return the exit code."""
+    parser = argparse.ArgumentParser(
+        prog="mathematico arena",
+        description="Play rounds of Mathematico and summarize the scores.",
+        epilog="Players are given as NAME[:KEY=VALUE,...], where NAME is one "
+               f"of {', '.join(sorted(PLAYERS))}, e.g. "
+               "simulation:maxtime=1e8")
+    parser.add_argument("players", nargs="+", metavar="PLAYER")
+    parser.add_argument("--rounds", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed of the first round, random by default")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes")
+    parser.add_argument("--format", choices=["json", "csv"], default="json")
+    parser.add_argument("--output", help="write the summary to this file")
+    args = parser.parse_args(argv)
+
+    seed = random.getrandbits(32) if args.seed is None else args.seed
+    try:
+        summary = run_arena(args.players, args.rounds, seed, args.workers)
+    except ValueError as error:
+        parser.error(str(error))
+    _write_output(format_summary(summary, args.format), args.output)
+    return 0
+
+
+def tournament_main(argv: Optional[List[str]] = None) -> int:
+    """Run the `tournament` subcommand, return the exit code."""
+    parser = argparse.ArgumentParser(
+        prog="mathematico tournament",
+        description="Compare the players on the same decks, each pair until "
+                    "a sequential test decides it.",
+        epilog="Players are given as for `mathematico arena`, the CSV "
+               "output lists the pairs.")
+    parser.add_argument("players", nargs="+", metavar="PLAYER")
+    parser.add_argument("--alpha", type=float, default=0.05,
+                        help="probability of a wrong winner of each pair")
+    parser.add_argument("--tolerance", type=float, default=0.0,
+                        help="difference of the mean scores counted as a tie")
+    parser.add_argument("--min-rounds", type=int, default=30)
+    parser.add_argument("--max-rounds", type=int, default=10_000)
+    parser.add_argument("--look-every", type=int, default=50,
+                        help="number of rounds between the tests")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed of the first round, random by default")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes")
+    parser.add_argument("--format", choices=["json", "csv"], default="json")
+    parser.add_argument("--output", help="write the summary to this file")
+    parser.add_argument("--verbose", action="store_true",
+                        help="print the progress after each test")
+    args = parser.parse_args(argv)
+    if len(args.players) < 2:
+        parser.error("at least two players are needed")
+
+    from .game.tournament import Tournament
+
+    seed = random.getrandbits(32) if args.seed is None else args.seed
+    try:
+        tournament = Tournament(args.alpha, args.tolerance, args.min_rounds,
+                                args.max_rounds, args.look_every)
+        for spec in args.players:
+            factory = player_factory(spec)
+            tournament.add_player(factory(), factory, spec)
+    except ValueError as error:
+        parser.error(str(error))
+    start = perf_counter()
+    tournament.run(seed, args.workers, args.verbose)
+    summary = {"seed": seed, "alpha": args.alpha,
+               "elapsed": perf_counter() - start, **tournament.as_dict()}
+    _write_output(format_summary(summary, args.format, "pairings",
+                                 PAIRING_FIELDS), args.output)
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point of the `mathematico` command, return the exit code."""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "arena":
+        return arena_main(argv[1:])
+    if argv and argv[0] == "tournament":
+        return tournament_main(argv[1:])
+    if argv and argv[0] in COMMANDS:
+        module = import_module(COMMANDS[argv[0]][0])
+        return module.main(argv[1:])  # type: ignore[no-any-return]
+
+    parser = argparse.ArgumentParser(
+        prog="mathematico",
+        description="Tools for the game of Mathematico.")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    commands.add_parser("arena", help="play rounds and summarize the scores")
+    commands.add_parser("tournament",
+                        help="rank the players by paired sequential tests")
+    for name, (_, help_) in COMMANDS.items():
+        commands.add_parser(name, help=help_)
+    parser.parse_args(argv)
+    parser.print_help()
+    return 2
@@ -9,19 +9,52 @@ Usage:
       the internal state, playing moves and calculating score
 
     * for playing one game, use class Mathematico - this shuffles the deck,
-      picks next card and notifies its players
+      picks next card and notifies its players, the counts of the remaining
+      cards are in `Mathematico.deck`, use class Deck to track them
 
-    * to play multiple games, use class Arena
+    * to play multiple games, use class Arena, with ArenaStats to keep
+      the statistics of the scores when streaming the rounds
+
+    * to compare players on the same decks until the differences of
+      their scores are significant, use class Tournament
+
+    * to store the played games, pass GameRecordWriter to the Arena and read
+      them with read_records or iter_records, ShardedRecordWriter splits
+      large datasets into shards of bounded size
+
+    * to share the estimates of positions equal up to the symmetries of
+      the board, use TranspositionTable keyed by canonical_form
 """
 from .board import Board
+from .deck import Deck
 from ._mathematico import Mathematico
 from .player import Player
 from .arena import Arena
+from .stats import ArenaStats, RunningStats
+from .records import GameRecordWriter, ShardedRecordWriter, read_records, \
+    iter_records
+from .timings import SearchStats, Timings
+from .symmetry import canonical_form
+from .transposition import TranspositionTable
+from .tournament import Pairing, Tournament
 
 
 __all__ = [
     "Mathematico",
     "Player",
     "Arena",
-    "Board"
+    "ArenaStats",
+    "Board",
+    "Deck",
+    "GameRecordWriter",
+    "Pairing",
+    "RunningStats",
+    "SearchStats",
+    "ShardedRecordWriter",
+    "Timings",
+    "Tournament",
+    "TranspositionTable",
+    "canonical_form",
+    "iter_records",
+    "read_records"
 ]
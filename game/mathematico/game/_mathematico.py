@@ -1,9 +1,29 @@
 """
 Define simple class for playing a single game of Mathematico.
 """
+import random
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from functools import partial
 from random import Random
-from typing import Union, List
+from time import perf_counter_ns
+from typing import Union, List, Optional, Tuple
+from .deck import Deck
 from .player import Player
+from .timings import Timings
+
+
+def _move_in_worker(player: Player, card: int,
+                    seed: Optional[int]) -> Tuple[Player, int]:
+    """
+    Let the player move in a worker of an executor, return the player (a copy
+    when run in another process) and the time of the move in nanoseconds.
+    If the seed is given, the `random` module is seeded with it first.
+    """
+    if seed is not None:
+        random.seed(seed)
+    start = perf_counter_ns()
+    player.move(card)
+    return player, perf_counter_ns() - start
 
 
 class Mathematico:
@@ -11,26 +31,34 @@ class Mathematico:
     Class Mathematico controls all card picking, and asks players about moves.
 
     Attributes
-        - _available_cards: list with draw-able cards
+        - _available_cards: list with draw-able cards, in the order
+          of drawing
+        - deck: counts of the cards not drawn yet, read-only
         - moves_played: counter of moves played
         - players: list with players to play the game
+        - placements: if recording, for each player the list of cells
+          (indices into the flattened grid) where the cards were placed
 
     Functionality
         - next_card: picks next card
         - add_player: adds a player to the game
         - finished: true if game has finished
         - play: simulates a single game
+        - drawn_cards: cards drawn so far
 
     Notes
         - each player must conform to the interface in player.py
         - only handles a single game
     """
-    def __init__(self, seed=None):
+    def __init__(self, seed=None, record: bool = False):
         self.moves_played = 0
         self.players: List[Player] = []
+        self.record = record
+        self.placements: List[List[int]] = []
         self._available_cards = [i for i in range(1, 14) for _ in range(4)]
         self._random = Random(seed)
         self._random.shuffle(self._available_cards)
+        self._deck = Deck()
 
     def __str__(self) -> str:
         """
@@ -61,8 +89,18 @@ class Mathematico:
         # the cards are shuffled at the beginning
         card = self._available_cards[self.moves_played]
         self.moves_played += 1
+        self._deck.remove(card)
         return card
 
+    @property
+    def deck(self) -> Tuple[int, ...]:
+        """
+        Return the counts of the cards not drawn yet, `deck[r - 1]` is the
+        number of remaining cards of rank `r`. Use `Deck(game.deck)` to get
+        a deck the player can modify.
+        """
+        return self._deck.snapshot()
+
     def add_player(self, player: Player) -> int:
         """
         Adds the player to the game.
@@ -74,8 +112,13 @@ class Mathematico:
         if self.moves_played != 0:
             raise ValueError("Game is in progress")
         self.players.append(player)
+        self.placements.append([])
         return len(self.players) - 1
 
+    def drawn_cards(self) -> List[int]:
+        """Return the cards drawn so far, in the order of drawing."""
+        return self._available_cards[:self.moves_played]
+
     def finished(self) -> bool:
         """
         Checks whether the game is finished either by filling the grid or by
@@ -86,20 +129,108 @@ class Mathematico:
         return self.moves_played >= 25 \
             or self.moves_played >= len(self._available_cards)
 
-    def play(self, verbose=False) -> List[int]:
+    def play(self, verbose=False, timings: Optional[Timings] = None,
+             executor: Optional[Executor] = None) -> List[int]:
         """
         Simulates one game, for each round picks one card, lets players start
         their move and at the end computes final scores.
 
         :param verbose: if True, prints information about game
+        :param timings: if given, the time of drawing the cards, of the moves
+            and of the scoring of each player is recorded to it
+        :param executor: if given, all players move concurrently in it and
+            the next card is drawn when all of them have moved, see
+            `_move_concurrent`
         :return: list of final scores, the index corresponds to the index
             returned by `add_player`
         """
+        if executor is None:
+            move_players = self._move_serial
+        else:
+            move_players = partial(self._move_concurrent, executor)
+        if timings is not None:
+            timings.ensure_players(len(self.players))
+
         while not self.finished():
+            if timings is not None:
+                start = perf_counter_ns()
             next_card = self.next_card()
+            if timings is not None:
+                timings.deck.record(perf_counter_ns() - start)
             assert next_card is not None
             if verbose:
                 print(self)
+
+            if self.record:
+                before = [bytes(player.board.cells) for player in self.players]
+            elapsed = move_players(next_card, timings is not None)
+            if timings is not None:
+                for histogram, duration in zip(timings.moves, elapsed):
+                    histogram.record(duration)
+            if self.record:
+                for idx, cells in enumerate(before):
+                    self._record_placement(idx, cells, next_card)
+
+        if timings is None:
+            return [player.get_score() for player in self.players]
+        scores = []
+        for idx, player in enumerate(self.players):
+            start = perf_counter_ns()
+            scores.append(player.get_score())
+            timings.scoring[idx].record(perf_counter_ns() - start)
+        return scores
+
+    def _move_serial(self, card: int, timed: bool) -> List[int]:
+        """
+        Let the players move one after another, return the times of their
+        moves in nanoseconds if `timed`, otherwise an empty list.
+        """
+        if not timed:
             for player in self.players:
-                player.move(next_card)
-        return [player.get_score() for player in self.players]
+                player.move(card)
+            return []
+        elapsed = []
+        for player in self.players:
+            start = perf_counter_ns()
+            player.move(card)
+            elapsed.append(perf_counter_ns() - start)
+        return elapsed
+
+    def _move_concurrent(self, executor: Executor, card: int,
+                         timed: bool) -> List[int]:
+        """
+        Let the players move concurrently in the executor, return the times
+        of their moves in nanoseconds.
+
+        With a process pool, the players are sent to the workers for each
+        move and their state is copied back by `Player.update_from`, and
+        the `random` module of the worker is seeded from the seed of the
+        game before each move. The game is then deterministic for a given
+        seed, regardless of the number of workers. With a thread pool, the
+        players share the `random` module, so only the players with their
+        own source of randomness are deterministic.
+        """
+        in_processes = isinstance(executor, ProcessPoolExecutor)
+        futures: List["Future[Tuple[Player, int]]"] = [
+            executor.submit(
+                _move_in_worker, player, card,
+                self._random.getrandbits(64) if in_processes else None)
+            for player in self.players
+        ]
+        elapsed = []
+        for player, future in zip(self.players, futures):
+            moved, duration = future.result()
+            if moved is not player:
+                player.update_from(moved)
+            elapsed.append(duration)
+        return elapsed
+
+    def _record_placement(self, idx: int, before: bytes, card: int) -> None:
+        """Record the cell the idx-th player played at since `before`."""
+        player = self.players[idx]
+        after = player.board.cells
+        for cell, value in enumerate(before):
+            if value != after[cell]:
+                self.placements[idx].append(cell)
+                return
+        raise RuntimeError(f"Player {player} did not play {card}")
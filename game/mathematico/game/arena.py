@@ -1,8 +1,89 @@
-import time
-from typing import List, Any
+import random
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import count
+from random import Random
+from time import perf_counter_ns
+from typing import List, Any, Callable, Optional, Sequence, Tuple, \
+    Iterator, Deque
 
 from .player import Player
 from ._mathematico import Mathematico
+from .records import RecordWriter, pack_game
+from .timings import Timings
+
+
+PlayerFactory = Callable[[], Player]
+
+
+def _play_round(players: Sequence[Player], seed: Any,
+                index: Optional[int] = None,
+                timings: Optional[Timings] = None) -> Tuple[List[int], bytes]:
+    """
+    Play a single game with the given players.
+
+    :param players: the players
+    :param seed: seed of the deck, the `random` module and the players are
+        seeded from it too, so that the round does not depend on the
+        previous rounds played by the process; the state of the `random`
+        module is restored afterwards
+    :param index: if not None, the game is recorded with this index
+    :param timings: if given, the time of the whole round is recorded to it,
+        and the timings of the game if `timings.per_move` is set
+    :return: scores of the players and the packed records of the game
+        (empty if not recorded)
+    """
+    start = perf_counter_ns()
+    seeds = Random(seed)
+    state = random.getstate()
+    random.seed(seeds.getrandbits(64))
+    try:
+        game = Mathematico(seed=seed, record=index is not None)
+        for player in players:
+            player.seed(seeds.getrandbits(64))
+            player.reset()
+            game.add_player(player)
+        scores = game.play(verbose=False, timings=timings
+                           if timings is not None and timings.per_move
+                           else None)
+    finally:
+        random.setstate(state)
+    if timings is not None:
+        timings.rounds.record(perf_counter_ns() - start)
+    records = b"" if index is None else pack_game(game, scores, index)
+    return scores, records
+
+
+def _play_rounds(
+    players: Sequence[Tuple[Player, Optional[PlayerFactory]]], seed: int,
+    start: int, stop: int, first_game: Optional[int],
+    timings: Optional[Timings]
+) -> Tuple[List[List[int]], bytes, Optional[Timings]]:
+    """
+    Play the rounds `start..stop-1` in a worker process. Players are rebuilt
+    from the factory if one is given, otherwise the (unpickled) player
+    is used.
+
+    :return: 2d list, `results[idx]` are the scores of `idx`-th player,
+        the packed records of the games if `first_game` is not None, with
+        the index `first_game + i` of the round `i`, and the timings of the
+        rounds recorded to the empty `timings`, if given
+    """
+    instances = [
+        player if factory is None else factory()
+        for player, factory in players
+    ]
+    results: List[List[int]] = [[] for _ in instances]
+    records = []
+    for i in range(start, stop):
+        index = None if first_game is None else first_game + i
+        scores, game_records = _play_round(instances, seed + i, index,
+                                           timings)
+        records.append(game_records)
+        for idx, result in enumerate(scores):
+            results[idx].append(result)
+    return results, b"".join(records), timings
 
 
 class Arena:
@@ -14,10 +95,12 @@ class Arena:
         reset: reset the results so far
         add_player: add a player to the arena
         run: run the simulation
+        iter_rounds: run the simulation, yielding scores of each round
     """
 
     def __init__(self):
         self.players: List[Player] = []
+        self.factories: List[Optional[PlayerFactory]] = []
         self.results: List[List[int]] = []
 
     def reset(self):
@@ -25,12 +108,24 @@ class Arena:
         for player_results in self.results:
             player_results.clear()
 
-    def add_player(self, player: Player):
-        """Add new player to the arena."""
+    def add_player(self, player: Player,
+                   factory: Optional[PlayerFactory] = None):
+        """
+        Add new player to the arena.
+
+        :param player: the player
+        :param factory: optional callable without arguments creating a new
+            equivalent player, used instead of pickling the player when
+            running with multiple workers
+        """
         self.players.append(player)
+        self.factories.append(factory)
         self.results.append([])
 
-    def run(self, rounds: int = 100, verbose: bool = True, seed: Any = None):
+    def run(self, rounds: int = 100, verbose: bool = True, seed: Any = None,
+            workers: Optional[int] = None,
+            recorder: Optional[RecordWriter] = None,
+            timings: Optional[Timings] = None):
         """
         Repeatedly play the game of Mathematico.
 
@@ -40,31 +135,130 @@ class Arena:
         Arguments
         ---------
             rounds: number of rounds to play
-            verbose: if True, print the elapsed time, also passed
-                to each round
-            seed: the seed to play the same game from
+            verbose: if True, print the elapsed time and the statistics
+                of the durations of the rounds
+            seed: the round `i` is played with seed `seed + i`, random if
+                None, see `iter_rounds`
+            workers: if more than 1, the rounds are split among this
+                many processes, each round is played with the same deck
+                and the same seeds of the players as in the serial run,
+                so the results are the same unless the players carry
+                state between the games; the players are pickled or
+                created by their factories and the instances in the arena
+                are not modified
+            recorder: if given, the records of all games are written to
+                it, the round `i` with the game index `recorder.games + i`,
+                so that the games appended by the runs stay distinct
+            timings: if given, the durations of the rounds, moves, card
+                draws and scoring are recorded to it
 
         Returns
         -------
             result: 2d list, `results[idx]` is the list of scores
                 obtained by `idx`-th player
         """
-        start = time.time()
-
-        for i in range(rounds):
-            # initialize a new game
-            game = Mathematico(seed=seed+i)
-            for player in self.players:
-                player.reset()
-                game.add_player(player)
-
-            # play the game and collect rewards
-            results = game.play(verbose=False)
-            for idx, result in enumerate(results):
+        if verbose and timings is None:
+            # the summary needs only the durations of the whole rounds
+            timings = Timings(per_move=False)
+        start = perf_counter_ns()
+
+        for scores in self.iter_rounds(rounds, seed, workers, recorder,
+                                       timings):
+            for idx, result in enumerate(scores):
                 self.results[idx].append(result)
 
         if verbose:
-            total_time = time.time() - start
-            print(f"Steps run: {rounds}\tElapsed time: {total_time}")
+            assert timings is not None
+            total_time = (perf_counter_ns() - start) / 1e9
+            per_round = timings.rounds
+            print(f"Steps run: {rounds}\tElapsed time: {total_time}\t"
+                  f"Round mean: {per_round.mean / 1e6:.3f} ms\t"
+                  f"Round max: {(per_round.max or 0) / 1e6:.3f} ms")
 
         return self.results
+
+    def iter_rounds(
+        self, rounds: Optional[int] = None, seed: Any = None,
+        workers: Optional[int] = None,
+        recorder: Optional[RecordWriter] = None,
+        timings: Optional[Timings] = None,
+        executor: Optional[Executor] = None
+    ) -> Iterator[Tuple[int, ...]]:
+        """
+        Repeatedly play the game of Mathematico and yield the scores of the
+        players after each round, in the order of the rounds. Unlike `run`,
+        the scores are not stored.
+
+        Arguments
+        ---------
+            rounds: number of rounds to play, if None, play indefinitely
+            seed: the round `i` is played with seed `seed + i`, if None,
+                the seed is drawn from the `random` module
+            workers: if more than 1, the rounds are played by this many
+                processes, see `run`
+            recorder: if given, the records of all games are written to it
+            timings: if given, the timings of the rounds are recorded to it
+            executor: if given with `workers`, the rounds are played in this
+                process pool instead of a new one, so that a pool can be
+                shared by many calls; it is not shut down
+
+        Yields
+        ------
+            scores: tuple with the score of each player in the round
+        """
+        if seed is None:
+            seed = random.getrandbits(64)
+        if workers is not None and workers > 1:
+            yield from self._iter_parallel(rounds, seed, workers, recorder,
+                                           timings, executor)
+            return
+        first_game = None if recorder is None else recorder.games
+        for i in count() if rounds is None else range(rounds):
+            index = None if first_game is None else first_game + i
+            scores, records = _play_round(self.players, seed + i, index,
+                                          timings)
+            if recorder is not None:
+                recorder.write_bytes(records)
+            yield tuple(scores)
+
+    def _iter_parallel(
+        self, rounds: Optional[int], seed: int, workers: int,
+        recorder: Optional[RecordWriter], timings: Optional[Timings],
+        executor: Optional[Executor] = None
+    ) -> Iterator[Tuple[int, ...]]:
+        """Play the rounds in a pool of `workers` processes (the executor,
+        if given), keeping only a few chunks of rounds in flight."""
+        if rounds is None:
+            chunk = 16
+        else:
+            # a few chunks per worker to balance the load
+            chunk = max(1, rounds // (4 * workers))
+        players = list(zip(self.players, self.factories))
+        pending: Deque[
+            "Future[Tuple[List[List[int]], bytes, Optional[Timings]]]"
+        ] = deque()
+        next_round = 0
+        first_game = None if recorder is None else recorder.games
+
+        with nullcontext(executor) if executor is not None \
+                else ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                while len(pending) < 2 * workers and (
+                    rounds is None or next_round < rounds
+                ):
+                    stop = next_round + chunk
+                    if rounds is not None:
+                        stop = min(stop, rounds)
+                    pending.append(executor.submit(
+                        _play_rounds, players, seed, next_round, stop,
+                        first_game, None if timings is None
+                        else Timings(timings.per_move)))
+                    next_round = stop
+                if not pending:
+                    return
+                results, records, chunk_timings = pending.popleft().result()
+                if recorder is not None:
+                    recorder.write_bytes(records)
+                if timings is not None and chunk_timings is not None:
+                    timings.merge(chunk_timings)
+                yield from zip(*results)
@@ -0,0 +1,213 @@
+"""
+This file defines BoardBatch, the vectorized counterpart of the Board, which
+keeps many boards at once in NumPy arrays. It is meant for bulk evaluation of
+games and batched simulations, and requires numpy to be installed.
+"""
+from typing import Iterable, Optional
+
+import numpy as np
+
+from .board import Board, EMPTY_CELL, _cell_lines
+from .eval import LINE_SCORES, RANK_BITS, DIAGONAL_BONUS, MAX_RANK, \
+    evaluate_line_reference, key_to_rle
+
+
+N_RANKS = MAX_RANK + 1  # including the empty cell
+
+# the table of line scores as sorted arrays, for use with np.searchsorted
+_KEYS = np.array(sorted(LINE_SCORES), dtype=np.uint64)
+_SCORES = np.array([LINE_SCORES[key] for key in sorted(LINE_SCORES)],
+                   dtype=np.int64)
+
+# weight of each rank in the packed line key, the empty cell is ignored
+_RANK_WEIGHTS = np.array(
+    [0] + [1 << (RANK_BITS * rank) for rank in range(1, N_RANKS)],
+    dtype=np.uint64
+)
+
+
+def _line_membership(size: int) -> np.ndarray:
+    """Return (cells, lines) matrix, 1 if the cell is part of the line."""
+    cell_lines = _cell_lines(size)
+    membership = np.zeros((size * size, 2 * size + 2), dtype=np.uint8)
+    for cell, lines in enumerate(cell_lines):
+        membership[cell, list(lines)] = 1
+    return membership
+
+
+def _line_cells(size: int) -> np.ndarray:
+    """Return (lines, size) array with the cells of each line."""
+    cell_lines = _cell_lines(size)
+    return np.array([
+        [cell for cell, lines in enumerate(cell_lines) if line in lines]
+        for line in range(2 * size + 2)
+    ])
+
+
+def _score_keys(keys: np.ndarray) -> np.ndarray:
+    """Look up the scores of lines given by their `line_key`, the lines
+    missing from the table are scored by the rules as in `Board.score`."""
+    idx = np.searchsorted(_KEYS, keys)
+    idx = np.minimum(idx, len(_KEYS) - 1)
+    scores: np.ndarray = _SCORES[idx]
+    missing = _KEYS[idx] != keys
+    if missing.any():
+        # e.g. five cards of the same rank, which cannot occur in a game
+        scores[missing] = [evaluate_line_reference(key_to_rle(int(key)))
+                           for key in keys[missing]]
+    return scores
+
+
+def _add_diagonal_bonus(line_scores: np.ndarray, size: int) -> np.ndarray:
+    """Sum the scores of the lines of each board, including the bonus."""
+    diagonals = line_scores[:, 2 * size:]
+    diagonals += np.where(diagonals != 0, DIAGONAL_BONUS, 0)
+    scores: np.ndarray = line_scores.sum(axis=1)
+    return scores
+
+
+def score_lines(counts: np.ndarray) -> np.ndarray:
+    """
+    Score the lines given by their rank counts.
+
+    :param counts: array of shape (..., N_RANKS) with the counts of each rank
+    :return: array of shape (...) with the scores of the lines, without the
+        diagonal bonus
+    """
+    return _score_keys(counts.astype(np.uint64) @ _RANK_WEIGHTS)
+
+
+def score_cells(cells: np.ndarray, size: int = 5) -> np.ndarray:
+    """
+    Score the boards given only by their grids, faster than creating
+    BoardBatch when the rank counts are not needed.
+
+    :param cells: (N, size*size) array with the cards on the boards
+    :param size: size of each board
+    :return: (N,) array with the score of each board
+    """
+    keys = _RANK_WEIGHTS[cells[:, _line_cells(size)]].sum(axis=2)
+    return _add_diagonal_bonus(_score_keys(keys), size)
+
+
+class BoardBatch:
+    """
+    Batch of N boards stored as struct of arrays. Positions are the indices
+    of the cells in the flattened grid, i.e. `row * size + col`.
+
+    Attributes
+    ----------
+        cells: (N, size*size) uint8 array, empty cells are EMPTY_CELL
+        counts: (N, 2*size+2, N_RANKS) uint8 array, counts of each rank in
+            the lines ordered as rows, columns, main and anti diagonal
+        size: size of each board
+
+    Methods
+    -------
+        from_boards: create the batch from Board instances
+        from_cells: create the batch from the flattened grids
+        board: return n-th board as Board
+        empty_mask: mask of empty cells
+        make_moves: play one move on each board
+        unmake_moves: undo one move on each board
+        scores: scores of all boards
+    """
+
+    def __init__(self, n: int, size: int = 5):
+        self.size = size
+        self.cells = np.zeros((n, size * size), dtype=np.uint8)
+        self.counts = np.zeros((n, 2 * size + 2, N_RANKS), dtype=np.uint8)
+        self._membership = _line_membership(size)
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    @classmethod
+    def from_cells(cls, cells: np.ndarray, size: int = 5) -> "BoardBatch":
+        """
+        Create the batch from the flattened grids.
+
+        :param cells: (N, size*size) array with the cards on the boards
+        :param size: size of each board
+        :return: new batch with a copy of the cells
+        """
+        cells = np.asarray(cells, dtype=np.uint8)
+        batch = cls(len(cells), size)
+        batch.cells[:] = cells
+        one_hot = (cells[:, :, None] == np.arange(N_RANKS)).astype(np.uint8)
+        counts = np.einsum("ncr,cl->nlr", one_hot, batch._membership)
+        counts[:, :, EMPTY_CELL] = 0
+        batch.counts[:] = counts
+        return batch
+
+    @classmethod
+    def from_boards(cls, boards: Iterable[Board]) -> "BoardBatch":
+        """Create the batch with the copies of the given boards."""
+        boards = list(boards)
+        size = boards[0].size if boards else 5
+        data = b"".join(bytes(board.cells) for board in boards)
+        cells = np.frombuffer(data, dtype=np.uint8)
+        cells = cells.reshape(len(boards), size * size)
+        return cls.from_cells(cells, size)
+
+    def board(self, n: int) -> Board:
+        """Return the copy of n-th board as Board."""
+        board = Board(self.size)
+        for idx, card in enumerate(self.cells[n].tolist()):
+            if card != EMPTY_CELL:
+                board.make_move(divmod(idx, self.size), card)
+        return board
+
+    def empty_mask(self) -> np.ndarray:
+        """Return (N, size*size) boolean mask of the empty cells."""
+        mask: np.ndarray = self.cells == EMPTY_CELL
+        return mask
+
+    def _rows(self, where: Optional[np.ndarray]) -> np.ndarray:
+        """Return the indices of the boards selected by the mask `where`."""
+        if where is None:
+            return np.arange(len(self.cells))
+        return np.flatnonzero(where)
+
+    def make_moves(self, positions: np.ndarray, cards: np.ndarray,
+                   where: Optional[np.ndarray] = None) -> None:
+        """
+        Play one move on each board.
+
+        :param positions: (N,) array of positions to play at
+        :param cards: (N,) array of cards to place
+        :param where: optional (N,) boolean mask, if given, only the boards
+            where it is True are modified
+        :raises ValueError: if some position is not empty
+        """
+        rows = self._rows(where)
+        positions = np.asarray(positions)[rows]
+        cards = np.asarray(cards)[rows]
+        if np.any(self.cells[rows, positions] != EMPTY_CELL):
+            raise ValueError("Some of the positions are not empty")
+        self.cells[rows, positions] = cards
+        self.counts[rows, :, cards] += self._membership[positions]
+
+    def unmake_moves(self, positions: np.ndarray,
+                     where: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Undo one move on each board.
+
+        :param positions: (N,) array of positions to clear
+        :param where: optional (N,) boolean mask, if given, only the boards
+            where it is True are modified
+        :return: array with the removed cards, for each selected board
+        :raises ValueError: if some position is empty
+        """
+        rows = self._rows(where)
+        positions = np.asarray(positions)[rows]
+        cards: np.ndarray = self.cells[rows, positions]
+        if np.any(cards == EMPTY_CELL):
+            raise ValueError("Undoing empty square")
+        self.cells[rows, positions] = EMPTY_CELL
+        self.counts[rows, :, cards] -= self._membership[positions]
+        return cards
+
+    def scores(self) -> np.ndarray:
+        """Return (N,) array with the score of each board."""
+        return _add_diagonal_bonus(score_lines(self.counts), self.size)
@@ -2,51 +2,219 @@
 This file defines the grid of the game Mathematico alongside with the move
 generation and formatting of the text output of the grid.
 """
-from typing import List, Tuple, Iterator, Dict
-from collections import defaultdict
+import random
+from array import array
+from functools import lru_cache
+from typing import Any, List, Tuple, Iterator, Dict
 
 from ._utils import rle
-from .eval import evaluate_line, DIAGONAL_BONUS
+from .eval import LINE_SCORES, RANK_BITS, DIAGONAL_BONUS, \
+    evaluate_line_reference, key_to_rle
 
 
 EMPTY_CELL = 0
+MAX_CARD = 13
+CELL_BITS = 4  # bits of a cell in the packed encoding
 Rle = Dict[int, int]
 
 
+@lru_cache(maxsize=None)
+def _cell_lines(size: int) -> Tuple[Tuple[int, ...], ...]:
+    """
+    For each cell of the flattened grid, return the indices of the lines
+    passing through it. Lines are numbered as rows `0..size-1`, columns
+    `size..2*size-1`, main diagonal `2*size` and anti diagonal `2*size+1`.
+    """
+    result = []
+    for row in range(size):
+        for col in range(size):
+            lines = [row, size + col]
+            if row == col:
+                lines.append(2 * size)
+            if row + col + 1 == size:
+                lines.append(2 * size + 1)
+            result.append(tuple(lines))
+    return tuple(result)
+
+
+# scores of diagonals including the bonus, indexed by `line_key`
+_DIAGONAL_SCORES = {
+    key: score + DIAGONAL_BONUS if score else 0
+    for key, score in LINE_SCORES.items()
+}
+
+
+@lru_cache(maxsize=None)
+def _line_tables(size: int) -> Tuple[Tuple[Tuple[int, Rle], ...], ...]:
+    """
+    For each cell of the flattened grid, return pairs of line index and the
+    table with the scores of that line, see `_cell_lines`.
+    """
+    return tuple(
+        tuple((line, LINE_SCORES if line < 2 * size else _DIAGONAL_SCORES)
+              for line in lines)
+        for lines in _cell_lines(size)
+    )
+
+
+@lru_cache(maxsize=None)
+def _zobrist_keys(size: int) -> Tuple[int, ...]:
+    """
+    Return the random 64-bit keys of the Zobrist hash, the key of card
+    `card` in cell `idx` of the flattened grid is at index `idx * 16 + card`.
+    The keys are the same in every process.
+    """
+    rng = random.Random(size)
+    return tuple(rng.getrandbits(64) for _ in range(size * size * 16))
+
+
+@lru_cache(maxsize=None)
+def _positions(size: int) -> Tuple[Tuple[int, int], ...]:
+    """Return (row, col) tuple for each cell of the flattened grid."""
+    return tuple((row, col) for row in range(size) for col in range(size))
+
+
 class Board:
     """
     The Board of the game is 5x5 grid with integer values representing the
     moves of the players. We encode the moves as tuples (x, y) denoting the
     real position inside our array.
 
+    The grid is stored as a flat bytearray, and each line (rows, columns and
+    both diagonals) keeps the counts of the ranks in it packed into a single
+    integer as described in `eval.line_key`. The score of each line and the
+    total score are updated by every move, only for the affected lines.
+
+    The indices of the empty cells are kept in the first `empty_count` items
+    of a dense array, a move swaps the cell with the last empty one, so that
+    a random empty cell is picked in constant time.
+
+    The board is packed into `CELL_BITS` bits per cell (13 bytes for the 5x5
+    grid) by `to_int` and `to_bytes`, which are also used for pickling; the
+    lines, scores and the hash are rebuilt on load. Boards are equal if their
+    grids are, the hash is derived from the Zobrist hash and changes with the
+    moves, use `to_bytes` as the key of a board which is still played.
+
     Attributes
     ----------
-        grid: 2D array, empty values are stored as Board.EMPTY_CELL
+        cells: flattened grid, empty values are stored as EMPTY_CELL
+        lines: packed rank counts of each line, see `_cell_lines`
+        line_scores: score of each line, including the diagonal bonus
         occupied_cells: number of occupied cells
         size: size of the board
+        zobrist: Zobrist hash of the grid, updated by every move
+        empty_count: number of empty cells
+        empty_cells: view of the indices of the empty cells in the
+            flattened grid, in no particular order
 
     Methods
     -------
         integrity_check: returns True if the integrity holds
+        grid: the grid as 2D list
         row: n-th row as a list
         col: n-th column as a list
         diag: main/anti diagonal as a list
         row_rle: rle encoding of the n-th row
         col_rle: rle encoding of the n-th column
         diag_rle: rle encoding of the diagonal
+        lines_of: indices of the lines through the position
         make_move: updates a grid with the move
         unmake_move: undos the specified move
         possible_moves: iterates over all possible moves
-        score: score of the filled up board
+        random_empty_cell: picks an empty position at random
+        score: score of the board
+        score_with: score of the board after a move, without playing it
+        to_int: the grid packed into an integer
+        from_int: board from the packed integer
+        to_bytes: the grid packed into bytes
+        from_bytes: board from the packed bytes
     """
+    __slots__ = (
+        "size", "cells", "lines", "line_scores", "occupied_cells",
+        "_score", "_line_tables", "zobrist", "_zobrist_keys",
+        "_empty", "_empty_pos"
+    )
 
     def __init__(self, size: int = 5):
-        self.grid = [[EMPTY_CELL]*size for _ in range(size)]
-        self.rows_rle: List[Rle] = [defaultdict(int) for _ in range(size)]
-        self.cols_rle: List[Rle] = [defaultdict(int) for _ in range(size)]
-        self.main_diagonal_rle: Rle = defaultdict(int)
-        self.anti_diagonal_rle: Rle = defaultdict(int)
-        self.occupied_cells: int = 0
+        self._clear(size)
+
+    def __getstate__(self) -> Tuple[int, bytes]:
+        return self.size, self.to_bytes()
+
+    def __setstate__(self, state: Tuple[int, bytes]) -> None:
+        size, data = state
+        self._load(int.from_bytes(data, "little"), size)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Board):
+            return NotImplemented
+        return self.size == other.size and self.cells == other.cells
+
+    def __hash__(self) -> int:
+        return hash((self.size, self.zobrist))
+
+    def to_int(self) -> int:
+        """Return the grid packed into an integer, the cell `idx` of the
+        flattened grid in the bits `CELL_BITS * idx` and above."""
+        return int.from_bytes(bytes(
+            low | high << CELL_BITS
+            for low, high in zip(self.cells[::2], self.cells[1::2] + b"\0")
+        ), "little")
+
+    @classmethod
+    def from_int(cls, value: int, size: int = 5) -> "Board":
+        """
+        Return the board with the grid packed by `to_int`.
+
+        :raises ValueError: if the value is not a packed grid of the size
+        """
+        board = cls.__new__(cls)
+        board._load(value, size)
+        return board
+
+    def to_bytes(self) -> bytes:
+        """Return the grid packed into `ceil(size * size / 2)` bytes."""
+        return self.to_int().to_bytes((self.size * self.size + 1) // 2,
+                                      "little")
+
+    @classmethod
+    def from_bytes(cls, data: bytes, size: int = 5) -> "Board":
+        """
+        Return the board with the grid packed by `to_bytes`.
+
+        :raises ValueError: if the data is not a packed grid of the size
+        """
+        if len(data) != (size * size + 1) // 2:
+            raise ValueError(f"Expected {(size * size + 1) // 2} bytes, "
+                             f"got {len(data)}")
+        return cls.from_int(int.from_bytes(data, "little"), size)
+
+    def _load(self, value: int, size: int) -> None:
+        """Replace the content of the board with the packed grid."""
+        if not 0 <= value < 1 << (CELL_BITS * size * size):
+            raise ValueError("The packed grid does not fit the board")
+        self._clear(size)
+        mask = (1 << CELL_BITS) - 1
+        for idx, position in enumerate(_positions(size)):
+            card = value >> (CELL_BITS * idx) & mask
+            if card > MAX_CARD:
+                raise ValueError(f"Invalid card {card} in the packed grid")
+            if card != EMPTY_CELL:
+                self.make_move(position, card)
+
+    def _clear(self, size: int) -> None:
+        """Make the board empty grid of the given size."""
+        self.size = size
+        self.cells = bytearray(size * size)
+        self.lines = [0] * (2 * size + 2)
+        self.line_scores = [0] * (2 * size + 2)
+        self._score = 0
+        self.occupied_cells = 0
+        self._empty = array("H", range(size * size))
+        self._empty_pos = array("H", range(size * size))
+        self._line_tables = _line_tables(size)
+        self.zobrist = 0
+        self._zobrist_keys = _zobrist_keys(size)
 
     @staticmethod
     def _cell_to_str(cell: int) -> str:
@@ -75,7 +243,7 @@ class Board:
         -------
             string representation of the grid
         """
-        long_line = "+--" * len(self.grid) + "+"
+        long_line = "+--" * self.size + "+"
         result = [long_line]
         for row in self.grid:
             line = "|" + "|".join(map(self._cell_to_str, row)) + "|"
@@ -83,9 +251,23 @@ class Board:
             result.append(long_line)
         return "\n".join(result)
 
+    @property
+    def grid(self) -> List[List[int]]:
+        """Return a copy of the grid as 2D list."""
+        return [self.row(row) for row in range(self.size)]
+
+    @grid.setter
+    def grid(self, grid: List[List[int]]) -> None:
+        """Replace the content of the board with the 2D list `grid`."""
+        self._clear(len(grid))
+        for row, values in enumerate(grid):
+            for col, value in enumerate(values):
+                if value != EMPTY_CELL:
+                    self.make_move((row, col), value)
+
     def is_empty(self, row: int, col: int) -> bool:
         """Return whether cell at (row, col) is empty."""
-        return self.grid[row][col] == EMPTY_CELL
+        return self.cells[row * self.size + col] == EMPTY_CELL
 
     def integrity_check(self) -> None:
         """
@@ -96,36 +278,56 @@ class Board:
 
         :raises RuntimeError: if data mismatch
         """
-        non_empty = sum([x != EMPTY_CELL for row in self.grid for x in row])
+        non_empty = sum([x != EMPTY_CELL for x in self.cells])
         if non_empty != self.occupied_cells:
             raise RuntimeError("Occupied cells mismatch")
 
-        for row in range(len(self.grid)):
-            if self.rows_rle[row] != rle(self.row(row), [EMPTY_CELL]):
+        for row in range(self.size):
+            if self.row_rle(row) != rle(self.row(row), [EMPTY_CELL]):
                 raise RuntimeError("Rle of row mismatch")
-        for col in range(len(self.grid)):
-            if self.cols_rle[col] != rle(self.col(col), [EMPTY_CELL]):
+        for col in range(self.size):
+            if self.col_rle(col) != rle(self.col(col), [EMPTY_CELL]):
                 raise RuntimeError("Rle of col mismatch")
-        if self.main_diagonal_rle != rle(self.diag(True), [EMPTY_CELL]):
+        if self.diag_rle(True) != rle(self.diag(True), [EMPTY_CELL]):
             raise RuntimeError("Rle of main diagonal mismatch")
-        if self.anti_diagonal_rle != rle(self.diag(False), [EMPTY_CELL]):
+        if self.diag_rle(False) != rle(self.diag(False), [EMPTY_CELL]):
             raise RuntimeError("Rle of anti diagonal mismatch")
 
+        for line, score in enumerate(self.line_scores):
+            if score != self._line_score(line):
+                raise RuntimeError("Score of line mismatch")
+        if sum(self.line_scores) != self._score:
+            raise RuntimeError("Total score mismatch")
+
+        empty = sorted(self.empty_cells)
+        if empty != [i for i, x in enumerate(self.cells) if x == EMPTY_CELL]:
+            raise RuntimeError("Empty cells mismatch")
+        for pos, idx in enumerate(self._empty):
+            if self._empty_pos[idx] != pos:
+                raise RuntimeError("Positions of empty cells mismatch")
+
+        zobrist = 0
+        for idx, cell in enumerate(self.cells):
+            if cell != EMPTY_CELL:
+                zobrist ^= self._zobrist_keys[idx * 16 + cell]
+        if zobrist != self.zobrist:
+            raise RuntimeError("Zobrist hash mismatch")
+
     def row(self, n: int) -> List[int]:
         """Return n-th row."""
-        return self.grid[n]
+        return list(self.cells[n * self.size:(n + 1) * self.size])
 
     def row_rle(self, n: int) -> Dict[int, int]:
         """Return RLE of n-th row."""
-        return self.rows_rle[n]
+        return key_to_rle(self.lines[n])
 
     def col(self, n: int) -> List[int]:
         """Return n-th column."""
-        return [row[n] for row in self.grid]
+        return list(self.cells[n::self.size])
 
     def col_rle(self, n: int) -> Dict[int, int]:
         """Return RLE of n-th column."""
-        return self.cols_rle[n]
+        return key_to_rle(self.lines[self.size + n])
 
     def diag(self, main_diagonal: bool = True) -> List[int]:
         """
@@ -134,13 +336,10 @@ class Board:
         :param main_diagonal: if True returns main diagonal, else anti diagonal
         :return: array with elements on the corresponding diagonal
         """
+        size = self.size
         if main_diagonal:
-            col = 0
-            dx = 1
-        else:
-            col = self.size - 1
-            dx = -1
-        return [self.grid[i][col + dx*i] for i in range(self.size)]
+            return list(self.cells[::size + 1])
+        return [self.cells[i * size + size - 1 - i] for i in range(size)]
 
     def diag_rle(self, main_diagonal: bool = True) -> Dict[int, int]:
         """Return RLE of a diagonal.
@@ -149,8 +348,16 @@ class Board:
         :return: rle encoding of the main/anti-diagonal
         """
         if main_diagonal:
-            return self.main_diagonal_rle
-        return self.anti_diagonal_rle
+            return key_to_rle(self.lines[2 * self.size])
+        return key_to_rle(self.lines[2 * self.size + 1])
+
+    def lines_of(self, position: Tuple[int, int]) -> Tuple[int, ...]:
+        """
+        Return the indices of the lines through the position, into `lines`
+        and `line_scores`: rows, columns, then the main and anti diagonal.
+        """
+        row, col = position
+        return _cell_lines(self.size)[row * self.size + col]
 
     def make_move(self, position: Tuple[int, int], move: int) -> None:
         """
@@ -162,18 +369,36 @@ class Board:
         :raises ValueError: if the position is not empty
         """
         row, col = position
-        if not self.is_empty(row, col):
+        idx = row * self.size + col
+        if self.cells[idx] != EMPTY_CELL:
             raise ValueError(f"The position {position} is invalid")
 
-        self.grid[row][col] = move
+        self.cells[idx] = move
+        self.zobrist ^= self._zobrist_keys[idx * 16 + move]
+
+        # swap the cell with the last empty cell and shrink the empty part
+        empty, empty_pos = self._empty, self._empty_pos
+        last = len(empty) - 1 - self.occupied_cells
+        pos, other = empty_pos[idx], empty[last]
+        empty[pos], empty[last] = other, idx
+        empty_pos[other], empty_pos[idx] = pos, last
         self.occupied_cells += 1
 
-        self.rows_rle[row][move] += 1
-        self.cols_rle[col][move] += 1
-        if row == col:
-            self.main_diagonal_rle[move] += 1
-        if row + col + 1 == len(self.grid):
-            self.anti_diagonal_rle[move] += 1
+        # update the lines through the cell and their scores, kept inline
+        # as this is the hot path of the simulations
+        delta = 1 << (RANK_BITS * move)
+        lines = self.lines
+        line_scores = self.line_scores
+        total = self._score
+        for line, table in self._line_tables[idx]:
+            key = lines[line] + delta
+            lines[line] = key
+            score = table.get(key)
+            if score is None:
+                score = self._line_score(line)
+            total += score - line_scores[line]
+            line_scores[line] = score
+        self._score = total
 
     def unmake_move(self, position: Tuple[int, int]) -> int:
         """Unmake the move played at given position.
@@ -182,19 +407,35 @@ class Board:
         :return: the card on the specified position
         """
         row, col = position
-        if self.is_empty(row, col):
+        idx = row * self.size + col
+        cell = self.cells[idx]
+        if cell == EMPTY_CELL:
             raise ValueError(f"Undoing empty square {position}")
 
-        cell = self.grid[row][col]
-        self.grid[row][col] = EMPTY_CELL
-        self.occupied_cells -= 1
+        self.cells[idx] = EMPTY_CELL
+        self.zobrist ^= self._zobrist_keys[idx * 16 + cell]
 
-        self.rows_rle[row][cell] -= 1
-        self.cols_rle[col][cell] -= 1
-        if row == col:
-            self.main_diagonal_rle[cell] -= 1
-        if row + col + 1 == len(self.grid):
-            self.anti_diagonal_rle[cell] -= 1
+        # grow the empty part by the cell, swapping it to the end
+        self.occupied_cells -= 1
+        empty, empty_pos = self._empty, self._empty_pos
+        last = len(empty) - 1 - self.occupied_cells
+        pos, other = empty_pos[idx], empty[last]
+        empty[pos], empty[last] = other, idx
+        empty_pos[other], empty_pos[idx] = pos, last
+
+        delta = -(1 << (RANK_BITS * cell))
+        lines = self.lines
+        line_scores = self.line_scores
+        total = self._score
+        for line, table in self._line_tables[idx]:
+            key = lines[line] + delta
+            lines[line] = key
+            score = table.get(key)
+            if score is None:
+                score = self._line_score(line)
+            total += score - line_scores[line]
+            line_scores[line] = score
+        self._score = total
         return cell
 
     def possible_moves(self) -> Iterator[Tuple[int, int]]:
@@ -205,30 +446,69 @@ class Board:
 
         :return: iterator over possible moves
         """
-        size = len(self.grid)
-        for row in range(size):
-            for col in range(size):
-                if self.is_empty(row, col):
-                    yield row, col
+        cells = self.cells
+        for idx, position in enumerate(_positions(self.size)):
+            if cells[idx] == EMPTY_CELL:
+                yield position
 
     @property
-    def size(self) -> int:
-        """Return size of the board."""
-        return len(self.grid)
+    def empty_count(self) -> int:
+        """Return the number of empty cells."""
+        return len(self._empty) - self.occupied_cells
 
-    def score(self) -> int:
-        """Calculate and return the score for the board."""
-        # if self.occupied_cells != self.size ** 2:
-        #     raise ValueError(f"Board is not full - {self}")
+    @property
+    def empty_cells(self) -> memoryview:
+        """
+        Return the indices of the empty cells in the flattened grid, in no
+        particular order. The view is not a copy, it must not be used after
+        the next move.
+        """
+        return memoryview(self._empty)[:len(self._empty)
+                                       - self.occupied_cells]
+
+    def random_empty_cell(self, rng: Any = random) -> Tuple[int, int]:
+        """
+        Return random empty position in constant time.
 
-        total_score = 0
-        for i in range(self.size):
-            total_score += evaluate_line(self.row_rle(i))
-            total_score += evaluate_line(self.col_rle(i))
+        :param rng: source of randomness with the interface of `random`
+        :return: tuple of row, column coordinates
+        :raises IndexError: if there are no empty cells
+        """
+        count = len(self._empty) - self.occupied_cells
+        if count <= 0:
+            raise IndexError("No empty cells")
+        return _positions(self.size)[self._empty[rng.randrange(count)]]
 
-        for use_main_diag in [True, False]:
-            diag_score = evaluate_line(self.diag_rle(use_main_diag))
-            if diag_score != 0:
-                total_score += DIAGONAL_BONUS + diag_score
+    def score(self) -> int:
+        """Return the score for the board, kept up to date by the moves."""
+        return self._score
 
-        return total_score
+    def score_with(self, position: Tuple[int, int], move: int) -> int:
+        """
+        Return the score of the board if the move was played at the empty
+        position, without playing it.
+        """
+        row, col = position
+        delta = 1 << (RANK_BITS * move)
+        lines = self.lines
+        line_scores = self.line_scores
+        total = self._score
+        for line, table in self._line_tables[row * self.size + col]:
+            score = table.get(lines[line] + delta)
+            if score is None:
+                self.make_move(position, move)
+                total = self._score
+                self.unmake_move(position)
+                return total
+            total += score - line_scores[line]
+        return total
+
+    def _line_score(self, line: int) -> int:
+        """Calculate the score of the line including the diagonal bonus."""
+        key = self.lines[line]
+        score = LINE_SCORES.get(key)
+        if score is None:
+            score = evaluate_line_reference(key_to_rle(key))
+        if score and line >= 2 * self.size:
+            score += DIAGONAL_BONUS
+        return score
@@ -0,0 +1,118 @@
+"""
+The deck of Mathematico as the number of remaining cards of each rank.
+"""
+import random
+from typing import Any, Iterable, List, Optional, Tuple
+
+
+N_RANKS = 13
+CARDS_PER_RANK = 4
+
+
+class Deck:
+    """
+    Remaining cards of the deck stored as the counts of the ranks, drawing
+    and returning a known card takes constant time.
+
+    Attributes
+    ----------
+        counts: `counts[r - 1]` is the number of remaining cards of rank `r`
+
+    Methods
+    -------
+        remove: remove the known card, e.g. the drawn one
+        add: return the card to the deck, undoes `remove`
+        sample: random remaining card, weighted by the counts
+        draw: sample and remove a random card
+        snapshot: immutable copy of the counts
+        cards: list of all remaining cards
+    """
+    __slots__ = ("counts", "_size")
+
+    def __init__(self, counts: Optional[Iterable[int]] = None):
+        """
+        :param counts: counts of the ranks, the full deck of 52 cards
+            if not given
+        """
+        self.counts: List[int] = [CARDS_PER_RANK] * N_RANKS \
+            if counts is None else list(counts)
+        if len(self.counts) != N_RANKS or min(self.counts) < 0:
+            raise ValueError(f"Expected {N_RANKS} non-negative counts")
+        self._size = sum(self.counts)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, card: int) -> bool:
+        return 1 <= card <= N_RANKS and self.counts[card - 1] > 0
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Deck) and self.counts == other.counts
+
+    def __repr__(self) -> str:
+        return f"Deck({self.counts})"
+
+    def copy(self) -> "Deck":
+        """Return a copy of the deck."""
+        return Deck(self.counts)
+
+    def remove(self, card: int) -> None:
+        """
+        Remove the card from the deck.
+
+        :raises ValueError: if there is no such card in the deck
+        """
+        if card not in self:
+            raise ValueError(f"No card {card} in the deck")
+        self.counts[card - 1] -= 1
+        self._size -= 1
+
+    def add(self, card: int) -> None:
+        """Return the card to the deck."""
+        self.counts[card - 1] += 1
+        self._size += 1
+
+    def sample(self, rng: Any = random) -> int:
+        """
+        Return random card from the deck without removing it, each of the
+        remaining cards is equally likely.
+
+        :param rng: source of randomness with the interface of `random`
+        :raises IndexError: if the deck is empty
+        """
+        if self._size <= 0:
+            raise IndexError("The deck is empty")
+        pick = int(rng.random() * self._size)
+        rank = 0
+        for count in self.counts:
+            rank += 1
+            pick -= count
+            if pick < 0:
+                return rank
+        raise AssertionError("Counts do not match the size")
+
+    def draw(self, rng: Any = random) -> int:
+        """
+        Remove random card from the deck and return it, see `sample`.
+
+        :raises IndexError: if the deck is empty
+        """
+        # same as `sample`, inlined as this is used by every rollout ply
+        counts = self.counts
+        pick = int(rng.random() * self._size)
+        for rank in range(N_RANKS):
+            pick -= counts[rank]
+            if pick < 0:
+                counts[rank] -= 1
+                self._size -= 1
+                return rank + 1
+        raise IndexError("The deck is empty")
+
+    def snapshot(self) -> Tuple[int, ...]:
+        """Return the counts as a tuple, which is not changed by the deck."""
+        return tuple(self.counts)
+
+    def cards(self) -> List[int]:
+        """Return all remaining cards, sorted."""
+        return [rank for rank, count in enumerate(self.counts, 1)
+                for _ in range(count)]
@@ -1,7 +1,13 @@
 """
 In this file we provide the definition of the evaluator class which can be used
 to assign the resulting scores to the grid.
+
+Lines are scored through a lookup table built once at import, keyed by a packed
+integer encoding of the line (see `line_key`). The rule predicates in `EVALS`
+are kept as the reference implementation the table is built from and checked
+against.
 """
+from itertools import combinations_with_replacement
 from typing import Dict
 
 
@@ -16,6 +22,13 @@ FOUR_OF_A_KIND = 160
 FLUSH_1_10_11_12_13 = 150
 FOUR_ONES = 200
 
+# line encoding: the count of rank `r` is stored at bits [4r, 4r + 4)
+RANK_BITS = 4
+RANK_MASK = (1 << RANK_BITS) - 1
+MAX_RANK = 13
+LINE_LENGTH = 5
+MAX_RANK_COUNT = 4
+
 
 # Note: each method assumes the previous ones do not hold
 
@@ -70,23 +83,78 @@ EVALS = [
 ]
 
 
-def evaluate_line(line_rle: Dict[int, int]) -> int:
+def evaluate_line_reference(line_rle: Dict[int, int]) -> int:
     """
-    Evaluates a single line of the grid. The rules are applied according
-    to the number of different values in the line. Does not modify the
-    original line.
+    Evaluates a single line of the grid by applying the rules one by one.
+    This is the reference implementation of `evaluate_line`. Does not modify
+    the original line.
 
-    :param line_rle: rle of the line to evaluate
+    :param line_rle: rle of the line to evaluate, zero keys and zero counts
+        are ignored
     :return: score of the line as described in the rules
-
-    Note: removes 0 values from the dictionary.
     """
-    items = line_rle.items()
-    for k, v in items:
-        if not v or not k:
-            line_rle.pop(k)
-
+    line_rle = {k: v for k, v in line_rle.items() if k and v}
     for points, scorer in EVALS:
         if scorer(line_rle):
             return points
     return 0
+
+
+def line_key(line_rle: Dict[int, int]) -> int:
+    """
+    Encode the line as a single integer, which does not depend on the order of
+    the cards in the line. Empty cells (key 0) are ignored.
+
+    :param line_rle: rle of the line to encode
+    :return: packed counts of each rank in the line
+    """
+    key = 0
+    for card, count in line_rle.items():
+        if card:
+            key += count << (RANK_BITS * card)
+    return key
+
+
+def key_to_rle(key: int) -> Dict[int, int]:
+    """Decode the line encoded by `line_key`, the inverse of `line_key`."""
+    result = {}
+    for card in range(1, MAX_RANK + 1):
+        count = (key >> (RANK_BITS * card)) & RANK_MASK
+        if count:
+            result[card] = count
+    return result
+
+
+def _build_line_scores() -> Dict[int, int]:
+    """Score every line that can occur in a game, i.e. up to LINE_LENGTH cards
+    with each rank present at most MAX_RANK_COUNT times."""
+    table = {}
+    ranks = range(1, MAX_RANK + 1)
+    for length in range(LINE_LENGTH + 1):
+        for cards in combinations_with_replacement(ranks, length):
+            line_rle: Dict[int, int] = {}
+            for card in cards:
+                line_rle[card] = line_rle.get(card, 0) + 1
+            if max(line_rle.values(), default=0) > MAX_RANK_COUNT:
+                continue
+            table[line_key(line_rle)] = evaluate_line_reference(line_rle)
+    return table
+
+
+# score of each valid line, indexed by `line_key`
+LINE_SCORES: Dict[int, int] = _build_line_scores()
+
+
+def evaluate_line(line_rle: Dict[int, int]) -> int:
+    """
+    Evaluates a single line of the grid using the precomputed table of line
+    scores. Does not modify the original line.
+
+    :param line_rle: rle of the line to evaluate
+    :return: score of the line as described in the rules
+    """
+    score = LINE_SCORES.get(line_key(line_rle))
+    if score is None:
+        # cannot occur with a standard deck, fall back to the rules
+        return evaluate_line_reference(line_rle)
+    return score
@@ -18,6 +18,21 @@ class Player(ABC):
     def reset(self) -> None:
         """Resets the player to initial state at the beginning of the game."""
 
+    def seed(self, seed: int) -> None:
+        """
+        Seed the own random generators of the player before a game, called
+        by the Arena so that each round is reproducible, the `random`
+        module is seeded by the Arena. Override if the player keeps
+        generators of its own.
+        """
+
+    def update_from(self, other: "Player") -> None:
+        """
+        Take over the state of `other`, a copy of this player which moved in
+        another process. Override if some attributes are not pickled.
+        """
+        self.__dict__.update(other.__dict__)
+
     def get_score(self) -> int:
         """Return score after the game is finished."""
         return self.board.score()
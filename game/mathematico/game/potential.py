@@ -0,0 +1,130 @@
+"""
+Potential of the lines of a partially filled board: the expected final score
+of each line if its empty cells are filled with random cards from the deck,
+which values the unfinished patterns that `Board.score` ignores.
+
+Each empty cell of the board ends up with a card drawn uniformly from the
+remaining cards, so the potential of a line depends only on its cards (the
+packed key, see `eval.line_key`), the number of its empty cells and the
+counts of the remaining cards. The lines with at most `exact_cells` empty
+cells are evaluated exactly over the given counts, the others from a static
+table built once, which assumes that the remaining cards are the full deck
+without the cards of the line.
+"""
+from functools import lru_cache
+from typing import Dict, List, Sequence
+
+from .board import Board, _DIAGONAL_SCORES
+from .eval import LINE_LENGTH, LINE_SCORES, MAX_RANK, MAX_RANK_COUNT, \
+    RANK_BITS, RANK_MASK
+
+
+DECK_SIZE = MAX_RANK * MAX_RANK_COUNT
+# the packed key of a single card of each rank, `_RANK_KEYS[r - 1]`
+_RANK_KEYS = [1 << (RANK_BITS * rank) for rank in range(1, MAX_RANK + 1)]
+
+
+def line_cards(key: int) -> int:
+    """Return the number of cards in the packed line."""
+    # the sum of the base-16 digits modulo 15, as 16 = 1 (mod 15), the sum
+    # is at most LINE_LENGTH < 15
+    return key % 15
+
+
+@lru_cache(maxsize=None)
+def _prior_table(diagonal: bool) -> Dict[int, float]:
+    """
+    Return the potential of every line, if the remaining cards are the full
+    deck without the cards of the line, indexed by the packed key.
+    """
+    scores = _DIAGONAL_SCORES if diagonal else LINE_SCORES
+    prior: Dict[int, float] = {}
+    # the lines with more cards first, the potential of a line is the mean
+    # of the potentials of the lines with one more card
+    for key in sorted(scores, key=line_cards, reverse=True):
+        cards = line_cards(key)
+        if cards == LINE_LENGTH:
+            prior[key] = scores[key]
+            continue
+        value = 0.0
+        for rank in range(1, MAX_RANK + 1):
+            left = MAX_RANK_COUNT - (key >> (RANK_BITS * rank) & RANK_MASK)
+            if left:
+                value += left * prior[key + (1 << (RANK_BITS * rank))]
+        prior[key] = value / (DECK_SIZE - cards)
+    return prior
+
+
+def _expected(key: int, counts: List[int], total: int, empty: int,
+              scores: Dict[int, int]) -> float:
+    """Return the mean score of the line after drawing `empty` cards from
+    the `total` cards with `counts`, restored before returning."""
+    if empty == 0:
+        return scores[key]
+    if empty == 1:
+        return sum(count * scores[key + rank_key]
+                   for count, rank_key in zip(counts, _RANK_KEYS)
+                   if count) / total
+    if empty == 2:
+        # unordered pairs of the cards, the pairs of different ranks can
+        # be drawn in two orders
+        value = 0.0
+        for idx, count in enumerate(counts):
+            if not count:
+                continue
+            first = key + _RANK_KEYS[idx]
+            pairs = 0.0
+            for other in range(idx + 1, MAX_RANK):
+                if counts[other]:
+                    pairs += counts[other] * scores[first + _RANK_KEYS[other]]
+            if count > 1:
+                pairs += (count - 1) / 2 * scores[first + _RANK_KEYS[idx]]
+            value += 2 * count * pairs
+        return value / (total * (total - 1))
+    value = 0.0
+    for idx, count in enumerate(counts):
+        if count:
+            counts[idx] = count - 1
+            value += count * _expected(key + _RANK_KEYS[idx], counts,
+                                       total - 1, empty - 1, scores)
+            counts[idx] = count
+    return value / total
+
+
+def line_potential(key: int, counts: Sequence[int], diagonal: bool = False,
+                   exact_cells: int = 2) -> float:
+    """
+    Return the expected final score of the line of a 5x5 board.
+
+    :param key: packed cards of the line, see `eval.line_key`
+    :param counts: `counts[r - 1]` is the number of remaining cards of rank
+        `r`, e.g. `Deck.counts`, not including the cards of the line
+    :param diagonal: if True, the score includes the diagonal bonus
+    :param exact_cells: lines with at most this many empty cells are
+        evaluated exactly over the counts, the others by the static table
+    :return: the expected score, including the diagonal bonus
+    :raises ValueError: if there are less cards than empty cells
+    """
+    empty = LINE_LENGTH - line_cards(key)
+    if empty > exact_cells:
+        return _prior_table(diagonal)[key]
+    total = sum(counts)
+    if total < empty:
+        raise ValueError("Not enough cards to fill the line")
+    scores = _DIAGONAL_SCORES if diagonal else LINE_SCORES
+    return _expected(key, list(counts), total, empty, scores)
+
+
+def board_potential(board: Board, counts: Sequence[int],
+                    exact_cells: int = 2) -> float:
+    """
+    Return the expected final score of the 5x5 board, as the sum of the
+    potentials of its lines, see `line_potential`.
+    """
+    if board.size != LINE_LENGTH:
+        raise ValueError(f"Only boards of size {LINE_LENGTH} are supported")
+    diagonals = 2 * board.size
+    return sum(
+        line_potential(key, counts, line >= diagonals, exact_cells)
+        for line, key in enumerate(board.lines)
+    )
@@ -0,0 +1,318 @@
+"""
+Compact binary format of the records of played games.
+
+The file starts with the header `MAGIC`, followed by fixed-width records,
+one for each player in each game. A record holds the order in which the cards
+were drawn, the cell (index into the flattened grid) where each card was
+placed, and the final score:
+
+    cards   25 x uint8     drawn cards, in the order of drawing
+    cells   25 x uint8     cell where the i-th card was placed
+    player  uint8          index of the player in the game
+    flags   uint8          reserved, 0
+    score   uint16         final score of the player
+    game    uint32         index of the game, e.g. the round of the arena
+
+All numbers are little-endian, the record takes RECORD_SIZE = 58 bytes. Use
+GameRecordWriter to write the records (or ShardedRecordWriter to split them
+into files of limited size) and `read_records` (requires numpy) or
+`iter_records` to read them. The moves of a record, i.e. the grid before
+the move, the card, the chosen cell and the final score, are replayed by
+`iter_moves`.
+"""
+import os
+import struct
+from typing import Any, BinaryIO, Dict, Iterator, List, NamedTuple, \
+    Optional, Sequence, Tuple, Union
+
+from ._mathematico import Mathematico
+
+
+MAGIC = b"MTHREC01"
+N_MOVES = 25
+_RECORD = struct.Struct(f"<{N_MOVES}s{N_MOVES}sBBHI")
+RECORD_SIZE = _RECORD.size
+
+
+class GameRecord(NamedTuple):
+    """Single record, as read by `iter_records`."""
+    cards: bytes
+    cells: bytes
+    player: int
+    flags: int
+    score: int
+    game: int
+
+
+def pack_record(game: int, player: int, cards: Sequence[int],
+                cells: Sequence[int], score: int) -> bytes:
+    """Return the binary record of one player in one game."""
+    if len(cards) != N_MOVES or len(cells) != N_MOVES:
+        raise ValueError(f"Expected {N_MOVES} cards and cells")
+    return _RECORD.pack(bytes(cards), bytes(cells), player, 0, score, game)
+
+
+def pack_game(game: Mathematico, scores: Sequence[int], index: int) -> bytes:
+    """
+    Return the records of all players of the finished game.
+
+    :param game: the game played with `record=True`
+    :param scores: final scores of the players
+    :param index: index of the game stored in the records
+    :return: concatenated records, one for each player
+    """
+    cards = game.drawn_cards()
+    return b"".join(
+        pack_record(index, player, cards, cells, score)
+        for player, (cells, score) in enumerate(zip(game.placements, scores))
+    )
+
+
+class GameRecordWriter:
+    """
+    Buffered writer of the game records. Can be used as a context manager,
+    and passed to `Arena.run` to record all played games.
+
+    Attributes
+    ----------
+        records: number of records written by this writer
+        games: one past the largest game index in the file, including the
+            records present before appending, the Arena numbers the games
+            from it
+
+    Methods
+    -------
+        write: write a single record
+        write_game: write records of all players of a finished game
+        write_bytes: write already packed records
+        flush: write the buffered records to the file
+        close: flush and close the file
+    """
+
+    def __init__(self, path: str, buffer_records: int = 4096,
+                 append: bool = False):
+        """
+        :param path: path to the file
+        :param buffer_records: number of records kept in memory before
+            writing them to the file
+        :param append: if True and the file exists, append to it
+        """
+        self.path = path
+        self.records = 0
+        self.games = 0
+        self._buffer = bytearray()
+        self._buffer_size = buffer_records * RECORD_SIZE
+        self._file: BinaryIO = open(path, "ab" if append else "wb")
+        size = self._file.tell()
+        if size == 0:
+            self._file.write(MAGIC)
+        elif size >= len(MAGIC) + RECORD_SIZE:
+            with open(path, "rb") as file:
+                file.seek(size - RECORD_SIZE)
+                self.games = _RECORD.unpack(file.read(RECORD_SIZE))[-1] + 1
+
+    def __enter__(self) -> "GameRecordWriter":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def write(self, game: int, player: int, cards: Sequence[int],
+              cells: Sequence[int], score: int) -> None:
+        """Write the record of one player in one game."""
+        self.write_bytes(pack_record(game, player, cards, cells, score))
+
+    def write_game(self, game: Mathematico, scores: Sequence[int],
+                   index: int) -> None:
+        """Write the records of all players of the finished game, which
+        was played with `record=True`."""
+        self.write_bytes(pack_game(game, scores, index))
+
+    def write_bytes(self, records: bytes) -> None:
+        """Write the records packed by `pack_record` or `pack_game`."""
+        if len(records) % RECORD_SIZE:
+            raise ValueError("Data are not whole records")
+        if records:
+            last = _RECORD.unpack_from(records, len(records) - RECORD_SIZE)
+            self.games = max(self.games, last[-1] + 1)
+        self._buffer += records
+        self.records += len(records) // RECORD_SIZE
+        if len(self._buffer) >= self._buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered records to the file."""
+        self._file.write(self._buffer)
+        self._buffer.clear()
+        self._file.flush()
+
+    def close(self) -> None:
+        """Flush the buffer and close the file."""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+class ShardedRecordWriter:
+    """
+    Writer of the game records split into shards, files with at most
+    `shard_records` records each. The records of one game are never split.
+    The shards are named `{prefix}-{n:04d}.bin` in the directory. Can be
+    passed to `Arena.run` instead of GameRecordWriter.
+
+    Attributes
+    ----------
+        shards: description of each written shard - the file name, number
+            of records and the indices of the first and the last game
+        records: total number of records written
+        games: one past the largest game index written, see
+            GameRecordWriter
+    """
+
+    def __init__(self, directory: str, prefix: str = "shard",
+                 shard_records: int = 1_000_000,
+                 buffer_records: int = 4096):
+        """
+        :param directory: directory of the shards, created if needed
+        :param prefix: prefix of the names of the shards
+        :param shard_records: maximum number of records of a shard
+        :param buffer_records: see GameRecordWriter
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.shard_records = shard_records
+        self.buffer_records = buffer_records
+        self.shards: List[Dict[str, Any]] = []
+        self.records = 0
+        self.games = 0
+        self._writer: Optional[GameRecordWriter] = None
+
+    def __enter__(self) -> "ShardedRecordWriter":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def write_game(self, game: Mathematico, scores: Sequence[int],
+                   index: int) -> None:
+        """Write the records of all players of the finished game."""
+        self.write_bytes(pack_game(game, scores, index))
+
+    def write_bytes(self, records: bytes) -> None:
+        """Write the records of one or more whole games, packed by
+        `pack_game`, starting a new shard if the current one is full."""
+        if not records:
+            return
+        count = len(records) // RECORD_SIZE
+        writer = self._writer
+        if writer is None or (
+            writer.records and writer.records + count > self.shard_records
+        ):
+            writer = self._rotate()
+        writer.write_bytes(records)
+        self.records += count
+        shard = self.shards[-1]
+        shard["records"] = writer.records
+        if shard["first_game"] is None:
+            shard["first_game"] = _RECORD.unpack_from(records, 0)[-1]
+        last = len(records) - RECORD_SIZE
+        shard["last_game"] = _RECORD.unpack_from(records, last)[-1]
+        self.games = max(self.games, shard["last_game"] + 1)
+
+    def _rotate(self) -> GameRecordWriter:
+        """Close the current shard and start a new one."""
+        if self._writer is not None:
+            self._writer.close()
+        name = f"{self.prefix}-{len(self.shards):04d}.bin"
+        self._writer = GameRecordWriter(os.path.join(self.directory, name),
+                                        self.buffer_records)
+        self.shards.append({"path": name, "records": 0,
+                            "first_game": None, "last_game": None})
+        return self._writer
+
+    def flush(self) -> None:
+        """Write the buffered records of the current shard."""
+        if self._writer is not None:
+            self._writer.flush()
+
+    def close(self) -> None:
+        """Flush and close the current shard."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+# writers accepted by `Arena.run`
+RecordWriter = Union[GameRecordWriter, ShardedRecordWriter]
+
+
+def _check_header(header: bytes, path: str) -> None:
+    """Raise ValueError if the file does not start with MAGIC."""
+    if header != MAGIC:
+        raise ValueError(f"{path} is not a file with game records")
+
+
+def iter_records(path: str) -> Iterator[GameRecord]:
+    """Iterate over the records in the file, does not require numpy."""
+    with open(path, "rb") as file:
+        _check_header(file.read(len(MAGIC)), path)
+        while True:
+            chunk = file.read(RECORD_SIZE * 4096)
+            if not chunk:
+                return
+            for fields in _RECORD.iter_unpack(chunk):
+                yield GameRecord(*fields)
+
+
+def record_dtype() -> Any:
+    """Return NumPy structured dtype of a record."""
+    import numpy as np
+
+    return np.dtype([
+        ("cards", "u1", (N_MOVES,)),
+        ("cells", "u1", (N_MOVES,)),
+        ("player", "u1"),
+        ("flags", "u1"),
+        ("score", "<u2"),
+        ("game", "<u4"),
+    ])
+
+
+def read_records(path: str) -> Any:
+    """
+    Memory-map the file with the records as read-only NumPy structured array,
+    the records are not copied into memory. Requires numpy.
+
+    :param path: path to the file
+    :return: np.memmap with the fields described in the module docstring
+    """
+    import numpy as np
+
+    with open(path, "rb") as file:
+        _check_header(file.read(len(MAGIC)), path)
+    dtype = record_dtype()
+    size = (os.path.getsize(path) - len(MAGIC)) // RECORD_SIZE
+    if size == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=len(MAGIC),
+                     shape=(size,))
+
+
+def iter_moves(record: GameRecord) -> Iterator[Tuple[bytes, int, int, int]]:
+    """
+    Replay the recorded game, yield for each move the flattened grid before
+    the move, the card, the cell where it was placed and the final score.
+    """
+    grid = bytearray(N_MOVES)
+    for card, cell in zip(record.cards, record.cells):
+        yield bytes(grid), card, cell, record.score
+        grid[cell] = card
+
+
+def replay_cells(cards: Sequence[int], cells: Sequence[int]) -> List[int]:
+    """Return the final flattened grid of a recorded game."""
+    grid = [0] * N_MOVES
+    for card, cell in zip(cards, cells):
+        grid[cell] = card
+    return grid
@@ -0,0 +1,146 @@
+"""
+Online statistics of the scores, which allow evaluating players over
+unlimited number of rounds in constant memory.
+"""
+import math
+from typing import Dict, List, Optional, Sequence, Any
+
+
+class RunningStats:
+    """
+    Running statistics of a stream of numbers: count, mean, variance, minimum,
+    maximum and a histogram with fixed bin width, from which the quantiles
+    are computed. The histogram is exact for scores, which are multiples
+    of the default bin width.
+
+    Methods
+    -------
+        update: add a new value
+        merge: add all values seen by other statistics
+        quantile: approximate quantile from the histogram
+        as_dict: summary of the statistics
+    """
+
+    def __init__(self, bin_width: float = 10):
+        self.bin_width = bin_width
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0  # sum of squared differences from the mean
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.histogram: Dict[int, int] = {}
+
+    def update(self, value: float) -> None:
+        """Add new value to the statistics (Welford's algorithm)."""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        bin_ = int(value // self.bin_width)
+        self.histogram[bin_] = self.histogram.get(bin_, 0) + 1
+
+    def merge(self, other: "RunningStats") -> None:
+        """Add the values seen by `other`, with the same bin width."""
+        if other.bin_width != self.bin_width:
+            raise ValueError("Cannot merge histograms with different bins")
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self._m2 += other._m2 + delta ** 2 * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        for value in [other.min, other.max]:
+            assert value is not None
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+        for bin_, n in other.histogram.items():
+            self.histogram[bin_] = self.histogram.get(bin_, 0) + n
+
+    @property
+    def variance(self) -> float:
+        """Sample variance of the values, 0 for less than 2 values."""
+        if self.count < 2:
+            return 0.0
+        return self._m2 / (self.count - 1)
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation of the values."""
+        return math.sqrt(self.variance)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Return the q-quantile of the values, as the lower edge of the bin
+        of the histogram containing it.
+
+        :param q: the quantile, in range [0, 1]
+        :return: the quantile or None if there are no values
+        """
+        if not 0 <= q <= 1:
+            raise ValueError(f"Quantile {q} not in [0, 1]")
+        if self.count == 0:
+            return None
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for bin_ in sorted(self.histogram):
+            seen += self.histogram[bin_]
+            if seen >= rank:
+                return bin_ * self.bin_width
+        raise AssertionError("Histogram does not match the count")
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the summary of the statistics, can be dumped to JSON."""
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "std": self.std,
+            "min": self.min,
+            "max": self.max,
+            "q25": self.quantile(0.25),
+            "median": self.quantile(0.5),
+            "q75": self.quantile(0.75),
+        }
+
+    def __str__(self) -> str:
+        return f"mean={self.mean:.2f} std={self.std:.2f} " \
+            f"min={self.min} max={self.max} n={self.count}"
+
+
+class ArenaStats:
+    """
+    Running statistics of the scores of each of the players in the arena.
+
+    Methods
+    -------
+        update: add scores from one round
+        as_dict: summary of the statistics of each player
+    """
+
+    def __init__(self, n_players: int, bin_width: float = 10):
+        self.players = [RunningStats(bin_width) for _ in range(n_players)]
+
+    @property
+    def rounds(self) -> int:
+        """Return the number of rounds seen."""
+        return self.players[0].count if self.players else 0
+
+    def update(self, scores: Sequence[float]) -> None:
+        """Add the scores of all players from one round."""
+        for stats, score in zip(self.players, scores):
+            stats.update(score)
+
+    def as_dict(self) -> List[Dict[str, Any]]:
+        """Return the summary of the statistics of each player."""
+        return [stats.as_dict() for stats in self.players]
+
+    def __str__(self) -> str:
+        return "\n".join(
+            f"player {idx}: {stats}" for idx, stats in enumerate(self.players)
+        )
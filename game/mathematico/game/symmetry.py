@@ -0,0 +1,87 @@
+"""
+Symmetries of the board and canonical forms of the positions.
+
+The score of a board does not change when the cells are permuted so that each
+row, column and diagonal is mapped to some row, column or diagonal. These are
+generated by
+    * permuting the rows by `s` and the columns by `s` or `r.s`, where `s`
+      commutes with the reflection `r(i) = size - 1 - i`; for the 5x5 board
+      `s` swaps rows 0 and 4, rows 1 and 3, or the pair 0, 4 with 1, 3
+    * transposition
+which for the 5x5 board gives 32 symmetries, including rotations and flips.
+"""
+from functools import lru_cache
+from itertools import permutations
+from operator import itemgetter
+from typing import Callable, List, Tuple, Sequence
+
+
+Symmetry = Tuple[int, ...]
+
+
+@lru_cache(maxsize=None)
+def symmetries(size: int = 5) -> Tuple[Symmetry, ...]:
+    """
+    Return all symmetries of the board of given size. Each symmetry `s` is
+    a tuple of cell indices, such that the transformed flattened grid is
+    `[cells[s[k]] for k in range(size * size)]`. The identity is the first.
+    """
+    last = size - 1
+    row_perms = [
+        perm for perm in permutations(range(size))
+        if all(perm[last - i] == last - perm[i] for i in range(size))
+    ]
+    result = set()
+    for sigma in row_perms:
+        reflected = tuple(last - x for x in sigma)
+        for tau in [sigma, reflected]:
+            for transpose in [False, True]:
+                sym = [0] * (size * size)
+                for row in range(size):
+                    for col in range(size):
+                        new_row, new_col = sigma[row], tau[col]
+                        if transpose:
+                            new_row, new_col = new_col, new_row
+                        sym[new_row * size + new_col] = row * size + col
+                result.add(tuple(sym))
+    return tuple(sorted(result))
+
+
+@lru_cache(maxsize=None)
+def _getters(size: int) -> List[Callable[[Sequence[int]], Tuple[int, ...]]]:
+    return [itemgetter(*sym) for sym in symmetries(size)]
+
+
+def transform(cells: Sequence[int], sym: Symmetry) -> bytes:
+    """Return the flattened grid transformed by the symmetry."""
+    return bytes(cells[idx] for idx in sym)
+
+
+def canonical_form(cells: Sequence[int], size: int = 5) -> bytes:
+    """
+    Return the canonical form of the flattened grid, which is the same for
+    all boards equivalent under the symmetries (the smallest of their
+    transformed grids).
+    """
+    return min(bytes(getter(cells)) for getter in _getters(size))
+
+
+def canonical_symmetry(cells: Sequence[int],
+                       size: int = 5) -> Tuple[bytes, Symmetry]:
+    """
+    Return the canonical form of the flattened grid and the symmetry that
+    transforms the grid into it.
+    """
+    best = None
+    best_sym = symmetries(size)[0]
+    for getter, sym in zip(_getters(size), symmetries(size)):
+        form = bytes(getter(cells))
+        if best is None or form < best:
+            best, best_sym = form, sym
+    assert best is not None
+    return best, best_sym
+
+
+def map_cell(sym: Symmetry, idx: int) -> int:
+    """Return the index of the cell `idx` after transformation by `sym`."""
+    return sym.index(idx)
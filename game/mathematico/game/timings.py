@@ -0,0 +1,188 @@
+"""
+Optional instrumentation of the games, arena and search players. The objects
+defined here are only updated when passed to the instrumented code, e.g.
+`Mathematico.play(timings=...)`, otherwise the instrumentation costs nothing.
+"""
+from typing import Any, Dict, List, Optional
+
+
+class LatencyHistogram:
+    """
+    Histogram of durations in nanoseconds with power of two buckets, bucket
+    `b` holds the durations `d` with `d.bit_length() == b`.
+
+    Methods
+    -------
+        record: add a duration
+        merge: add the durations recorded by other histogram
+        quantile: approximate quantile, upper edge of the bucket
+        as_dict: summary of the histogram
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+        self.buckets = [0] * 65
+
+    def record(self, ns: int) -> None:
+        """Add the duration in nanoseconds."""
+        self.count += 1
+        self.total += ns
+        if self.min is None or ns < self.min:
+            self.min = ns
+        if self.max is None or ns > self.max:
+            self.max = ns
+        self.buckets[min(ns.bit_length(), 64)] += 1
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add the durations recorded by `other`."""
+        self.count += other.count
+        self.total += other.total
+        for value in [other.min, other.max]:
+            if value is None:
+                continue
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+        for bucket, n in enumerate(other.buckets):
+            self.buckets[bucket] += n
+
+    @property
+    def mean(self) -> float:
+        """Return the mean duration, 0 if nothing was recorded."""
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> Optional[int]:
+        """Return the upper bound of the q-quantile of the durations."""
+        if self.count == 0:
+            return None
+        rank = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for bucket, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return 1 << bucket
+        return self.max
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the summary, durations in nanoseconds."""
+        return {
+            "count": self.count,
+            "total_ns": self.total,
+            "mean_ns": self.mean,
+            "min_ns": self.min,
+            "max_ns": self.max,
+            "p50_ns": self.quantile(0.5),
+            "p99_ns": self.quantile(0.99),
+            "buckets": {
+                f"<{1 << b}": n for b, n in enumerate(self.buckets) if n
+            },
+        }
+
+
+class Timings:
+    """
+    Timings of the games played by Mathematico and Arena.
+
+    Attributes
+    ----------
+        deck: time to draw a card
+        moves: for each player, the time of `Player.move`
+        scoring: for each player, the time of `Player.get_score`
+        rounds: for each round in the arena, the time to play it
+        per_move: if False, the arena times only the whole rounds and plays
+            the games on the untimed path, e.g. for its verbose summary
+    """
+
+    def __init__(self, per_move: bool = True):
+        self.per_move = per_move
+        self.deck = LatencyHistogram()
+        self.moves: List[LatencyHistogram] = []
+        self.scoring: List[LatencyHistogram] = []
+        self.rounds = LatencyHistogram()
+
+    def ensure_players(self, n_players: int) -> None:
+        """Make sure the timings are kept for `n_players` players."""
+        while len(self.moves) < n_players:
+            self.moves.append(LatencyHistogram())
+            self.scoring.append(LatencyHistogram())
+
+    def merge(self, other: "Timings") -> None:
+        """Add the timings recorded by `other`."""
+        self.ensure_players(len(other.moves))
+        self.deck.merge(other.deck)
+        self.rounds.merge(other.rounds)
+        for mine, theirs in zip(self.moves, other.moves):
+            mine.merge(theirs)
+        for mine, theirs in zip(self.scoring, other.scoring):
+            mine.merge(theirs)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the summary of all timings, can be dumped to JSON."""
+        return {
+            "deck": self.deck.as_dict(),
+            "moves": [h.as_dict() for h in self.moves],
+            "scoring": [h.as_dict() for h in self.scoring],
+            "rounds": self.rounds.as_dict(),
+        }
+
+
+class SearchStats:
+    """
+    Counters of a search player, such as SimulationPlayer.
+
+    Attributes
+    ----------
+        moves: number of moves searched
+        simulations: total number of simulations
+        time_ns: total time spent searching
+        budget_exhausted: number of moves stopped by the time limit before
+            reaching the maximum number of simulations
+        per_move: histogram of the time of each move
+    """
+
+    def __init__(self):
+        self.moves = 0
+        self.simulations = 0
+        self.time_ns = 0
+        self.budget_exhausted = 0
+        self.per_move = LatencyHistogram()
+
+    def record(self, simulations: int, time_ns: int,
+               exhausted: bool) -> None:
+        """Record one searched move."""
+        self.moves += 1
+        self.simulations += simulations
+        self.time_ns += time_ns
+        self.budget_exhausted += exhausted
+        self.per_move.record(time_ns)
+
+    def merge(self, other: "SearchStats") -> None:
+        """Add the counters recorded by `other`."""
+        self.moves += other.moves
+        self.simulations += other.simulations
+        self.time_ns += other.time_ns
+        self.budget_exhausted += other.budget_exhausted
+        self.per_move.merge(other.per_move)
+
+    @property
+    def simulations_per_move(self) -> float:
+        return self.simulations / self.moves if self.moves else 0.0
+
+    @property
+    def simulations_per_second(self) -> float:
+        return 1e9 * self.simulations / self.time_ns if self.time_ns else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the summary of the counters, can be dumped to JSON."""
+        return {
+            "moves": self.moves,
+            "simulations": self.simulations,
+            "simulations_per_move": self.simulations_per_move,
+            "simulations_per_second": self.simulations_per_second,
+            "budget_exhausted": self.budget_exhausted,
+            "move_time": self.per_move.as_dict(),
+        }
@@ -0,0 +1,234 @@
+"""
+Tournament of players on common random numbers.
+
+All players play the same decks, as in the Arena, so the difference of the
+scores of two players in the same round does not depend on the luck of the
+draw, which makes most of the variance of the score. Each pair of players is
+compared by a sequential test on their paired differences, and the pairs are
+dropped once decided, the players with no undecided pair stop playing.
+"""
+import math
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import combinations
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional
+
+from .arena import Arena, PlayerFactory
+from .player import Player
+from .stats import RunningStats
+
+
+class Pairing:
+    """
+    Comparison of two players by the differences of their scores in the
+    same rounds.
+
+    Attributes
+    ----------
+        first: index of the first player
+        second: index of the second player
+        differences: statistics of the score of the first player minus the
+            score of the second one
+        decided: whether the sequential test has stopped
+        winner: index of the better player, or None if they are tied or
+            undecided
+    """
+
+    def __init__(self, first: int, second: int):
+        self.first = first
+        self.second = second
+        self.differences = RunningStats(bin_width=5)
+        self.decided = False
+        self.winner: Optional[int] = None
+
+    @property
+    def rounds(self) -> int:
+        """Return the number of rounds played by the pair."""
+        return self.differences.count
+
+    @property
+    def error(self) -> float:
+        """Return the standard error of the mean difference."""
+        if self.rounds == 0:
+            return math.inf
+        return self.differences.std / math.sqrt(self.rounds)
+
+    def decide(self, z: float, tolerance: float = 0.0) -> bool:
+        """
+        Stop the test if the mean difference is more than `z` standard
+        errors from zero, or if the confidence interval lies within
+        `tolerance` points from zero, which is a tie.
+
+        :return: whether the test is decided
+        """
+        mean = self.differences.mean
+        margin = z * self.error
+        if abs(mean) > margin:
+            self.decided = True
+            self.winner = self.first if mean > 0 else self.second
+        elif abs(mean) + margin <= tolerance:
+            self.decided = True
+        return self.decided
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the summary of the comparison, can be dumped to JSON."""
+        return {
+            "first": self.first,
+            "second": self.second,
+            "rounds": self.rounds,
+            "mean": self.differences.mean,
+            "std": self.differences.std,
+            "decided": self.decided,
+            "winner": self.winner,
+        }
+
+
+class Tournament:
+    """
+    Tournament of all pairs of players on common random numbers with
+    sequential stopping.
+
+    The rounds are played in looks of `look_every` rounds, the round `i`
+    with seed `seed + i` as in `Arena.run`. After each look, from
+    `min_rounds` on, every undecided pair is tested at the confidence
+    `1 - alpha`, Bonferroni-corrected for the number of looks, so the chance
+    of a wrong winner of the pair stays below `alpha` despite the repeated
+    tests. The pairs still undecided after `max_rounds` are left undecided.
+
+    Methods
+    -------
+        add_player: add a player to the tournament
+        run: play until all pairs are decided or `max_rounds` are played
+        ranking: indices of the players ordered by the pairs won
+        as_dict: summary of the tournament
+    """
+
+    def __init__(self, alpha: float = 0.05, tolerance: float = 0.0,
+                 min_rounds: int = 30, max_rounds: int = 10_000,
+                 look_every: int = 50):
+        """
+        :param alpha: probability of a wrong winner of each pair
+        :param tolerance: difference of the mean scores which counts as
+            a tie, in points, 0 to decide only the winners
+        :param min_rounds: number of rounds before the first test
+        :param max_rounds: maximum number of rounds
+        :param look_every: number of rounds between the tests
+        """
+        if not 0 < alpha < 1:
+            raise ValueError(f"Alpha {alpha} not in (0, 1)")
+        self.alpha = alpha
+        self.tolerance = tolerance
+        self.min_rounds = min_rounds
+        self.max_rounds = max_rounds
+        self.look_every = look_every
+        self.players: List[Player] = []
+        self.factories: List[Optional[PlayerFactory]] = []
+        self.names: List[str] = []
+        self.scores: List[RunningStats] = []
+        self.pairings: List[Pairing] = []
+        self.rounds = 0
+        self.games = 0
+
+    def add_player(self, player: Player,
+                   factory: Optional[PlayerFactory] = None,
+                   name: Optional[str] = None) -> None:
+        """
+        Add new player to the tournament.
+
+        :param player: the player
+        :param factory: optional callable creating an equivalent player,
+            see `Arena.add_player`
+        :param name: name of the player in the summary
+        """
+        self.players.append(player)
+        self.factories.append(factory)
+        self.names.append(name or f"player {len(self.names)}")
+
+    @property
+    def z(self) -> float:
+        """Return the critical value of the tests, corrected for the
+        number of looks."""
+        looks = max(1, math.ceil(self.max_rounds / self.look_every))
+        return NormalDist().inv_cdf(1 - self.alpha / (2 * looks))
+
+    def run(self, seed: int = 0, workers: Optional[int] = None,
+            verbose: bool = False) -> List[Pairing]:
+        """
+        Play the rounds until all pairs are decided or `max_rounds` rounds
+        are played, the previous results are discarded.
+
+        :param seed: the round `i` is played with seed `seed + i`
+        :param workers: number of worker processes, see `Arena.run`, one
+            pool of the processes plays all the looks
+        :param verbose: if True, print the progress after each look
+        :return: the pairings, also in `pairings`
+        """
+        self.pairings = [Pairing(i, j) for i, j
+                         in combinations(range(len(self.players)), 2)]
+        self.scores = [RunningStats() for _ in self.players]
+        self.rounds = self.games = 0
+        z = self.z
+
+        parallel = workers is not None and workers > 1
+        with ProcessPoolExecutor(max_workers=workers) if parallel \
+                else nullcontext() as executor:
+            while self.rounds < self.max_rounds:
+                undecided = [pair for pair in self.pairings
+                             if not pair.decided]
+                if not undecided:
+                    break
+                active = sorted({pair.first for pair in undecided}
+                                | {pair.second for pair in undecided})
+                arena = Arena()
+                for idx in active:
+                    arena.add_player(self.players[idx], self.factories[idx])
+                look = min(self.look_every, self.max_rounds - self.rounds)
+                for round_scores in arena.iter_rounds(
+                        look, seed + self.rounds, workers,
+                        executor=executor):
+                    scores = dict(zip(active, round_scores))
+                    for idx, score in scores.items():
+                        self.scores[idx].update(score)
+                    for pair in undecided:
+                        pair.differences.update(scores[pair.first]
+                                                - scores[pair.second])
+                self.rounds += look
+                self.games += look * len(active)
+
+                if self.rounds >= self.min_rounds:
+                    for pair in undecided:
+                        pair.decide(z, self.tolerance)
+                if verbose:
+                    left = sum(not pair.decided for pair in self.pairings)
+                    print(f"Rounds: {self.rounds}\tGames: {self.games}\t"
+                          f"Undecided pairs: {left}")
+        return self.pairings
+
+    def ranking(self) -> List[int]:
+        """Return the indices of the players ordered by the number of pairs
+        won, then by the mean score."""
+        wins = [0] * len(self.players)
+        for pair in self.pairings:
+            if pair.winner is not None:
+                wins[pair.winner] += 1
+        return sorted(range(len(self.players)),
+                      key=lambda idx: (wins[idx], self.scores[idx].mean),
+                      reverse=True)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the summary of the tournament, can be dumped to JSON."""
+        return {
+            "rounds": self.rounds,
+            "games": self.games,
+            "ranking": [self.names[idx] for idx in self.ranking()],
+            "players": [{"player": name, **stats.as_dict()}
+                        for name, stats in zip(self.names, self.scores)],
+            "pairings": [
+                {**pair.as_dict(), "first": self.names[pair.first],
+                 "second": self.names[pair.second],
+                 "winner": None if pair.winner is None
+                 else self.names[pair.winner]}
+                for pair in self.pairings
+            ],
+        }
@@ -0,0 +1,75 @@
+"""
+Bounded transposition table for sharing the value estimates of the positions
+between the searches.
+"""
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+from .board import Board
+from .symmetry import canonical_form
+
+
+Estimate = Tuple[int, int]  # sum of the scores, number of simulations
+
+
+def position_key(board: Board) -> bytes:
+    """
+    Return the key of the position for the transposition table, the same
+    for all symmetric boards. As every drawn card is placed on the board,
+    the board also determines the remaining deck.
+    """
+    return canonical_form(board.cells, board.size)
+
+
+class TranspositionTable:
+    """
+    Table of value estimates of the positions with the least recently used
+    entries evicted when the table is full.
+
+    Methods
+    -------
+        get: return the estimate of the position
+        add: add simulation results to the estimate of the position
+        merge: add the estimates of another table
+    """
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._table: "OrderedDict[Hashable, Estimate]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._table
+
+    def get(self, key: Hashable) -> Optional[Estimate]:
+        """Return the estimate (sum of scores, count) of the position."""
+        estimate = self._table.get(key)
+        if estimate is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._table.move_to_end(key)
+        return estimate
+
+    def add(self, key: Hashable, total: int, count: int) -> None:
+        """Add the sum of `count` scores to the estimate of the position."""
+        previous_total, previous_count = self._table.pop(key, (0, 0))
+        self._table[key] = (previous_total + total, previous_count + count)
+        if len(self._table) > self.maxsize:
+            self._table.popitem(last=False)
+
+    def merge(self, other: "TranspositionTable") -> None:
+        """Add the estimates and the counters of another table, e.g. filled
+        in another process."""
+        for key, (total, count) in other._table.items():
+            self.add(key, total, count)
+        self.hits += other.hits
+        self.misses += other.misses
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._table.clear()
@@ -1,6 +1,34 @@
-from ._human_player import HumanPlayer
-from ._random_player import RandomPlayer
-from ._random_simulations import SimulationPlayer
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, List
 
+if TYPE_CHECKING:
+    from ._heuristic_player import HeuristicPlayer
+    from ._human_player import HumanPlayer
+    from ._random_player import RandomPlayer
+    from ._random_simulations import SimulationPlayer
 
-__all__ = ["RandomPlayer", "HumanPlayer", "SimulationPlayer"]
+
+__all__ = [
+    "RandomPlayer", "HumanPlayer", "SimulationPlayer", "HeuristicPlayer"
+]
+
+# the players are imported on the first access (PEP 562), e.g. the random
+# player does not need the modules of the simulations
+_SUBMODULES = {
+    "HeuristicPlayer": "._heuristic_player",
+    "HumanPlayer": "._human_player",
+    "RandomPlayer": "._random_player",
+    "SimulationPlayer": "._random_simulations",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _SUBMODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_SUBMODULES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
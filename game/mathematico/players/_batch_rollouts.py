@@ -0,0 +1,75 @@
+"""
+Vectorized random rollouts used by SimulationPlayer in the batched mode,
+requires numpy.
+"""
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from mathematico.game import Board
+from mathematico.game.board import EMPTY_CELL
+from mathematico.game.batch import score_cells
+
+
+def rollouts(board: Board, deck: Sequence[int], card: int,
+             positions: List[Tuple[int, int]], n: int,
+             rng: np.random.Generator) -> np.ndarray:
+    """
+    Play `n` random games to the end for each of the candidate positions of
+    the card and return their final scores.
+
+    Each rollout draws the cards for the remaining empty cells from the deck
+    without replacement, in random order. The same draws are used for all
+    of the candidates, which reduces the variance of their comparison.
+
+    :param board: the current board, not modified
+    :param deck: the cards that can still be drawn, without `card`
+    :param card: the card to place
+    :param positions: candidate empty positions for the card
+    :param n: number of rollouts per candidate
+    :param rng: source of randomness
+    :return: (len(positions), n) array with the final scores
+    """
+    size = board.size
+    base = np.frombuffer(bytes(board.cells), dtype=np.uint8)
+    empty = np.flatnonzero(base == EMPTY_CELL)
+    candidates = np.array([row * size + col for row, col in positions])
+
+    # the other empty cells for each candidate, (C, m-1)
+    others = np.array([empty[empty != c] for c in candidates])
+    n_fill = others.shape[1]
+
+    cells = np.tile(base, (len(candidates), n, 1))
+    cells[np.arange(len(candidates)), :, candidates] = card
+    if n_fill:
+        draws = rng.permuted(np.tile(np.asarray(deck, dtype=np.uint8),
+                                     (n, 1)), axis=1)[:, :n_fill]
+        cells[np.arange(len(candidates))[:, None, None],
+              np.arange(n)[None, :, None],
+              others[:, None, :]] = draws[None, :, :]
+
+    scores = score_cells(cells.reshape(-1, size * size), size)
+    return scores.reshape(len(candidates), n).astype(np.int64)
+
+
+def rollout_scores(board: Board, deck: Sequence[int], card: int,
+                   positions: List[Tuple[int, int]], n: int,
+                   rng: np.random.Generator) -> np.ndarray:
+    """
+    Return the total score of `n` random rollouts for each of the candidate
+    positions, see `rollouts`.
+    """
+    totals: np.ndarray = rollouts(board, deck, card, positions, n,
+                                  rng).sum(axis=1)
+    return totals
+
+
+def rollout_moments(board: Board, deck: Sequence[int], card: int,
+                    positions: List[Tuple[int, int]], n: int,
+                    rng: np.random.Generator) -> Tuple[List[int], List[int]]:
+    """
+    Return the sums and the sums of squares of the scores of `n` random
+    rollouts for each of the candidate positions, see `rollouts`.
+    """
+    scores = rollouts(board, deck, card, positions, n, rng)
+    return scores.sum(axis=1).tolist(), (scores ** 2).sum(axis=1).tolist()
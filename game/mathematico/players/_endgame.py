@@ -0,0 +1,138 @@
+"""
+Exact expected-value search of the end of the game, when only few cells are
+empty. The value of a position is the expectation over the next drawn card
+of the best value after placing it (expectimax), computed exactly over the
+counts of the remaining cards, and memoized on the lines of the board, empty
+cells and the remaining counts.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from mathematico.game import Board
+
+
+N_RANKS = 13
+Position = Tuple[int, int]
+
+
+class EndgameSolver:
+    """
+    Expectimax solver of the end of the game.
+
+    The remaining cards are given as counts of each rank, `counts[r - 1]`
+    is the number of cards of rank `r` that can still be drawn.
+
+    Methods
+    -------
+        expected_value: expected final score before drawing the next card
+        move_values: expected final score of each placement of the card
+        best_move: placement of the card with the best expected score
+        clear: forget the memoized values
+    """
+
+    def __init__(self, maxsize: Optional[int] = 1_000_000):
+        """
+        :param maxsize: maximum number of memoized positions, the memo is
+            cleared when it gets full, None for unbounded
+        """
+        self.maxsize = maxsize
+        self._memo: Dict[Tuple[Tuple[int, ...], int, Tuple[int, ...]],
+                         float] = {}
+
+    def __len__(self) -> int:
+        return len(self._memo)
+
+    def clear(self) -> None:
+        """Forget all memoized values."""
+        self._memo.clear()
+
+    def expected_value(self, board: Board, counts: Sequence[int]) -> float:
+        """
+        Return the expected final score of the board, if the remaining empty
+        cells are filled optimally with the cards drawn from `counts`.
+
+        :param board: the board, not modified
+        :param counts: number of remaining cards of each rank
+        :return: the expected score
+        :raises ValueError: if there are less cards than empty cells
+        """
+        if sum(counts) < board.empty_count:
+            raise ValueError("Not enough cards to fill the board")
+        return self._value(board, list(counts))
+
+    def move_values(self, board: Board, card: int,
+                    counts: Sequence[int]) -> Dict[Position, float]:
+        """
+        Return the expected final score of each placement of the card.
+
+        :param board: the board, not modified
+        :param card: the drawn card
+        :param counts: number of remaining cards of each rank, without
+            the drawn card
+        :return: mapping of the positions to the expected scores
+        """
+        if sum(counts) < board.empty_count - 1:
+            raise ValueError("Not enough cards to fill the board")
+        remaining = list(counts)
+        values = {}
+        for move in list(board.possible_moves()):
+            board.make_move(move, card)
+            values[move] = self._value(board, remaining)
+            board.unmake_move(move)
+        return values
+
+    def best_move(self, board: Board, card: int,
+                  counts: Sequence[int]) -> Tuple[Position, float]:
+        """
+        Return the placement of the card with the best expected final score,
+        and that score. See `move_values`.
+        """
+        values = self.move_values(board, card, counts)
+        best = max(values, key=values.__getitem__)
+        return best, values[best]
+
+    def _value(self, board: Board, counts: List[int]) -> float:
+        """Return the expected score of the board, `counts` are modified
+        during the search and restored."""
+        empty = board.empty_count
+        if empty == 0:
+            return board.score()
+
+        cells = [divmod(idx, board.size) for idx in board.empty_cells]
+        total = sum(counts)
+        if empty == 1:
+            # the last card, no choice is left
+            cell = cells[0]
+            return sum(count * board.score_with(cell, rank)
+                       for rank, count in enumerate(counts, 1)
+                       if count) / total
+
+        mask = 0
+        for row, col in cells:
+            mask |= 1 << (row * board.size + col)
+        key = (tuple(board.lines), mask, tuple(counts))
+        value = self._memo.get(key)
+        if value is not None:
+            return value
+
+        value = 0.0
+        for rank in range(1, N_RANKS + 1):
+            count = counts[rank - 1]
+            if not count:
+                continue
+            counts[rank - 1] -= 1
+            best = None
+            for cell in cells:
+                board.make_move(cell, rank)
+                result = self._value(board, counts)
+                board.unmake_move(cell)
+                if best is None or result > best:
+                    best = result
+            counts[rank - 1] += 1
+            assert best is not None
+            value += count * best
+        value /= total
+
+        if self.maxsize is not None and len(self._memo) >= self.maxsize:
+            self._memo.clear()
+        self._memo[key] = value
+        return value
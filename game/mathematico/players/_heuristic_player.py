@@ -0,0 +1,69 @@
+from typing import Dict, Tuple
+
+from mathematico.game import Board, Player
+from mathematico.game.deck import Deck
+from mathematico.game.eval import RANK_BITS
+from mathematico.game.potential import line_potential
+
+
+Position = Tuple[int, int]
+
+
+class HeuristicPlayer(Player):
+    """
+    Places the card to the cell which maximizes the expected final score of
+    the board estimated by the potentials of its lines (see `game.potential`),
+    without any simulations. Only the potentials of the lines through the
+    cell change, so each move takes only a few table lookups per line and
+    exact evaluations of the nearly full lines.
+    """
+
+    def __init__(self, exact_cells: int = 2):
+        """
+        :param exact_cells: lines with at most this many empty cells are
+            evaluated exactly over the remaining cards
+        """
+        super().__init__()
+        self.deck = Deck()
+        self.exact_cells = exact_cells
+
+    def reset(self) -> None:
+        self.board = Board()
+        self.deck = Deck()
+
+    def move_values(self, card: int) -> Dict[Position, float]:
+        """
+        Return the change of the potential of the board for each placement
+        of the card, which is already removed from the deck.
+        """
+        board = self.board
+        counts = self.deck.counts
+        diagonals = 2 * board.size
+        exact = self.exact_cells
+        card_key = 1 << (RANK_BITS * card)
+        gains: Dict[int, float] = {}
+        values = {}
+        for move in board.possible_moves():
+            value = 0.0
+            for line in board.lines_of(move):
+                gain = gains.get(line)
+                if gain is None:
+                    key = board.lines[line]
+                    diagonal = line >= diagonals
+                    # the line after the move has one empty cell less, both
+                    # potentials come from the same model (exact or table)
+                    gain = line_potential(key + card_key, counts, diagonal,
+                                          exact - 1) \
+                        - line_potential(key, counts, diagonal, exact)
+                    gains[line] = gain
+                value += gain
+            values[move] = value
+        return values
+
+    def move(self, card_number: int) -> None:
+        self.deck.remove(card_number)
+        values = self.move_values(card_number)
+        if not values:
+            raise IndexError("No moves available")
+        self.board.make_move(max(values, key=values.__getitem__),
+                             card_number)
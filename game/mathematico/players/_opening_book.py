@@ -0,0 +1,215 @@
+"""
+Opening book of SimulationPlayer: the best positions of the cards in the
+first moves of the game, precomputed by simulations.
+
+The positions are stored in their canonical form (see `game.symmetry`), so
+the few distinct openings cover all of the boards equal up to a symmetry.
+The file starts with the header `MAGIC` and the depth of the book (uint8,
+the book holds the boards with less than `depth` cards), followed by the
+entries sorted by the key (the canonical grid and the card):
+
+    grid    25 x uint8   canonical form of the board before the move
+    card    uint8        the drawn card
+    cell    uint8        best cell for the card, index into the grid
+    value   float32      expected final score after the move
+
+The book is memory-mapped and searched by bisection, so only the pages
+with the looked up entries are read.
+
+Usage:
+------
+    python -m mathematico.players._opening_book OUTPUT [--depth N]
+        [--simulations N] [--batch-size N]
+"""
+import argparse
+import mmap
+import struct
+import sys
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from mathematico.game import Board, Deck
+from mathematico.game.symmetry import canonical_form, canonical_symmetry
+
+
+MAGIC = b"MTHBOOK2"
+N_CELLS = 25
+KEY_SIZE = N_CELLS + 1
+_HEADER = struct.Struct(f"<{len(MAGIC)}sB")
+HEADER_SIZE = _HEADER.size
+_ENTRY = struct.Struct(f"<{N_CELLS}sBBf")
+ENTRY_SIZE = _ENTRY.size
+
+
+class OpeningBook:
+    """
+    Read-only opening book, memory-mapped from the file.
+
+    Attributes
+    ----------
+        depth: the book holds the boards with less than `depth` cards
+
+    Methods
+    -------
+        lookup: best position and value of the card on the board, if known
+        close: unmap the file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        header = self._file.read(HEADER_SIZE)
+        if len(header) != HEADER_SIZE or header[:len(MAGIC)] != MAGIC:
+            self._file.close()
+            raise ValueError(f"{path} is not an opening book")
+        _, self.depth = _HEADER.unpack(header)
+        self._map: Optional[mmap.mmap] = None
+        self._size = (self._file.seek(0, 2) - HEADER_SIZE) // ENTRY_SIZE
+        if self._size:
+            self._map = mmap.mmap(self._file.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __enter__(self) -> "OpeningBook":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmap and close the file."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def _find(self, key: bytes) -> Optional[Tuple[int, float]]:
+        """Return the cell and the value stored under the key."""
+        data = self._map
+        if data is None:
+            return None
+        low, high = 0, self._size
+        while low < high:
+            middle = (low + high) // 2
+            offset = HEADER_SIZE + middle * ENTRY_SIZE
+            if data[offset:offset + KEY_SIZE] < key:
+                low = middle + 1
+            else:
+                high = middle
+        offset = HEADER_SIZE + low * ENTRY_SIZE
+        if low == self._size or data[offset:offset + KEY_SIZE] != key:
+            return None
+        _, _, cell, value = _ENTRY.unpack_from(data, offset)
+        return cell, value
+
+    def lookup(self, board: Board,
+               card: int) -> Optional[Tuple[Tuple[int, int], float]]:
+        """
+        Return the best position of the card on the board and the expected
+        final score, or None if the board is not in the book.
+        """
+        if board.size * board.size != N_CELLS \
+                or board.occupied_cells >= self.depth:
+            return None
+        form, sym = canonical_symmetry(board.cells, board.size)
+        found = self._find(form + bytes([card]))
+        if found is None:
+            return None
+        cell, value = found
+        return divmod(sym[cell], board.size), value
+
+
+def opening_positions(depth: int) -> List[bytes]:
+    """
+    Return the canonical forms of all boards with less than `depth` cards,
+    which can occur in the game.
+    """
+    level: Set[bytes] = {bytes(N_CELLS)}
+    result: List[bytes] = []
+    for _ in range(depth):
+        result.extend(sorted(level))
+        following: Set[bytes] = set()
+        for cells in level:
+            grid = bytearray(cells)
+            for card in range(1, 14):
+                if grid.count(card) == 4:
+                    continue
+                for idx in range(N_CELLS):
+                    if grid[idx] == 0:
+                        grid[idx] = card
+                        following.add(canonical_form(grid))
+                        grid[idx] = 0
+        level = following
+    return result
+
+
+def build_book(path: str, depth: int = 2, simulations: int = 20_000,
+               batch_size: Optional[int] = None, verbose: bool = False) -> int:
+    """
+    Search the best move of each card on each of the opening boards with
+    SimulationPlayer and write the book.
+
+    :param path: path to the output file
+    :param depth: number of the opening moves in the book
+    :param simulations: number of simulations of each entry
+    :param batch_size: batch size of the simulations, see SimulationPlayer
+    :param verbose: if True, print the progress
+    :return: number of entries written
+    """
+    from ._random_simulations import SimulationPlayer
+
+    player = SimulationPlayer(None, simulations, batch_size=batch_size)
+    entries: Dict[bytes, Tuple[int, float]] = {}
+    positions = opening_positions(depth)
+    for n, cells in enumerate(positions):
+        for card in range(1, 14):
+            if cells.count(card) == 4:
+                continue
+            player.board = Board()
+            player.board.grid = [list(cells[i:i + 5])
+                                 for i in range(0, N_CELLS, 5)]
+            player.deck = Deck()
+            for drawn in list(cells) + [card]:
+                if drawn:
+                    player.deck.remove(drawn)
+            moves, _ = player._candidates(
+                list(player.board.possible_moves()), card)
+            scores, counts = player._run_simulations(
+                moves, card, 10**15, simulations)
+            values = [score / count for score, count in zip(scores, counts)]
+            best = max(range(len(moves)), key=values.__getitem__)
+            row, col = moves[best]
+            entries[cells + bytes([card])] = (row * 5 + col, values[best])
+        if verbose:
+            print(f"{n + 1}/{len(positions)} positions", file=sys.stderr)
+
+    with open(path, "wb") as file:
+        file.write(_HEADER.pack(MAGIC, depth))
+        for key in sorted(entries):
+            cell, value = entries[key]
+            file.write(_ENTRY.pack(key[:N_CELLS], key[N_CELLS], cell, value))
+    return len(entries)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Build the opening book from the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m mathematico.players._opening_book",
+        description="Build the opening book of SimulationPlayer.")
+    parser.add_argument("output", help="path to the book")
+    parser.add_argument("--depth", type=int, default=2,
+                        help="number of the opening moves in the book")
+    parser.add_argument("--simulations", type=int, default=20_000,
+                        help="simulations of each entry")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="run the simulations in batches (numpy)")
+    args = parser.parse_args(argv)
+    entries = build_book(args.output, args.depth, args.simulations,
+                         args.batch_size, verbose=True)
+    print(f"Wrote {entries} entries to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
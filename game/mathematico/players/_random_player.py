@@ -11,8 +11,7 @@ class RandomPlayer(Player):
         self.board = Board()
 
     def move(self, number: int):
-        possible_moves = list(self.board.possible_moves())
-        if not possible_moves:
+        if self.board.empty_count == 0:
             raise IndexError("No moves available")
-        picked_move = random.choice(possible_moves)
+        picked_move = self.board.random_empty_cell(random)
         self.board.make_move(picked_move, number)
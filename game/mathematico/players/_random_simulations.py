@@ -1,14 +1,33 @@
+import math
 import random
-from time import time_ns
-from typing import Optional, Tuple, List, Any
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter_ns, time_ns
+from typing import Optional, Tuple, List, Any, Dict
 import pprint
 
 from mathematico.game import Player, Board
+from mathematico.game.deck import Deck
+from mathematico.game.timings import SearchStats
+from mathematico.game.transposition import TranspositionTable, position_key
+from ._endgame import EndgameSolver
+from ._opening_book import OpeningBook
+from ._time_manager import TimeManager
 
 
-def swap(list_: List[Any], i: int, j: int):
-    """Swap list_[i] and list_[j]"""
-    list_[i], list_[j] = list_[j], list_[i]
+ALLOCATIONS = ("uniform", "ucb", "halving")
+
+
+def _simulate_in_worker(player: "SimulationPlayer",
+                        possible_moves: List[Tuple[int, int]], number: int,
+                        max_time: int, max_simulations: int,
+                        seed: int) -> Tuple[List[int], List[int], bool]:
+    """Run the simulations of one move in a worker process, return also
+    whether the time limit stopped them."""
+    random.seed(seed)
+    player._rng = None
+    scores, simulations = player._run_simulations(possible_moves, number,
+                                                  max_time, max_simulations)
+    return scores, simulations, player._timed_out
 
 
 class SimulationPlayer(Player):
@@ -16,85 +35,500 @@ class SimulationPlayer(Player):
     Run many random simulations and pick the move that yield the best average
     score. The move time is bounded either by max move time or number
     of simulations.
+
+    With `batch_size` set, the simulations are run with NumPy in batches of
+    `batch_size` rollouts per candidate move (requires numpy).
+
+    With `workers` set, each move is simulated in parallel by this many
+    worker processes, which share the simulation budget and keep running
+    until the time limit. The pool is kept between the moves, use `close`
+    to shut it down. A copy of the player sent to another process (e.g. by
+    `Mathematico.play` with a process pool) simulates in that process only,
+    instead of starting a nested pool.
+
+    The `allocation` selects how the simulations are split among the moves:
+        * "uniform" - every move gets the same number of simulations
+        * "ucb" - the simulations are given to the move with the highest
+          upper confidence bound (UCB1) on its expected score
+        * "halving" - successive halving, the budget is split into rounds,
+          after each round the worse half of the moves is dropped
+    The adaptive allocations spend less simulations on the hopeless moves,
+    the number of simulations used by the last move is `last_simulations`.
+
+    With `endgame_cells` set, the moves with at most this many empty cells
+    are searched exactly by EndgameSolver instead of the simulations, which
+    takes milliseconds for up to 4 empty cells.
+
+    With `game_time` set (in nanoseconds), the time of the whole game is
+    split among the moves by TimeManager, which also stops the simulations
+    once the best move is settled, instead of using `max_time` for each
+    move. The simulations are split uniformly, the number of simulations
+    is still limited by `max_simulations`.
+
+    With `opening_book` set to the path of a book built by
+    `mathematico.players._opening_book`, the positions in the book are
+    played instantly, the book is memory-mapped when the player is created
+    (and again by a copy in another process, while the board is within the
+    depth of the book).
+
+    With `transpositions` set, the candidate moves leading to symmetric
+    positions are simulated only once, and the results are accumulated in
+    the table, so that positions reached again (e.g. in later games) start
+    from the previous estimates. A copy of the player sent to another
+    process (e.g. by `Mathematico.play` with a process pool) starts with an
+    empty table, its estimates are merged into the table by `update_from`.
+
+    Set `stats` to SearchStats instance to count the simulations and the
+    moves stopped by the time limit, the counters of a copy sent to another
+    process are merged into it by `update_from`.
     """
 
-    def __init__(self, maxtime: Optional[int], max_simulations: Optional[int]):
+    def __init__(self, maxtime: Optional[int], max_simulations: Optional[int],
+                 batch_size: Optional[int] = None,
+                 workers: Optional[int] = None,
+                 transpositions: Optional[TranspositionTable] = None,
+                 allocation: str = "uniform",
+                 endgame_cells: int = 0,
+                 game_time: Optional[int] = None,
+                 opening_book: Optional[str] = None):
         """Note: time in nanoseconds"""
-        assert maxtime is not None or max_simulations is not None
+        assert maxtime is not None or max_simulations is not None \
+            or game_time is not None, \
+            "maxtime, max_simulations or game_time must be given"
+        if allocation not in ALLOCATIONS:
+            raise ValueError(f"Unknown allocation {allocation!r}, "
+                             f"expected one of {ALLOCATIONS}")
         super().__init__()
-        self.cards: List[int] = []
-        self.last_valid_card_idx = -1
-        self.reset_cards()
+        self.deck = Deck()
         self.max_time = maxtime or 10**9  # 10 seconds
         self.max_simulations: int = max_simulations or 10**5
+        self.batch_size = batch_size
+        self.workers = workers
+        self.transpositions = transpositions
+        self.allocation = allocation
+        self.endgame_cells = endgame_cells
+        self._endgame = EndgameSolver()
+        self.opening_book = opening_book
+        self._book: Optional[OpeningBook] = None
+        self._book_depth = 0
+        if opening_book is not None:
+            self._book = OpeningBook(opening_book)
+            self._book_depth = self._book.depth
+        self.time_manager: Optional[TimeManager] = None
+        if game_time is not None:
+            if allocation != "uniform" or (workers or 1) > 1:
+                raise ValueError("The game time is managed only with the "
+                                 "uniform allocation and no workers")
+            self.time_manager = TimeManager(game_time)
+        self.last_simulations = 0
         self.verbose = False
+        self.stats: Optional[SearchStats] = None
+        self._rng: Any = None
+        # whether the time limit stopped the simulations of the last move
+        self._timed_out = False
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # whether this is a copy sent to another process
+        self._copied = False
 
-    def reset_cards(self):
-        self.cards = [i for i in range(1, 14) for _ in range(4)]
-        self.last_valid_card_idx = len(self.cards) - 1
+    def __getstate__(self) -> Dict[str, Any]:
+        # the worker pool and the mapped book cannot be pickled, the copy
+        # simulates without a pool and opens the book again, and the memo is
+        # not needed; the copy gets an empty transposition table and stats,
+        # which are sent back with the results of its moves only
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        state["_book"] = None
+        if not self._copied:
+            state["workers"] = None
+            if self.transpositions is not None:
+                state["transpositions"] = TranspositionTable(
+                    self.transpositions.maxsize)
+            if self.stats is not None:
+                state["stats"] = SearchStats()
+        state["_endgame"] = EndgameSolver(self._endgame.maxsize)
+        state["_copied"] = True
+        return state
 
-    def reset(self) -> None:
-        self.reset_cards()
-        self.board = Board()
+    def update_from(self, other: Player) -> None:
+        # keep the attributes which are not pickled
+        kept = {key: self.__dict__[key]
+                for key in ["_pool", "_book", "transpositions", "_endgame",
+                            "_copied", "workers", "stats"]}
+        estimates = getattr(other, "transpositions", None)
+        stats = getattr(other, "stats", None)
+        super().update_from(other)
+        self.__dict__.update(kept)
+        if self.transpositions is not None and estimates is not None \
+                and estimates is not self.transpositions:
+            self.transpositions.merge(estimates)
+        if self.stats is not None and stats is not None \
+                and stats is not self.stats:
+            self.stats.merge(stats)
+
+    def close(self) -> None:
+        """Shut down the worker processes and close the book, if any."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if self._book is not None:
+            self._book.close()
+            self._book = None
 
-    def invalidate_card(self, card_idx):
-        swap(self.cards, card_idx, self.last_valid_card_idx)
-        self.last_valid_card_idx -= 1
+    def _book_move(self, number: int) -> Optional[Tuple[int, int]]:
+        """Return the position of the card from the opening book."""
+        if self.board.occupied_cells >= self._book_depth:
+            return None
+        assert self.opening_book is not None
+        if self._book is None:
+            self._book = OpeningBook(self.opening_book)
+        found = self._book.lookup(self.board, number)
+        if found is None:
+            return None
+        position, value = found
+        if self.verbose:
+            print(f"Book: expected score {value:.2f}")
+        return position
+
+    def seed(self, seed: int) -> None:
+        # the generator of the batched simulations is created again from
+        # the seeded `random` module
+        self._rng = None
 
-    def revalidate_card(self, card_idx: int):
-        self.last_valid_card_idx += 1
-        swap(self.cards, card_idx, self.last_valid_card_idx)
+    def reset(self) -> None:
+        self.deck = Deck()
+        self.board = Board()
+        self._endgame.clear()
+        if self.time_manager is not None:
+            self.time_manager.reset()
 
     def simulate_move(self, position: Tuple[int, int], move: int) -> int:
         """Note: return score, also clean up this move"""
         self.board.make_move(position, move)
-        possible_moves = list(self.board.possible_moves())
 
-        if not possible_moves:
+        if self.board.empty_count == 0:
+            score = self.board.score()
             self.board.unmake_move(position)
-            return self.board.score()
+            return score
 
-        next_card_idx = random.randint(0, self.last_valid_card_idx)
-        next_move = self.cards[next_card_idx]
-        move_position = random.choice(possible_moves)
-        self.invalidate_card(next_card_idx)
+        next_move = self.deck.draw(random)
+        move_position = self.board.random_empty_cell(random)
 
         score = self.simulate_move(move_position, next_move)
 
-        self.revalidate_card(next_card_idx)
+        self.deck.add(next_move)
         self.board.unmake_move(position)
         return score
 
-    def move(self, number: int):
-        move_index = self.cards.index(number, 0, self.last_valid_card_idx)
-        self.invalidate_card(move_index)
+    def _run_simulations(self, possible_moves: List[Tuple[int, int]],
+                         number: int, max_time: int,
+                         max_simulations: int) -> Tuple[List[int], List[int]]:
+        """Return total scores and simulation counts for each move."""
+        if self.allocation == "ucb":
+            return self._simulate_ucb(possible_moves, number, max_time,
+                                      max_simulations)
+        if self.allocation == "halving":
+            return self._simulate_halving(possible_moves, number, max_time,
+                                          max_simulations)
+        if self.batch_size is not None:
+            return self._simulate_batched(possible_moves, number, max_time,
+                                          max_simulations)
+        return self._simulate(possible_moves, number, max_time,
+                              max_simulations)
 
-        possible_moves = list(self.board.possible_moves())
-        if len(possible_moves) == 1:
-            self.board.make_move(possible_moves[0], number)
-            return
+    def _run_parallel(self, possible_moves: List[Tuple[int, int]],
+                      number: int) -> Tuple[List[int], List[int]]:
+        """Split the simulations of the move among the worker processes
+        and merge their results."""
+        assert self.workers is not None
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        max_simulations = -(-self.max_simulations // self.workers)
+        futures = [
+            self._pool.submit(_simulate_in_worker, self, possible_moves,
+                              number, self.max_time, max_simulations,
+                              random.getrandbits(64))
+            for _ in range(self.workers)
+        ]
+        scores = [0] * len(possible_moves)
+        simulations = [0] * len(possible_moves)
+        self._timed_out = False
+        for future in futures:
+            worker_scores, worker_simulations, timed_out = future.result()
+            self._timed_out |= timed_out
+            for i in range(len(possible_moves)):
+                scores[i] += worker_scores[i]
+                simulations[i] += worker_simulations[i]
+        return scores, simulations
 
+    def _simulate(self, possible_moves: List[Tuple[int, int]], number: int,
+                  max_time: int,
+                  max_simulations: int) -> Tuple[List[int], List[int]]:
+        """Return total scores and simulation counts for each move."""
         scores = [0] * len(possible_moves)
         simulations = [0] * len(possible_moves)
         total_simulations = 0
         start_time = time_ns()
 
-        while (
-            time_ns() - start_time < self.max_time
-            and total_simulations <= self.max_simulations - 1000
+        while total_simulations == 0 or (
+            time_ns() - start_time < max_time
+            and total_simulations < max_simulations
         ):
-            for _ in range(1000):  # do not ask for time too many times
+            # do not ask for time too many times
+            remaining = max_simulations - total_simulations
+            rounds = min(1000, -(-remaining // len(possible_moves)))
+            for _ in range(rounds):
                 for i, move in enumerate(possible_moves):
                     score = self.simulate_move(move, number)
                     scores[i] += score
                     simulations[i] += 1
                     total_simulations += 1
+        self._timed_out = total_simulations < max_simulations
+        return scores, simulations
+
+    def _simulate_batched(self, possible_moves: List[Tuple[int, int]],
+                          number: int, max_time: int,
+                          max_simulations: int) -> Tuple[List[int], List[int]]:
+        """Return total scores and simulation counts for each move, the
+        simulations are run in batches using NumPy."""
+        import numpy as np
+        from ._batch_rollouts import rollout_scores
+
+        assert self.batch_size is not None
+        if self._rng is None:
+            self._rng = np.random.default_rng(random.getrandbits(64))
+        deck = self.deck.cards()
+        scores = np.zeros(len(possible_moves), dtype=np.int64)
+        total_simulations = 0
+        start_time = time_ns()
+
+        while total_simulations == 0 or (
+            time_ns() - start_time < max_time
+            and total_simulations < max_simulations
+        ):
+            remaining = max_simulations - total_simulations
+            rounds = min(self.batch_size,
+                         -(-remaining // len(possible_moves)))
+            scores += rollout_scores(self.board, deck, number, possible_moves,
+                                     rounds, self._rng)
+            total_simulations += rounds * len(possible_moves)
+
+        self._timed_out = total_simulations < max_simulations
+        simulations = [total_simulations // len(possible_moves)] \
+            * len(possible_moves)
+        return scores.tolist(), simulations
+
+    def _candidates(self, possible_moves: List[Tuple[int, int]],
+                    number: int) -> Tuple[List[Tuple[int, int]], List[bytes]]:
+        """Return one move for each class of symmetric positions reached
+        by placing the card, with the keys of these positions."""
+        candidates = []
+        keys = []
+        for move in possible_moves:
+            self.board.make_move(move, number)
+            key = position_key(self.board)
+            self.board.unmake_move(move)
+            if key not in keys:
+                candidates.append(move)
+                keys.append(key)
+        return candidates, keys
+
+    def _sample(self, possible_moves: List[Tuple[int, int]], number: int,
+                rounds: int) -> Tuple[List[int], List[int]]:
+        """Run `rounds` simulations of each move, return the sums and the
+        sums of squares of the scores for each move."""
+        if self.batch_size is not None:
+            import numpy as np
+            from ._batch_rollouts import rollout_moments
+
+            if self._rng is None:
+                self._rng = np.random.default_rng(random.getrandbits(64))
+            deck = self.deck.cards()
+            return rollout_moments(self.board, deck, number, possible_moves,
+                                   rounds, self._rng)
+
+        sums = [0] * len(possible_moves)
+        squares = [0] * len(possible_moves)
+        for _ in range(rounds):
+            for i, move in enumerate(possible_moves):
+                score = self.simulate_move(move, number)
+                sums[i] += score
+                squares[i] += score * score
+        return sums, squares
+
+    def _simulate_ucb(self, possible_moves: List[Tuple[int, int]],
+                      number: int, max_time: int,
+                      max_simulations: int) -> Tuple[List[int], List[int]]:
+        """
+        Return total scores and simulation counts for each move, each step
+        simulates the move with the highest UCB1 index
+
+            mean + std * sqrt(2 * ln(total simulations) / simulations),
+
+        where the scores are scaled by their standard deviation pooled
+        over all moves.
+        """
+        start_time = time_ns()
+        step = self.batch_size or 1
+        scores, squares = self._sample(possible_moves, number, step)
+        simulations = [step] * len(possible_moves)
+        total_simulations = step * len(possible_moves)
+
+        while time_ns() - start_time < max_time \
+                and total_simulations < max_simulations:
+            variance = sum(
+                sq - s * s / n for s, sq, n in zip(scores, squares,
+                                                   simulations)
+            ) / max(1, total_simulations - len(possible_moves))
+            scale = math.sqrt(2 * max(variance, 1.0)
+                              * math.log(total_simulations))
+            best = max(
+                range(len(possible_moves)),
+                key=lambda i: scores[i] / simulations[i]
+                + scale / math.sqrt(simulations[i])
+            )
+            total, square = self._sample([possible_moves[best]], number, step)
+            scores[best] += total[0]
+            squares[best] += square[0]
+            simulations[best] += step
+            total_simulations += step
+        self._timed_out = total_simulations < max_simulations
+        return scores, simulations
+
+    def _simulate_halving(self, possible_moves: List[Tuple[int, int]],
+                          number: int, max_time: int,
+                          max_simulations: int) -> Tuple[List[int], List[int]]:
+        """Return total scores and simulation counts for each move, the
+        moves are simulated by successive halving."""
+        start_time = time_ns()
+        scores = [0] * len(possible_moves)
+        simulations = [0] * len(possible_moves)
+        alive = list(range(len(possible_moves)))
+        phases = max(1, math.ceil(math.log2(len(possible_moves))))
+        chunk = self.batch_size or 10
+        self._timed_out = False
+
+        for _ in range(phases):
+            rounds = max(1, max_simulations // phases // len(alive))
+            while rounds > 0:
+                n = min(chunk, rounds)
+                totals, _ = self._sample(
+                    [possible_moves[i] for i in alive], number, n)
+                for i, total in zip(alive, totals):
+                    scores[i] += total
+                    simulations[i] += n
+                rounds -= n
+                if time_ns() - start_time >= max_time:
+                    self._timed_out = True
+                    return scores, simulations
+            alive.sort(key=lambda i: scores[i] / simulations[i], reverse=True)
+            alive = alive[:(len(alive) + 1) // 2]
+        return scores, simulations
+
+    def _simulate_managed(self, possible_moves: List[Tuple[int, int]],
+                          number: int) -> Tuple[List[int], List[int]]:
+        """Return total scores and simulation counts for each move, the time
+        of the move is decided by the time manager."""
+        manager = self.time_manager
+        assert manager is not None
+        start = perf_counter_ns()
+        budget, limit = manager.budget(len(possible_moves),
+                                       self.endgame_cells)
+        rounds = self.batch_size or 1
+        sums = [0] * len(possible_moves)
+        squares = [0] * len(possible_moves)
+        simulations = [0] * len(possible_moves)
+        total_simulations = 0
+
+        while True:
+            totals, totals_squared = self._sample(possible_moves, number,
+                                                  rounds)
+            for i in range(len(possible_moves)):
+                sums[i] += totals[i]
+                squares[i] += totals_squared[i]
+                simulations[i] += rounds
+            total_simulations += rounds * len(possible_moves)
+            elapsed = perf_counter_ns() - start
+            z = manager.z if elapsed < budget else manager.z_extend
+            if total_simulations >= self.max_simulations \
+                    or manager.settled(sums, squares, simulations, z):
+                self._timed_out = False
+                return sums, simulations
+            if elapsed >= limit:
+                self._timed_out = True
+                return sums, simulations
+
+    def move(self, number: int):
+        start = perf_counter_ns()
+        try:
+            self._move(number)
+        finally:
+            if self.time_manager is not None:
+                self.time_manager.spend(start)
+
+    def _move(self, number: int):
+        """Pick the position of the card and play it."""
+        self.deck.remove(number)
+
+        possible_moves = list(self.board.possible_moves())
+        if len(possible_moves) == 1:
+            self.board.make_move(possible_moves[0], number)
+            return
+
+        book_move = self._book_move(number)
+        if book_move is not None:
+            self.board.make_move(book_move, number)
+            return
+
+        if len(possible_moves) <= self.endgame_cells:
+            best_move, value = self._endgame.best_move(
+                self.board, number, self.deck.counts)
+            self.board.make_move(best_move, number)
+            if self.verbose:
+                print(f"Endgame: expected score {value:.2f}")
+            return
+
+        keys: List[bytes] = []
+        if self.transpositions is not None:
+            possible_moves, keys = self._candidates(possible_moves, number)
+            if len(possible_moves) == 1:
+                self.board.make_move(possible_moves[0], number)
+                return
+
+        start_time = time_ns()
+        if self.time_manager is not None:
+            scores, simulations = self._simulate_managed(possible_moves,
+                                                         number)
+        elif self.workers is not None and self.workers > 1:
+            scores, simulations = self._run_parallel(possible_moves, number)
+        else:
+            scores, simulations = self._run_simulations(
+                possible_moves, number, self.max_time, self.max_simulations)
+        self.last_simulations = sum(simulations)
+        if self.stats is not None:
+            self.stats.record(self.last_simulations, time_ns() - start_time,
+                              self._timed_out)
+
+        # the adaptive allocations pick among the moves most simulated by
+        # this search, as the estimates of the dropped moves are less reliable
+        candidates = list(range(len(possible_moves)))
+        if self.allocation != "uniform":
+            most_simulated = max(simulations)
+            candidates = [i for i, it in enumerate(simulations)
+                          if 2 * it > most_simulated]
+
+        if self.transpositions is not None:
+            for i, key in enumerate(keys):
+                previous = self.transpositions.get(key)
+                self.transpositions.add(key, scores[i], simulations[i])
+                if previous is not None:
+                    scores[i] += previous[0]
+                    simulations[i] += previous[1]
 
         final_scores = [score/it for score, it in zip(scores, simulations)]
-        sorted_moves = sorted(zip(final_scores, possible_moves), reverse=True)
-        best_move = sorted_moves[0][1]
-        self.board.make_move(best_move, number)
+        best = max(candidates,
+                   key=lambda i: (final_scores[i], possible_moves[i]))
+        self.board.make_move(possible_moves[best], number)
 
         if self.verbose:
-            print("Final scores:")
+            print(f"Final scores ({self.last_simulations} simulations):")
             pprint.pprint(final_scores)
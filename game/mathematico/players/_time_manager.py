@@ -0,0 +1,112 @@
+"""
+Time management of the search players, which split a time budget of the
+whole game among the moves.
+"""
+import math
+from time import perf_counter_ns
+from typing import Sequence, Tuple
+
+
+class TimeManager:
+    """
+    Splits the time budget of the game among the moves and decides when the
+    search of a move can stop.
+
+    Each move gets a share of the game time proportional to the number of
+    its candidates, out of the candidates of all moves, so the early moves
+    with many empty cells get more time. The search stops early when the
+    best move is settled, i.e. it leads the second best by more than `z`
+    standard errors, or when the standard error is below `tolerance` points
+    so that the choice does not matter. After the share runs out, the search
+    continues only for the close calls, where the best move leads by less
+    than `z_extend` standard errors, up to `extension` times the share. The
+    time saved by the early stops is kept for the close calls, the game takes
+    less than its budget if there are not many of them.
+
+    Methods
+    -------
+        reset: start a new game
+        budget: time for the move with given number of candidates
+        settled: whether the best candidate is known well enough
+        spend: account for the time of the move
+    """
+
+    def __init__(self, game_time: int, z: float = 2.5,
+                 z_extend: float = 1.0, tolerance: float = 0.5,
+                 extension: float = 2.0, min_simulations: int = 20,
+                 cells: int = 25):
+        """
+        :param game_time: time budget of the whole game, in nanoseconds
+        :param z: number of standard errors to settle the best move
+        :param z_extend: number of standard errors to settle the best move
+            after the share of the move runs out
+        :param tolerance: difference of the expected scores which does not
+            matter, in points
+        :param extension: how many times the share of the move can be used
+            when the best move is not settled
+        :param min_simulations: the best move is never settled with less
+            simulations of any candidate
+        :param cells: number of cells of the board
+        """
+        self.game_time = game_time
+        self.z = z
+        self.z_extend = z_extend
+        self.tolerance = tolerance
+        self.extension = extension
+        self.min_simulations = min_simulations
+        self.cells = cells
+        self.remaining = game_time
+
+    def reset(self) -> None:
+        """Start a new game with the full budget."""
+        self.remaining = self.game_time
+
+    def budget(self, candidates: int,
+               exact_cells: int = 0) -> Tuple[int, int]:
+        """
+        Return the share of the game time for the move, and the longest time
+        the move can take if the best move is not settled.
+
+        :param candidates: number of empty cells, i.e. candidates of the move
+        :param exact_cells: moves with at most this many candidates take
+            no time, e.g. they are solved exactly
+        :return: the share and the limit in nanoseconds
+        """
+        smallest = max(2, exact_cells + 1)
+        if candidates < smallest or self.remaining <= 0:
+            return 0, 0
+        planned = self.game_time * candidates \
+            // sum(range(smallest, self.cells + 1))
+        # the share of the remaining time, if the previous moves took longer
+        fair = self.remaining * candidates // sum(range(smallest,
+                                                        candidates + 1))
+        budget = min(planned, fair)
+        return budget, max(budget, min(int(self.extension * budget), fair))
+
+    def settled(self, sums: Sequence[float], squares: Sequence[float],
+                counts: Sequence[int], z: float) -> bool:
+        """
+        Return True if the best candidate is known well enough, from the
+        sums and sums of squares of the scores of the simulations of each
+        candidate.
+
+        :param z: number of standard errors the best candidate must lead by
+        """
+        if len(sums) < 2:
+            return True
+        if min(counts) < max(2, self.min_simulations):
+            return False
+        means = [s / n for s, n in zip(sums, counts)]
+        first, second = sorted(range(len(means)), key=means.__getitem__,
+                               reverse=True)[:2]
+        error = math.sqrt(sum(
+            max(0.0, squares[i] - sums[i] * means[i])
+            / (counts[i] - 1) / counts[i]
+            for i in [first, second]
+        ))
+        gap = means[first] - means[second]
+        return gap > z * error or z * error < self.tolerance
+
+    def spend(self, start: int) -> None:
+        """Account for the time since `start` (perf_counter_ns)."""
+        self.remaining -= perf_counter_ns() - start
@@ -0,0 +1,154 @@
+"""
+Generation of datasets of self-play games for training the players.
+
+The games are split into tasks of `games_per_task` consecutive games, each
+task is played by a worker process and written to its own shards by
+ShardedRecordWriter (see `game.records` for the format). The game `i` is
+played with seed `seed + i` as in `Arena.run`, so the dataset does not
+depend on the number of workers. The workers keep only the buffered records
+in memory, and at most a few tasks are in flight, so the memory use does
+not grow with the size of the dataset. At the end, a JSON manifest with the
+description of all shards is written to the directory.
+
+Usage:
+------
+    python -m mathematico.selfplay DIRECTORY --games N
+        [--player {random,simulation} ...] [--simulations N] [--seed N]
+        [--workers N] [--games-per-task N] [--shard-records N]
+"""
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from time import perf_counter
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence
+
+from .game import Player
+from .game.arena import PlayerFactory, _play_round
+from .game.records import MAGIC, RECORD_SIZE, GameRecord, \
+    ShardedRecordWriter, iter_records
+from .players import RandomPlayer, SimulationPlayer
+
+
+MANIFEST = "manifest.json"
+
+
+def _generate_task(factories: Sequence[PlayerFactory], seed: int,
+                   start: int, stop: int, directory: str, prefix: str,
+                   shard_records: int) -> List[Dict[str, Any]]:
+    """
+    Play the games `start..stop-1` in a worker process and write them to
+    the shards with the prefix, return the descriptions of the shards. The
+    `random` module and the players are seeded before each game (see
+    `Player.seed`), so the games do not depend on the split into tasks.
+    """
+    players: List[Player] = [factory() for factory in factories]
+    with ShardedRecordWriter(directory, prefix, shard_records) as writer:
+        for i in range(start, stop):
+            _, records = _play_round(players, seed + i, i)
+            writer.write_bytes(records)
+    return writer.shards
+
+
+def generate(directory: str, factories: Sequence[PlayerFactory], games: int,
+             seed: int = 0, workers: Optional[int] = None,
+             games_per_task: int = 1000, shard_records: int = 1_000_000,
+             verbose: bool = False) -> Dict[str, Any]:
+    """
+    Play the games and write their records to the shards in the directory.
+
+    :param directory: output directory, created if needed
+    :param factories: picklable callables without arguments, creating the
+        players of each game, e.g. `functools.partial(SimulationPlayer,
+        None, 100)`
+    :param games: number of games
+    :param seed: the game `i` is played with seed `seed + i`
+    :param workers: number of worker processes, by default the number
+        of CPUs
+    :param games_per_task: number of games played by a worker at once
+    :param shard_records: maximum number of records of a shard
+    :param verbose: if True, print the progress
+    :return: the manifest, also written to MANIFEST in the directory
+    """
+    os.makedirs(directory, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    tasks = [(start, min(start + games_per_task, games))
+             for start in range(0, games, games_per_task)]
+    shards: List[Dict[str, Any]] = []
+    pending: Deque["Future[List[Dict[str, Any]]]"] = deque()
+    started = perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        next_task = 0
+        while next_task < len(tasks) or pending:
+            while next_task < len(tasks) and len(pending) < 2 * workers:
+                start, stop = tasks[next_task]
+                pending.append(executor.submit(
+                    _generate_task, list(factories), seed, start, stop,
+                    directory, f"task-{next_task:05d}", shard_records))
+                next_task += 1
+            shards.extend(pending.popleft().result())
+            if verbose:
+                done = next_task - len(pending)
+                print(f"{done}/{len(tasks)} tasks, "
+                      f"{perf_counter() - started:.1f} s", file=sys.stderr)
+
+    manifest = {
+        "format": {"magic": MAGIC.decode("ascii"),
+                   "record_size": RECORD_SIZE},
+        "seed": seed,
+        "games": games,
+        "players": len(factories),
+        "records": sum(shard["records"] for shard in shards),
+        "shards": shards,
+    }
+    with open(os.path.join(directory, MANIFEST), "w") as file:
+        json.dump(manifest, file, indent=2)
+    return manifest
+
+
+def iter_dataset(directory: str) -> Iterator[GameRecord]:
+    """Iterate over the records of all shards listed in the manifest of
+    the dataset, in the order of the games."""
+    with open(os.path.join(directory, MANIFEST)) as file:
+        manifest = json.load(file)
+    for shard in manifest["shards"]:
+        yield from iter_records(os.path.join(directory, shard["path"]))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Generate the dataset from the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m mathematico.selfplay",
+        description="Generate a dataset of self-play games.")
+    parser.add_argument("directory", help="output directory")
+    parser.add_argument("--games", type=int, required=True)
+    parser.add_argument("--player", action="append",
+                        choices=["random", "simulation"],
+                        help="players of each game, simulation by default")
+    parser.add_argument("--simulations", type=int, default=100,
+                        help="simulations per move of the simulation player")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--games-per-task", type=int, default=1000)
+    parser.add_argument("--shard-records", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    factories: List[PlayerFactory] = [
+        RandomPlayer if name == "random"
+        else partial(SimulationPlayer, None, args.simulations)
+        for name in args.player or ["simulation"]
+    ]
+    manifest = generate(args.directory, factories, args.games, args.seed,
+                        args.workers, args.games_per_task,
+                        args.shard_records, verbose=True)
+    print(f"Wrote {manifest['records']} records in "
+          f"{len(manifest['shards'])} shards", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
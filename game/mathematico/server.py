@@ -0,0 +1,372 @@
+"""
+Asyncio runner of the games of Mathematico, which hosts many concurrent
+tables in one process, e.g. for the players connected over the network.
+
+The players of a table are adapted to the async interface by AsyncPlayer
+subclasses: `AdaptedPlayer` runs an ordinary Player inline or in an executor
+(for the bots that would block the event loop), `RemotePlayer` asks the
+client over a stream. All players of a table pick their moves for the card
+concurrently.
+
+Protocol:
+---------
+    The server and the client exchange lines of ASCII text:
+
+    server: MATHEMATICO 1               greeting with the protocol version
+    server: CARD <card>                 the drawn card
+    client: <row> <col>                 the position of the card
+    server: ERROR <reason>              the move was invalid, the card is
+                                        sent again
+    server: SCORE <score> [<score>...]  the final score of the client,
+                                        followed by the scores of the bots
+
+Usage:
+------
+    python -m mathematico.server [--host HOST] [--port PORT] [--stdio]
+        [--opponent {random,simulation} ...] [--simulations N]
+        [--workers N] [--threads]
+"""
+import argparse
+import asyncio
+import random
+import sys
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ProcessPoolExecutor, \
+    ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
+
+from .game import Board, Mathematico, Player
+from .game._mathematico import _move_in_worker
+from .players import RandomPlayer, SimulationPlayer
+
+
+PROTOCOL_VERSION = 1
+PlayerFactory = Callable[[], Player]
+
+
+def placed_cell(before: bytes, board: Board) -> int:
+    """Return the index of the cell filled since `before` was taken."""
+    after = board.cells
+    for cell, value in enumerate(before):
+        if value != after[cell]:
+            return cell
+    raise RuntimeError("No card was placed")
+
+
+class PipeWriter:
+    """
+    Writer of the lines to a pipe, e.g. the standard output, with the part
+    of the interface of StreamWriter used by RemotePlayer. The lines of a
+    game are short, so the writes are not flow-controlled.
+    """
+
+    def __init__(self, transport: asyncio.WriteTransport):
+        self.transport = transport
+
+    def write(self, data: bytes) -> None:
+        self.transport.write(data)
+
+    async def drain(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+Writer = Union[asyncio.StreamWriter, PipeWriter]
+
+
+class AsyncPlayer(ABC):
+    """
+    The interface of the players of the async tables, each player has its
+    own Board with the placed cards.
+    """
+
+    def __init__(self):
+        self.board = Board()
+
+    @abstractmethod
+    async def move(self, card: int) -> None:
+        """Given the next card, places it on the board."""
+
+    def reset(self) -> None:
+        """Resets the player to initial state at the beginning of the game."""
+        self.board = Board()
+
+    async def finish(self, scores: List[int]) -> None:
+        """Called with the final scores of the table, this player first."""
+
+    def get_score(self) -> int:
+        """Return score after the game is finished."""
+        return self.board.score()
+
+
+class AdaptedPlayer(AsyncPlayer):
+    """
+    Ordinary Player in the async table. The moves of the player are played
+    inline if no executor is given, which suits the fast players, otherwise
+    in the executor. With a process pool, the player is sent to a worker for
+    each move and its state is copied back.
+    """
+
+    def __init__(self, player: Player, executor: Optional[Executor] = None):
+        super().__init__()
+        self.player = player
+        self.executor = executor
+        self.board = player.board
+
+    def reset(self) -> None:
+        self.player.reset()
+        self.board = self.player.board
+
+    async def move(self, card: int) -> None:
+        if self.executor is None:
+            self.player.move(card)
+        else:
+            # the same move as in `Mathematico.play` with the executor, with
+            # a process pool the moved copy of the player is returned
+            loop = asyncio.get_running_loop()
+            moved, _ = await loop.run_in_executor(
+                self.executor, _move_in_worker, self.player, card, None)
+            if moved is not self.player:
+                self.player.update_from(moved)
+        self.board = self.player.board
+
+    def get_score(self) -> int:
+        return self.player.get_score()
+
+
+class RemotePlayer(AsyncPlayer):
+    """
+    Player connected by a stream, e.g. a TCP socket, speaking the protocol
+    described in the module docstring. The board is kept by the server.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: Writer):
+        super().__init__()
+        self.reader = reader
+        self.writer = writer
+
+    async def send(self, line: str) -> None:
+        """Send the line to the client."""
+        self.writer.write(line.encode("ascii") + b"\n")
+        await self.writer.drain()
+
+    async def move(self, card: int) -> None:
+        """
+        Ask the client for the position of the card until a valid one is
+        given.
+
+        :raises ConnectionError: if the client disconnects
+        """
+        while True:
+            await self.send(f"CARD {card}")
+            try:
+                line = await self.reader.readline()
+            except ValueError:
+                # longer than the limit of the reader, which drops it
+                await self.send("ERROR line too long")
+                continue
+            if not line:
+                raise ConnectionError("Client disconnected")
+            try:
+                row, col = map(int, line.split())
+                if not (0 <= row < self.board.size
+                        and 0 <= col < self.board.size):
+                    raise ValueError("Position out of the board")
+                self.board.make_move((row, col), card)
+                return
+            except ValueError:
+                await self.send(f"ERROR invalid position {line.strip()!r}")
+
+    async def finish(self, scores: List[int]) -> None:
+        await self.send("SCORE " + " ".join(map(str, scores)))
+
+
+async def play_table(players: Sequence[AsyncPlayer],
+                     seed: Any = None) -> List[int]:
+    """
+    Play one game of Mathematico with the async players, the cards are
+    drawn as by `Mathematico(seed)`. For each card, all players move
+    concurrently and the next card is drawn once all of them have moved.
+
+    :param players: the players of the table, reset before the game
+    :param seed: the seed of the deck
+    :return: list of the final scores of the players
+    """
+    game = Mathematico(seed=seed)
+    for player in players:
+        player.reset()
+    while not game.finished():
+        card = game.next_card()
+        assert card is not None
+        await asyncio.gather(*(player.move(card) for player in players))
+    return [player.get_score() for player in players]
+
+
+class GameServer:
+    """
+    Server of the games for the remote players. Each connection gets its own
+    table with the connected player and the bots created by the factories,
+    all tables are played concurrently in one event loop.
+
+    Attributes
+    ----------
+        tables: number of tables started
+        active: number of tables in progress
+        finished: number of finished tables
+    """
+
+    def __init__(self, opponents: Sequence[PlayerFactory] = (),
+                 executor: Optional[Executor] = None, seed: Any = None):
+        """
+        :param opponents: factories of the bots added to each table
+        :param executor: executor for the moves of the bots, the moves are
+            played inline if None
+        :param seed: if given, the table `i` is played with seed `seed + i`
+        """
+        self.opponents = list(opponents)
+        self.executor = executor
+        self.seed = seed
+        self.tables = 0
+        self.active = 0
+        self.finished = 0
+
+    async def handle(self, reader: asyncio.StreamReader,
+                     writer: Writer) -> None:
+        """Play one game with the client connected by the streams."""
+        index = self.tables
+        self.tables += 1
+        self.active += 1
+        seed = None if self.seed is None else self.seed + index
+        remote = RemotePlayer(reader, writer)
+        players: List[AsyncPlayer] = [remote] + [
+            AdaptedPlayer(factory(), self.executor)
+            for factory in self.opponents
+        ]
+        try:
+            await remote.send(f"MATHEMATICO {PROTOCOL_VERSION}")
+            scores = await play_table(players, seed)
+            await remote.finish(scores)
+            self.finished += 1
+        except ConnectionError:
+            pass
+        finally:
+            self.active -= 1
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0,
+                    backlog: int = 4096) -> asyncio.AbstractServer:
+        """
+        Start listening on the TCP address, port 0 picks a free port. The
+        backlog limits the number of clients connecting at the same time.
+        """
+        return await asyncio.start_server(self.handle, host, port,
+                                          backlog=backlog)
+
+    async def serve_stdio(self) -> None:
+        """Play one game with the client on the standard input and output."""
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        transport, _ = await loop.connect_write_pipe(asyncio.Protocol,
+                                                     sys.stdout)
+        await self.handle(reader, PipeWriter(transport))
+
+
+async def play_remote(player: Player, host: str,
+                      port: int) -> Tuple[int, List[int]]:
+    """
+    Connect to the server and play one game with the player.
+
+    :param player: the player, reset before the game
+    :param host: address of the server
+    :param port: port of the server
+    :return: the score of the player and the scores of the others
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    player.reset()
+    try:
+        greeting = await reader.readline()
+        if greeting.decode("ascii").split() \
+                != ["MATHEMATICO", str(PROTOCOL_VERSION)]:
+            raise ConnectionError(f"Unexpected greeting {greeting!r}")
+        while True:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("Server disconnected")
+            command, *args = line.decode("ascii").split()
+            if command == "CARD":
+                before = bytes(player.board.cells)
+                player.move(int(args[0]))
+                row, col = divmod(placed_cell(before, player.board),
+                                  player.board.size)
+                writer.write(f"{row} {col}\n".encode("ascii"))
+                await writer.drain()
+            elif command == "SCORE":
+                scores = list(map(int, args))
+                return scores[0], scores[1:]
+            else:
+                raise ConnectionError(f"Unexpected line {line!r}")
+    finally:
+        writer.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the server from the command line, return the exit code."""
+    parser = argparse.ArgumentParser(
+        prog="python -m mathematico.server",
+        description="Host games of Mathematico for remote players.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--stdio", action="store_true",
+                        help="play one game on the standard input/output")
+    parser.add_argument("--opponent", action="append", default=[],
+                        choices=["random", "simulation"],
+                        help="add a bot to each table")
+    parser.add_argument("--simulations", type=int, default=1000,
+                        help="simulations per move of the simulation bots")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes for the moves of the simulation "
+                             "bots")
+    parser.add_argument("--threads", action="store_true",
+                        help="move the simulation bots in threads instead "
+                             "of processes")
+    args = parser.parse_args(argv)
+
+    factories: List[PlayerFactory] = []
+    for name in args.opponent:
+        if name == "random":
+            factories.append(RandomPlayer)
+        else:
+            simulations = args.simulations
+            factories.append(lambda: SimulationPlayer(None, simulations))
+    executor: Optional[Executor] = None
+    if "simulation" in args.opponent:
+        # the simulations are CPU-bound, the threads share the GIL
+        executor = ThreadPoolExecutor(max_workers=args.workers) \
+            if args.threads else ProcessPoolExecutor(max_workers=args.workers)
+    server = GameServer(factories, executor, seed=random.getrandbits(32))
+
+    async def serve() -> None:
+        if args.stdio:
+            await server.serve_stdio()
+            return
+        tcp = await server.start(args.host, args.port)
+        print(f"Serving on {args.host}:{args.port}", file=sys.stderr)
+        async with tcp:
+            await tcp.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
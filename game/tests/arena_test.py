@@ -0,0 +1,90 @@
+import random
+from functools import partial
+
+from mathematico import Arena, RandomPlayer, SimulationPlayer
+
+from .players import FirstEmptyPlayer
+
+
+def test_run_serial():
+    """Results are recorded per player and per round."""
+    arena = Arena()
+    arena.add_player(FirstEmptyPlayer())
+    arena.add_player(FirstEmptyPlayer(reverse=True))
+    results = arena.run(rounds=5, verbose=False, seed=0)
+    assert len(results) == 2
+    assert all(len(r) == 5 for r in results)
+    first = [list(r) for r in results]
+
+    # same seed plays the same decks, results are appended
+    arena.run(rounds=5, verbose=False, seed=0)
+    assert [r[5:] for r in arena.results] == first
+
+
+def test_run_parallel_matches_serial():
+    """Parallel run plays the same decks as the serial one."""
+    serial = Arena()
+    serial.add_player(FirstEmptyPlayer())
+    serial.add_player(FirstEmptyPlayer(reverse=True))
+    expected = serial.run(rounds=23, verbose=False, seed=7)
+
+    parallel = Arena()
+    parallel.add_player(FirstEmptyPlayer())
+    parallel.add_player(FirstEmptyPlayer(),
+                        factory=partial(FirstEmptyPlayer, reverse=True))
+    assert parallel.run(rounds=23, verbose=False, seed=7, workers=3) \
+        == expected
+
+
+def test_random_players_parallel_matches_serial():
+    """The players are seeded by the round, not by the previous rounds."""
+    serial = Arena()
+    serial.add_player(RandomPlayer())
+    serial.add_player(SimulationPlayer(None, 3))
+    expected = list(serial.iter_rounds(rounds=12, seed=5))
+    assert list(serial.iter_rounds(rounds=12, seed=5)) == expected
+
+    for workers in [2, 3]:
+        parallel = Arena()
+        parallel.add_player(RandomPlayer(), RandomPlayer)
+        parallel.add_player(SimulationPlayer(None, 3),
+                            partial(SimulationPlayer, None, 3))
+        assert list(parallel.iter_rounds(rounds=12, seed=5,
+                                         workers=workers)) == expected
+
+
+def test_iter_rounds():
+    """Streamed rounds are the same as the stored ones."""
+    arena = Arena()
+    arena.add_player(FirstEmptyPlayer())
+    arena.add_player(FirstEmptyPlayer(reverse=True))
+    expected = list(zip(*arena.run(rounds=10, verbose=False, seed=3)))
+    assert list(arena.iter_rounds(rounds=10, seed=3)) == expected
+    assert list(arena.iter_rounds(rounds=10, seed=3, workers=2)) == expected
+
+    # unlimited number of rounds
+    rounds = arena.iter_rounds(seed=3, workers=2)
+    assert [next(rounds) for _ in range(10)] == expected
+    rounds.close()
+
+
+def test_iter_rounds_default_seed():
+    """Without a seed, the rounds are played from a random one."""
+    arena = Arena()
+    arena.add_player(RandomPlayer())
+    for workers in [None, 2]:
+        rounds = arena.iter_rounds(workers=workers)
+        assert len([next(rounds) for _ in range(3)]) == 3
+        rounds.close()
+    assert len(arena.run(rounds=2, verbose=False)[0]) == 2
+
+
+def test_run_keeps_random_state():
+    """Seeding the rounds does not change the caller's random module."""
+    arena = Arena()
+    arena.add_player(RandomPlayer())
+    random.seed(1)
+    expected = random.random()
+    random.seed(1)
+    arena.run(rounds=3, verbose=False, seed=0)
+    assert random.random() == expected
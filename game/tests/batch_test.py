@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from mathematico.game import Board
+
+np = pytest.importorskip("numpy")
+from mathematico.game.batch import BoardBatch, score_cells  # noqa: E402
+
+from .players import random_board  # noqa: E402
+
+
+def random_boards(n: int, seed: int, fill: int = 25):
+    """Create `n` boards with `fill` random cards from the deck."""
+    return [random_board(fill, seed * n + i) for i in range(n)]
+
+
+def test_scores_match_board():
+    """Batch scores are the same as the scores of the individual boards."""
+    for fill in [0, 5, 17, 25]:
+        boards = random_boards(200, seed=fill, fill=fill)
+        batch = BoardBatch.from_boards(boards)
+        expected = [board.score() for board in boards]
+        assert batch.scores().tolist() == expected
+
+
+def test_make_unmake_moves():
+    """Moves played on the batch agree with moves played on boards."""
+    boards = random_boards(100, seed=1, fill=20)
+    batch = BoardBatch.from_boards(boards)
+    rng = random.Random(2)
+    positions, cards = [], []
+    for board in boards:
+        row, col = rng.choice(list(board.possible_moves()))
+        card = rng.randint(1, 13)
+        board.make_move((row, col), card)
+        positions.append(row * board.size + col)
+        cards.append(card)
+
+    batch.make_moves(np.array(positions), np.array(cards))
+    assert batch.scores().tolist() == [board.score() for board in boards]
+    assert batch.empty_mask().sum(axis=1).tolist() == [4] * len(boards)
+    for i, board in enumerate(boards):
+        assert batch.board(i).grid == board.grid
+
+    removed = batch.unmake_moves(np.array(positions))
+    assert removed.tolist() == cards
+    assert np.array_equal(batch.counts, BoardBatch.from_boards(
+        [batch.board(i) for i in range(len(batch))]).counts)
+
+    with pytest.raises(ValueError):
+        batch.unmake_moves(np.array(positions))
+
+
+def test_masked_moves():
+    """Only the selected boards are modified."""
+    batch = BoardBatch(3)
+    where = np.array([True, False, True])
+    batch.make_moves(np.array([0, 0, 12]), np.array([5, 5, 7]), where=where)
+    assert batch.cells[:, 0].tolist() == [5, 0, 0]
+    assert batch.cells[:, 12].tolist() == [0, 0, 7]
+    with pytest.raises(ValueError):
+        batch.make_moves(np.array([0, 0, 0]), np.array([1, 1, 1]))
+
+
+def test_score_cells():
+    """Scoring the grids directly agrees with the batch."""
+    boards = random_boards(100, seed=3)
+    batch = BoardBatch.from_boards(boards)
+    assert np.array_equal(score_cells(batch.cells), batch.scores())
+
+
+def test_scores_impossible_lines():
+    """Lines which cannot occur in a game are scored as by Board.score."""
+    board = Board()
+    for col in range(5):
+        board.make_move((0, col), 1)  # five ones in a row
+    for idx in range(1, 5):
+        board.make_move((idx, idx), 1)  # and on the diagonal
+    board.make_move((4, 0), 13)
+    batch = BoardBatch.from_boards([board])
+    assert batch.scores().tolist() == [board.score()]
+    assert score_cells(batch.cells).tolist() == [board.score()]
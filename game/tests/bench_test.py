@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+from mathematico.bench import BENCHMARKS, compare, main, run_benchmarks
+
+
+def test_run_benchmarks():
+    """All benchmarks report positive rates."""
+    results = run_benchmarks(min_time=0.01)
+    assert set(results["benchmarks"]) == set(BENCHMARKS)
+    assert all(rate > 0 for rate in results["benchmarks"].values())
+
+    with pytest.raises(ValueError):
+        run_benchmarks(["unknown"])
+
+
+def test_compare():
+    """Only slowdowns larger than the threshold are regressions."""
+    baseline = {"benchmarks": {"a": 100.0, "b": 100.0, "c": 100.0}}
+    results = {"benchmarks": {"a": 95.0, "b": 50.0, "d": 1.0}}
+    assert compare(results, baseline, threshold=0.1) == {"b": 0.5}
+
+
+def test_main_baseline(tmp_path, capsys):
+    """Exit code signals regressions against the baseline."""
+    baseline = tmp_path / "baseline.json"
+    output = tmp_path / "results.json"
+    args = ["--time", "0.01", "--only", "score", "--output", str(output)]
+    assert main(args) == 0
+    assert json.loads(output.read_text())["benchmarks"]["score"] > 0
+
+    baseline.write_text(json.dumps({"benchmarks": {"score": 1e20}}))
+    assert main(args + ["--baseline", str(baseline)]) == 1
+    assert "Regression in score" in capsys.readouterr().err
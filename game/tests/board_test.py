@@ -1,7 +1,27 @@
+import pickle
+import random
+from collections import Counter
+
 import pytest
 
 from mathematico.game import Board
 from mathematico.game.board import EMPTY_CELL
+from mathematico.game.eval import evaluate_line_reference, DIAGONAL_BONUS
+
+from .players import random_board
+
+
+def reference_score(board: Board) -> int:
+    """Score the board from its grid using the rules directly."""
+    total = 0
+    for i in range(board.size):
+        total += evaluate_line_reference(Counter(board.row(i)))
+        total += evaluate_line_reference(Counter(board.col(i)))
+    for main in [True, False]:
+        diag_score = evaluate_line_reference(Counter(board.diag(main)))
+        if diag_score:
+            total += DIAGONAL_BONUS + diag_score
+    return total
 
 
 def test_empty_board():
@@ -135,7 +155,20 @@ def test_make_move():
 
 
 def test_unmake_move():
-    pass
+    """Unmaking moves restores the previous state of the board."""
+    board = Board()
+    board.make_move((2, 2), 7)
+    lines = list(board.lines)
+    board.make_move((0, 0), 7)
+    board.make_move((2, 4), 3)
+    assert board.unmake_move((2, 4)) == 3
+    assert board.unmake_move((0, 0)) == 7
+    board.integrity_check()
+    assert list(board.lines) == lines
+    assert board.occupied_cells == 1
+
+    with pytest.raises(ValueError):
+        board.unmake_move((0, 0))
 
 
 def test_possible_moves():
@@ -145,3 +178,129 @@ def test_possible_moves():
         board.make_move(move, 1)
     expected_moves = [(4, 0), (4, 1), (4, 2), (4, 3), (4, 4)]
     assert list(board.possible_moves()) == expected_moves
+
+
+def test_random_games():
+    """Score and line counts stay consistent with the grid during play."""
+    rng = random.Random(42)
+    for seed in range(50):
+        board = random_board(25, seed)
+        board.integrity_check()
+        moves = [(row, col) for row in range(5) for col in range(5)]
+        rng.shuffle(moves)
+        cards = [board.unmake_move(move) for move in moves]
+        for move, card in zip(moves[::-1], cards[::-1]):
+            board.make_move(move, card)
+            assert board.score() == reference_score(board)
+            assert sum(board.line_scores) == board.score()
+        board.integrity_check()
+        for move in moves[:10]:
+            board.unmake_move(move)
+        board.integrity_check()
+        assert board.score() == reference_score(board)
+
+
+def test_grid():
+    """The grid can be read and replaced as 2D list."""
+    board = Board()
+    board.make_move((1, 3), 9)
+    grid = board.grid
+    assert grid[1][3] == 9
+    grid[0][0] = 5
+    assert board.is_empty(0, 0)
+
+    other = Board()
+    other.grid = grid
+    other.integrity_check()
+    assert other.grid == grid
+    assert other.occupied_cells == 2
+
+
+def test_empty_cells():
+    """The index of empty cells follows the moves in any order."""
+    rng = random.Random(1)
+    board = Board()
+    assert board.empty_count == 25
+    assert sorted(board.empty_cells) == list(range(25))
+
+    moves = list(board.possible_moves())
+    rng.shuffle(moves)
+    for move in moves[:20]:
+        board.make_move(move, rng.randint(1, 13))
+    rng.shuffle(moves)
+    for move in moves:
+        if not board.is_empty(*move) and rng.random() < 0.5:
+            board.unmake_move(move)
+        board.integrity_check()
+    assert board.empty_count == 25 - board.occupied_cells
+    assert sorted(board.empty_cells) == sorted(
+        row * 5 + col for row, col in board.possible_moves())
+
+    picked = Counter(board.random_empty_cell(rng) for _ in range(1000))
+    assert set(picked) == set(board.possible_moves())
+
+    for move in list(board.possible_moves()):
+        board.make_move(move, 1)
+    with pytest.raises(IndexError):
+        board.random_empty_cell()
+
+    # the indices of large boards do not fit into a byte
+    large = Board(17)
+    large.make_move((16, 16), 3)
+    large.integrity_check()
+    assert large.empty_count == 17 * 17 - 1
+    assert max(large.empty_cells) == 17 * 17 - 2
+
+
+def test_score_with():
+    """Score after a move is computed without playing it."""
+    rng = random.Random(2)
+    board = Board()
+    for move in list(board.possible_moves())[:15]:
+        board.make_move(move, rng.randint(1, 13))
+    for move in list(board.possible_moves()):
+        for card in range(1, 14):
+            expected = board.score_with(move, card)
+            board.make_move(move, card)
+            assert board.score() == expected
+            board.unmake_move(move)
+
+
+def test_packing():
+    """Packed boards are restored with the lines, scores and hash."""
+    for cells in [0, 1, 12, 25]:
+        board = random_board(cells, seed=5 + cells)
+        data = board.to_bytes()
+        assert len(data) == 13
+        for restored in [Board.from_bytes(data),
+                         Board.from_int(board.to_int()),
+                         pickle.loads(pickle.dumps(board))]:
+            restored.integrity_check()
+            assert restored == board and hash(restored) == hash(board)
+            assert restored.grid == board.grid
+            assert restored.score() == board.score()
+            assert restored.zobrist == board.zobrist
+        assert len(pickle.dumps(board)) < 100
+
+    board = Board()
+    board.make_move((0, 1), 13)
+    assert board.to_int() == 13 << 4
+    assert board != Board() and board != board.grid
+    assert len({board, Board.from_int(13 << 4), Board()}) == 2
+    small = Board(3)
+    small.make_move((2, 2), 7)
+    assert pickle.loads(pickle.dumps(small)) == small
+    # boards are not limited by the counts of the cards in the deck
+    ones = Board()
+    for i in range(5):
+        ones.make_move((i, i), 1)
+    restored = pickle.loads(pickle.dumps(ones))
+    restored.integrity_check()
+    assert restored == ones and restored.score() == ones.score()
+
+    with pytest.raises(ValueError):
+        Board.from_int(14)  # not a card
+    with pytest.raises(ValueError):
+        Board.from_int(1 << 100)
+    with pytest.raises(ValueError):
+        Board.from_bytes(bytes(12))
@@ -0,0 +1,68 @@
+import csv
+import json
+import subprocess
+import sys
+
+import pytest
+
+from mathematico import RandomPlayer, SimulationPlayer
+from mathematico.cli import main, parse_player_spec, player_factory
+
+
+def test_parse_player_spec():
+    assert parse_player_spec("random") == ("random", {})
+    assert parse_player_spec("simulation:maxtime=1e8,batch_size=10,"
+                             "max_simulations=none,allocation=ucb") \
+        == ("simulation", {"maxtime": 10**8, "batch_size": 10,
+                           "max_simulations": None, "allocation": "ucb"})
+    for spec in ["unknown", "simulation:maxtime", "simulation:1=2"]:
+        with pytest.raises(ValueError):
+            parse_player_spec(spec)
+
+
+def test_player_factory():
+    player = player_factory("simulation:max_simulations=5,"
+                            "allocation=halving")()
+    assert isinstance(player, SimulationPlayer)
+    assert player.max_simulations == 5 and player.allocation == "halving"
+    assert isinstance(player_factory("random")(), RandomPlayer)
+    with pytest.raises(ValueError):
+        player_factory("simulation")
+    with pytest.raises(ValueError):
+        player_factory("random:unknown=1")
+
+
+def test_arena_json(tmp_path):
+    output = tmp_path / "summary.json"
+    assert main(["arena", "random", "simulation:max_simulations=5",
+                 "--rounds", "10", "--seed", "3",
+                 "--output", str(output)]) == 0
+    summary = json.loads(output.read_text())
+    assert summary["rounds"] == 10 and summary["seed"] == 3
+    random_stats, simulation_stats = summary["players"]
+    assert random_stats["player"] == "random"
+    assert random_stats["count"] == simulation_stats["count"] == 10
+
+
+def test_arena_csv(capsys):
+    assert main(["arena", "random", "--rounds", "5", "--seed", "0",
+                 "--format", "csv"]) == 0
+    rows = list(csv.DictReader(capsys.readouterr().out.splitlines()))
+    assert len(rows) == 1
+    assert rows[0]["player"] == "random" and rows[0]["count"] == "5"
+
+
+def test_subcommands(capsys):
+    assert main(["bench", "--time", "0.01", "--only", "score"]) == 0
+    assert "score" in json.loads(capsys.readouterr().out)["benchmarks"]
+    assert main([]) == 2
+
+
+def test_lazy_import():
+    """Importing the package does not import the players."""
+    code = ("import sys, mathematico; "
+            "assert 'mathematico.players' not in sys.modules; "
+            "assert mathematico.RandomPlayer.__name__ == 'RandomPlayer'; "
+            "assert 'mathematico.players._random_simulations' "
+            "not in sys.modules")
+    subprocess.run([sys.executable, "-c", code], check=True)
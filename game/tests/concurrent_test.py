@@ -0,0 +1,84 @@
+import random
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from mathematico import Mathematico, SimulationPlayer
+from mathematico.game import SearchStats, TranspositionTable, Timings
+
+from .players import FirstEmptyPlayer
+
+
+def play(players, executor, seed=0, **kwargs):
+    game = Mathematico(seed=seed, record=True)
+    for player in players:
+        player.reset()
+        game.add_player(player)
+    return game.play(executor=executor, **kwargs), game
+
+
+def test_thread_pool_matches_serial():
+    """Deterministic players play the same game in the thread pool."""
+    players = [FirstEmptyPlayer(), FirstEmptyPlayer(reverse=True)]
+    expected = Mathematico(seed=1)
+    for player in players:
+        expected.add_player(player)
+    scores = expected.play()
+
+    timings = Timings()
+    with ThreadPoolExecutor(2) as executor:
+        result, game = play(players, executor, seed=1, timings=timings)
+    assert result == scores
+    assert game.placements[0] == list(range(25))
+    assert game.placements[1] == list(range(24, -1, -1))
+    assert [h.count for h in timings.moves] == [25, 25]
+
+
+def test_process_pool_is_deterministic():
+    """Players moved in processes keep their state, the results do not
+    depend on the number of workers."""
+    random.seed(0)
+    table = TranspositionTable()
+    players = [SimulationPlayer(None, 20, transpositions=table),
+               SimulationPlayer(None, 20)]
+    results = []
+    for workers in [1, 2]:
+        with ProcessPoolExecutor(workers) as executor:
+            scores, game = play(players, executor, seed=2)
+        results.append((scores, game.placements))
+        for player, score in zip(players, scores):
+            player.board.integrity_check()
+            assert player.board.score() == score
+            assert len(player.deck) == 52 - 25
+    assert results[0] == results[1]
+    assert players[0].transpositions is table
+
+
+def test_process_pool_fills_transpositions():
+    """Estimates of the moves played in processes are merged into the
+    transposition table."""
+    table = TranspositionTable()
+    player = SimulationPlayer(None, 20, transpositions=table)
+    with ProcessPoolExecutor(2) as executor:
+        play([player], executor, seed=3)
+    assert player.transpositions is table
+    assert len(table) > 0 and table.misses > 0
+    first = dict(table._table)
+
+    with ProcessPoolExecutor(2) as executor:
+        play([player], executor, seed=3)
+    # the same game again, the estimates are added to the same positions
+    assert table._table == {key: (2 * total, 2 * count)
+                            for key, (total, count) in first.items()}
+
+
+def test_process_pool_merges_stats():
+    """Counters of the moves played in processes are merged into the stats
+    of the player, the copies do not start nested pools."""
+    stats = SearchStats()
+    player = SimulationPlayer(None, 20, workers=2)
+    player.stats = stats
+    with ProcessPoolExecutor(2) as executor:
+        play([player], executor, seed=4)
+    assert player.stats is stats
+    # the last move has a single option, and is not searched
+    assert stats.moves == 24 and stats.simulations >= 24 * 20
+    assert player.workers == 2 and player._pool is None
@@ -0,0 +1,70 @@
+import random
+from collections import Counter
+
+import pytest
+
+from mathematico import Mathematico, RandomPlayer
+from mathematico.game import Deck
+
+
+def test_full_deck():
+    deck = Deck()
+    assert len(deck) == 52
+    assert deck.cards() == [i for i in range(1, 14) for _ in range(4)]
+    assert 13 in deck and 0 not in deck and 14 not in deck
+
+
+def test_remove_add():
+    deck = Deck()
+    for _ in range(4):
+        deck.remove(7)
+    assert 7 not in deck
+    assert len(deck) == 48
+    with pytest.raises(ValueError):
+        deck.remove(7)
+    deck.add(7)
+    assert deck.counts[6] == 1
+    with pytest.raises(ValueError):
+        Deck([1, 2, 3])
+
+
+def test_draw_all():
+    rng = random.Random(0)
+    deck = Deck()
+    drawn = [deck.draw(rng) for _ in range(52)]
+    assert sorted(drawn) == Deck().cards()
+    assert len(deck) == 0
+    with pytest.raises(IndexError):
+        deck.draw(rng)
+    with pytest.raises(IndexError):
+        deck.sample(rng)
+
+
+def test_sample_weights():
+    rng = random.Random(1)
+    deck = Deck([0] * 12 + [1])
+    assert deck.sample(rng) == 13
+    deck = Deck([3, 1] + [0] * 11)
+    counts = Counter(deck.sample(rng) for _ in range(4000))
+    assert set(counts) == {1, 2}
+    assert 2700 < counts[1] < 3300
+    assert len(deck) == 4
+
+
+def test_snapshot():
+    deck = Deck()
+    snapshot = deck.snapshot()
+    other = deck.copy()
+    deck.remove(1)
+    assert snapshot[0] == 4 and deck.counts[0] == 3
+    assert other == Deck() != deck
+
+
+def test_game_deck():
+    game = Mathematico(seed=0)
+    game.add_player(RandomPlayer())
+    assert game.deck == Deck().snapshot()
+    card = game.next_card()
+    assert card is not None
+    assert game.deck[card - 1] == 3
+    assert sum(game.deck) == 51
@@ -0,0 +1,90 @@
+import random
+from typing import List
+
+import pytest
+
+from mathematico import Mathematico, SimulationPlayer
+from mathematico.game import Board, Deck
+from mathematico.players._endgame import EndgameSolver
+
+from .players import random_board
+
+
+def endgame(empty: int, seed: int):
+    """Return random board with `empty` cells, the drawn card and the
+    counts of the remaining cards."""
+    board = random_board(25 - empty, seed)
+    deck = Deck()
+    for card in board.cells:
+        if card:
+            deck.remove(card)
+    card = deck.draw(random.Random(seed))
+    return board, card, deck.counts
+
+
+def expectimax(board: Board, counts: List[int]) -> float:
+    """Reference expectimax without memoization."""
+    moves = list(board.possible_moves())
+    if not moves:
+        return board.score()
+    value = 0.0
+    for rank, count in enumerate(counts, 1):
+        if not count:
+            continue
+        counts[rank - 1] -= 1
+        results = []
+        for move in moves:
+            board.make_move(move, rank)
+            results.append(expectimax(board, counts))
+            board.unmake_move(move)
+        counts[rank - 1] += 1
+        value += count * max(results)
+    return value / sum(counts)
+
+
+@pytest.mark.parametrize("empty", [1, 2, 3])
+def test_move_values(empty):
+    for seed in range(3):
+        board, card, counts = endgame(empty, seed)
+        cells = bytes(board.cells)
+        values = EndgameSolver().move_values(board, card, counts)
+        assert bytes(board.cells) == cells
+        assert set(values) == set(board.possible_moves())
+        for move, value in values.items():
+            board.make_move(move, card)
+            assert value == pytest.approx(expectimax(board, counts))
+            board.unmake_move(move)
+
+
+def test_last_card():
+    board, card, counts = endgame(1, 0)
+    move, value = EndgameSolver().best_move(board, card, counts)
+    board.make_move(move, card)
+    assert value == board.score()
+
+
+def test_not_enough_cards():
+    board, _, _ = endgame(3, 0)
+    with pytest.raises(ValueError):
+        EndgameSolver().expected_value(board, [1] + [0] * 12)
+
+
+def test_memo():
+    board, card, counts = endgame(4, 1)
+    solver = EndgameSolver()
+    first = solver.move_values(board, card, counts)
+    assert len(solver) > 0
+    assert solver.move_values(board, card, counts) == first
+
+    small = EndgameSolver(maxsize=10)
+    assert small.move_values(board, card, counts) == pytest.approx(first)
+    assert len(small) <= 10
+
+
+def test_player_with_endgame():
+    random.seed(0)
+    player = SimulationPlayer(None, 100, endgame_cells=3)
+    game = Mathematico(seed=4)
+    game.add_player(player)
+    assert game.play() == [player.board.score()]
+    player.board.integrity_check()
@@ -1,9 +1,12 @@
+import random
+from collections import Counter
 from typing import List
 
 from mathematico.game import Board
 from mathematico.game.eval import FLUSH, FULL_HOUSE, FLUSH_1_10_11_12_13, \
     TWO_PAIRS, FOUR_ONES, THREE_OF_A_KIND, PAIR, DIAGONAL_BONUS, \
-    FULL_HOUSE_1_13, FOUR_OF_A_KIND
+    FULL_HOUSE_1_13, FOUR_OF_A_KIND, LINE_SCORES, evaluate_line, \
+    evaluate_line_reference, key_to_rle, line_key
 
 
 def eval_list(array: List[List[int]]) -> int:
@@ -151,3 +154,24 @@ def test_evaluate_all_combinations():
         [9, 3, 5, 6, 11]
     ]
     assert eval_list(board) == FLUSH_1_10_11_12_13
+
+
+def test_line_table_matches_reference():
+    """Every entry of the lookup table agrees with the rules."""
+    for key, score in LINE_SCORES.items():
+        line_rle = key_to_rle(key)
+        assert line_key(line_rle) == key
+        assert evaluate_line_reference(line_rle) == score
+
+
+def test_evaluate_line_random_lines():
+    """Table lookup and the rules agree on random lines from the deck."""
+    rng = random.Random(0)
+    deck = [i for i in range(1, 14) for _ in range(4)]
+    for _ in range(1000):
+        line = rng.sample(deck, rng.randint(0, 5))
+        line_rle = dict(Counter(line))
+        line_rle.setdefault(rng.randint(1, 13), 0)  # zero counts are ignored
+        original = dict(line_rle)
+        assert evaluate_line(line_rle) == evaluate_line_reference(line_rle)
+        assert line_rle == original
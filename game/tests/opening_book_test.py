@@ -0,0 +1,100 @@
+import random
+
+import pytest
+
+from mathematico import Mathematico, SimulationPlayer
+from mathematico.game import Board, SearchStats, canonical_form
+from mathematico.game.symmetry import symmetries, transform
+from mathematico.players._opening_book import MAGIC, OpeningBook, \
+    _ENTRY, _HEADER, build_book, opening_positions
+
+
+def test_opening_positions():
+    positions = opening_positions(2)
+    assert positions[0] == bytes(25)
+    # 4 classes of cells times 13 cards
+    assert len(positions) == 1 + 4 * 13
+
+
+def test_build_and_lookup(tmp_path):
+    path = str(tmp_path / "book.bin")
+    random.seed(0)
+    assert build_book(path, depth=1, simulations=50) == 13
+    with OpeningBook(path) as book:
+        assert len(book) == 13 and book.depth == 1
+        for card in range(1, 14):
+            found = book.lookup(Board(), card)
+            assert found is not None
+            (row, col), value = found
+            assert 0 <= row < 5 and 0 <= col < 5 and value > 0
+        board = Board()
+        board.make_move((0, 0), 1)
+        assert book.lookup(board, 2) is None
+
+
+def test_lookup_symmetric_boards(tmp_path):
+    board = Board()
+    board.make_move((0, 1), 7)
+    board.make_move((3, 3), 2)
+    form = canonical_form(board.cells)
+    cell = form.index(0)
+    path = tmp_path / "book.bin"
+    path.write_bytes(_HEADER.pack(MAGIC, 3)
+                     + _ENTRY.pack(form, 9, cell, 123.0))
+
+    expected = bytearray(form)
+    expected[cell] = 9
+    with OpeningBook(str(path)) as book:
+        for sym in symmetries():
+            other = Board()
+            other.grid = [list(transform(board.cells, sym)[i:i + 5])
+                          for i in range(0, 25, 5)]
+            found = book.lookup(other, 9)
+            assert found is not None
+            position, value = found
+            assert value == 123.0
+            other.make_move(position, 9)
+            assert canonical_form(other.cells) == canonical_form(expected)
+
+
+def test_invalid_book(tmp_path):
+    path = tmp_path / "book.bin"
+    path.write_bytes(b"not a book")
+    with pytest.raises(ValueError):
+        OpeningBook(str(path))
+    # a bad book fails when the player is created, not at the first move
+    with pytest.raises(ValueError):
+        SimulationPlayer(None, 20, opening_book=str(path))
+    with pytest.raises(FileNotFoundError):
+        SimulationPlayer(None, 20, opening_book=str(tmp_path / "missing"))
+
+
+def test_player_with_book(tmp_path):
+    path = str(tmp_path / "book.bin")
+    random.seed(0)
+    build_book(path, depth=1, simulations=20)
+    for book, searched in [(None, 24), (path, 23)]:
+        player = SimulationPlayer(None, 20, opening_book=book)
+        player.stats = SearchStats()
+        game = Mathematico(seed=0)
+        game.add_player(player)
+        game.play()
+        player.close()
+        assert player.stats.moves == searched
+
+
+def test_book_lookup_past_depth(tmp_path, monkeypatch):
+    """Boards with more cards than the book holds are not looked up."""
+    path = str(tmp_path / "book.bin")
+    random.seed(0)
+    build_book(path, depth=1, simulations=20)
+    player = SimulationPlayer(None, 20, opening_book=path)
+    player.move(1)
+
+    def fail(*args):
+        raise AssertionError("looked up past the depth")
+
+    monkeypatch.setattr(
+        "mathematico.players._opening_book.canonical_symmetry", fail)
+    player.move(2)
+    player.close()
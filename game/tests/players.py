@@ -0,0 +1,33 @@
+"""Players and boards shared by the tests."""
+import random
+
+from mathematico import Player
+from mathematico.game import Board
+
+
+def random_board(cells: int, seed: int) -> Board:
+    """Return board with `cells` random cards from the deck."""
+    rng = random.Random(seed)
+    deck = [i for i in range(1, 14) for _ in range(4)]
+    rng.shuffle(deck)
+    board = Board()
+    moves = list(board.possible_moves())
+    rng.shuffle(moves)
+    for move, card in zip(moves[:cells], deck):
+        board.make_move(move, card)
+    return board
+
+
+class FirstEmptyPlayer(Player):
+    """Deterministic player, plays on the first empty cell."""
+
+    def __init__(self, reverse: bool = False):
+        super().__init__()
+        self.reverse = reverse
+
+    def reset(self) -> None:
+        self.board = Board()
+
+    def move(self, card_number: int) -> None:
+        moves = list(self.board.possible_moves())
+        self.board.make_move(moves[-1 if self.reverse else 0], card_number)
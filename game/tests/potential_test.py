@@ -0,0 +1,114 @@
+import random
+
+import pytest
+
+from mathematico import Arena, HeuristicPlayer, Mathematico, RandomPlayer
+from mathematico.game import Board, Deck
+from mathematico.game.board import _DIAGONAL_SCORES
+from mathematico.game.eval import LINE_SCORES, line_key
+from mathematico.game.potential import _prior_table, board_potential, \
+    line_cards, line_potential
+
+
+def brute_force(cards, counts, diagonal=False):
+    """Mean score of the line over all ordered draws of the empty cells."""
+    scores = _DIAGONAL_SCORES if diagonal else LINE_SCORES
+    deck = [rank for rank, n in enumerate(counts, 1) for _ in range(n)]
+    empty = 5 - len(cards)
+    total = count = 0
+    if empty == 0:
+        return scores[line_key({c: cards.count(c) for c in cards})]
+    if empty == 1:
+        draws = [[a] for a in deck]
+    else:
+        draws = [[deck[i], deck[j]] for i in range(len(deck))
+                 for j in range(len(deck)) if i != j]
+    for drawn in draws:
+        line = cards + drawn
+        total += scores[line_key({c: line.count(c) for c in line})]
+        count += 1
+    return total / count
+
+
+def test_line_cards():
+    assert line_cards(0) == 0
+    assert line_cards(line_key({1: 4, 13: 1})) == 5
+    assert line_cards(line_key({2: 1, 7: 2})) == 3
+
+
+@pytest.mark.parametrize("diagonal", [False, True])
+def test_exact_potential(diagonal):
+    """The exact potentials match the enumeration of the draws."""
+    rng = random.Random(3)
+    for _ in range(20):
+        cards = rng.sample([r for r in range(1, 14) for _ in range(4)],
+                           rng.choice([3, 4, 5]))
+        counts = [4 - cards.count(r) for r in range(1, 14)]
+        for rank in rng.sample(range(13), 4):
+            counts[rank] = rng.randint(0, counts[rank])
+        key = line_key({c: cards.count(c) for c in cards})
+        assert line_potential(key, counts, diagonal) \
+            == pytest.approx(brute_force(cards, counts, diagonal))
+
+
+def test_prior_potential():
+    """The static table is exact for the full deck without the line."""
+    for cards in [[], [1, 1], [5, 6, 7], [13, 13, 1]]:
+        key = line_key({c: cards.count(c) for c in cards})
+        counts = [4 - cards.count(r) for r in range(1, 14)]
+        assert line_potential(key, counts, exact_cells=0) == pytest.approx(
+            line_potential(key, counts, exact_cells=5 - len(cards))
+            if len(cards) >= 3 else line_potential(key, counts))
+    # four ones are worth more than two pairs, which beat no pair
+    lines = [[1, 1, 1, 1], [2, 2, 3, 3], [2, 3, 9, 11]]
+    values = [
+        line_potential(line_key({c: cards.count(c) for c in cards}),
+                       [4 - cards.count(r) for r in range(1, 14)])
+        for cards in lines
+    ]
+    assert values == sorted(values, reverse=True)
+
+
+def test_board_potential():
+    """The potential of a full board is its score."""
+    game = Mathematico(seed=0)
+    player = HeuristicPlayer()
+    game.add_player(player)
+    game.play(verbose=False)
+    assert board_potential(player.board, player.deck.counts) \
+        == pytest.approx(player.board.score())
+    assert board_potential(Board(), Deck().counts) \
+        == pytest.approx(10 * line_potential(0, [4] * 13)
+                         + 2 * line_potential(0, [4] * 13, diagonal=True))
+    with pytest.raises(ValueError):
+        board_potential(Board(4), Deck().counts)
+
+
+def test_heuristic_player():
+    """The heuristic player beats the random one by a wide margin."""
+    arena = Arena()
+    arena.add_player(HeuristicPlayer())
+    arena.add_player(RandomPlayer())
+    heuristic, randomly = arena.run(rounds=20, seed=0, verbose=False)
+    assert sum(heuristic) > sum(randomly) + 20 * 100
+
+    player = HeuristicPlayer()
+    player.move(5)
+    values = player.move_values(5)
+    assert len(values) == 24
+    player.board.integrity_check()
+
+    # the row has 3 empty cells before the move and 2 after it, both are
+    # valued by the table, as is the empty column
+    player = HeuristicPlayer(exact_cells=2)
+    for position, card in [((0, 0), 1), ((0, 1), 2)]:
+        player.deck.remove(card)
+        player.board.make_move(position, card)
+    for card in [3, 4, 4, 4, 4]:
+        player.deck.remove(card)
+    row, col = player.board.lines_of((0, 2))
+    table = _prior_table(False)
+    card = line_key({3: 1})
+    expected = sum(table[player.board.lines[line] + card]
+                   - table[player.board.lines[line]] for line in [row, col])
+    assert player.move_values(3)[0, 2] == pytest.approx(expected)
@@ -0,0 +1,116 @@
+import os
+
+import pytest
+
+from mathematico import Arena, Mathematico, RandomPlayer
+from mathematico.game import Board, GameRecordWriter, ShardedRecordWriter, \
+    iter_records, read_records
+from mathematico.game.records import MAGIC, RECORD_SIZE, replay_cells
+
+
+def make_arena() -> Arena:
+    arena = Arena()
+    arena.add_player(RandomPlayer())
+    arena.add_player(RandomPlayer())
+    return arena
+
+
+def grid_score(cells) -> int:
+    """Score of the flattened grid."""
+    board = Board()
+    for idx, card in enumerate(cells):
+        board.make_move(divmod(idx, board.size), card)
+    return board.score()
+
+
+def test_record_game(tmp_path):
+    """Records of a single game describe the final boards."""
+    path = str(tmp_path / "games.bin")
+    game = Mathematico(seed=5, record=True)
+    players = [RandomPlayer(), RandomPlayer()]
+    for player in players:
+        game.add_player(player)
+    scores = game.play()
+    with GameRecordWriter(path) as writer:
+        writer.write_game(game, scores, index=3)
+
+    assert os.path.getsize(path) == len(MAGIC) + 2 * RECORD_SIZE
+    records = list(iter_records(path))
+    for idx, (record, player) in enumerate(zip(records, players)):
+        assert (record.game, record.player) == (3, idx)
+        assert record.score == scores[idx]
+        assert list(record.cards) == game.drawn_cards()
+        assert replay_cells(record.cards, record.cells) \
+            == list(player.board.cells)
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_arena_recorder(tmp_path, workers):
+    """All games played in the arena are recorded."""
+    path = str(tmp_path / "games.bin")
+    arena = make_arena()
+    with GameRecordWriter(path, buffer_records=7) as writer:
+        results = arena.run(rounds=20, verbose=False, seed=11,
+                            workers=workers, recorder=writer)
+    assert writer.records == 40
+
+    records = list(iter_records(path))
+    assert [r.game for r in records] == [i // 2 for i in range(40)]
+    for record in records:
+        assert results[record.player][record.game] == record.score
+        assert grid_score(replay_cells(record.cards, record.cells)) \
+            == record.score
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_appended_runs(tmp_path, workers):
+    """Runs appended to the same file continue the numbering of games."""
+    path = str(tmp_path / "games.bin")
+    with GameRecordWriter(path) as writer:
+        make_arena().run(rounds=3, verbose=False, seed=0, recorder=writer)
+        make_arena().run(rounds=2, verbose=False, seed=0, workers=workers,
+                         recorder=writer)
+    assert writer.games == 5
+    with GameRecordWriter(path, append=True) as writer:
+        assert writer.games == 5
+        make_arena().run(rounds=4, verbose=False, seed=0, workers=workers,
+                         recorder=writer)
+    assert [r.game for r in iter_records(path)] \
+        == [i // 2 for i in range(18)]
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_sharded_arena_runs(tmp_path, workers):
+    """Arena records the games into shards, numbered across the runs."""
+    with ShardedRecordWriter(str(tmp_path), shard_records=4) as writer:
+        make_arena().run(rounds=3, verbose=False, seed=1, workers=workers,
+                         recorder=writer)
+        make_arena().run(rounds=2, verbose=False, seed=1, workers=workers,
+                         recorder=writer)
+    assert writer.games == 5 and writer.records == 10
+    games = [record.game for shard in writer.shards
+             for record in iter_records(str(tmp_path / shard["path"]))]
+    assert games == [i // 2 for i in range(10)]
+
+
+def test_read_records(tmp_path):
+    """Memory-mapped records are the same as the iterated ones."""
+    np = pytest.importorskip("numpy")
+    path = str(tmp_path / "games.bin")
+    with GameRecordWriter(path) as writer:
+        make_arena().run(rounds=10, verbose=False, seed=0, recorder=writer)
+
+    data = read_records(path)
+    assert isinstance(data, np.memmap)
+    records = list(iter_records(path))
+    assert len(data) == len(records)
+    assert data["score"].tolist() == [r.score for r in records]
+    assert data["cards"][5].tobytes() == records[5].cards
+    assert data["cells"][7].tobytes() == records[7].cells
+
+
+def test_invalid_file(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not records")
+    with pytest.raises(ValueError):
+        list(iter_records(str(path)))
@@ -0,0 +1,74 @@
+import json
+import os
+from functools import partial
+
+from mathematico import Mathematico, RandomPlayer, SimulationPlayer
+from mathematico.game.records import ShardedRecordWriter, iter_moves, \
+    iter_records
+from mathematico.selfplay import MANIFEST, generate, iter_dataset
+
+from .players import FirstEmptyPlayer
+
+
+def play(seed: int, index: int, writer: ShardedRecordWriter) -> None:
+    game = Mathematico(seed=seed, record=True)
+    game.add_player(FirstEmptyPlayer())
+    game.add_player(FirstEmptyPlayer(reverse=True))
+    writer.write_game(game, game.play(), index)
+
+
+def test_sharded_writer(tmp_path):
+    with ShardedRecordWriter(str(tmp_path), "part", shard_records=5) as w:
+        for i in range(7):
+            play(i, i, w)
+    assert w.records == 14
+    assert [shard["records"] for shard in w.shards] == [4, 4, 4, 2]
+    assert [shard["first_game"] for shard in w.shards] == [0, 2, 4, 6]
+    assert [shard["last_game"] for shard in w.shards] == [1, 3, 5, 6]
+    for shard in w.shards:
+        records = list(iter_records(str(tmp_path / shard["path"])))
+        assert len(records) == shard["records"]
+
+
+def test_iter_moves(tmp_path):
+    with ShardedRecordWriter(str(tmp_path)) as writer:
+        play(0, 0, writer)
+    record = next(iter_records(str(tmp_path / writer.shards[0]["path"])))
+    moves = list(iter_moves(record))
+    assert len(moves) == 25
+    assert moves[0][0] == bytes(25)
+    for n, (grid, card, cell, score) in enumerate(moves):
+        assert grid.count(0) == 25 - n
+        assert grid[cell] == 0 and card == record.cards[n]
+        assert score == record.score
+
+
+def test_generate(tmp_path):
+    factories = [FirstEmptyPlayer, FirstEmptyPlayer]
+    first = generate(str(tmp_path / "a"), factories, games=10, seed=3,
+                     workers=2, games_per_task=3, shard_records=4)
+    second = generate(str(tmp_path / "b"), factories, games=10, seed=3,
+                      workers=1, games_per_task=5)
+    assert first["records"] == second["records"] == 20
+    assert len(first["shards"]) == 7  # tasks of 3, 3, 3, 1 games
+    with open(tmp_path / "a" / MANIFEST) as file:
+        assert json.load(file) == first
+    assert all(os.path.exists(tmp_path / "a" / shard["path"])
+               for shard in first["shards"])
+
+    records = list(iter_dataset(str(tmp_path / "a")))
+    assert records == list(iter_dataset(str(tmp_path / "b")))
+    assert [r.game for r in records] == [i // 2 for i in range(20)]
+
+
+def test_generate_random_players(tmp_path):
+    """Random players are seeded with each game, the dataset does not
+    depend on the workers and the split into tasks."""
+    factories = [RandomPlayer, partial(SimulationPlayer, None, 3)]
+    generate(str(tmp_path / "a"), factories, games=6, seed=5, workers=1,
+             games_per_task=2)
+    generate(str(tmp_path / "b"), factories, games=6, seed=5, workers=2,
+             games_per_task=4)
+    records = list(iter_dataset(str(tmp_path / "a")))
+    assert records == list(iter_dataset(str(tmp_path / "b")))
+    assert len(records) == 12
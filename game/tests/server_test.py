@@ -0,0 +1,76 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from mathematico import Mathematico, RandomPlayer
+from mathematico.server import AdaptedPlayer, GameServer, play_remote, \
+    play_table
+
+from .players import FirstEmptyPlayer
+
+
+def test_play_table_matches_game():
+    """The async table draws the same cards as Mathematico."""
+    game = Mathematico(seed=3)
+    game.add_player(FirstEmptyPlayer())
+    game.add_player(FirstEmptyPlayer(reverse=True))
+    expected = game.play()
+
+    for pool in [ThreadPoolExecutor, ProcessPoolExecutor]:
+        with pool(1) as executor:
+            players = [AdaptedPlayer(FirstEmptyPlayer()),
+                       AdaptedPlayer(FirstEmptyPlayer(reverse=True),
+                                     executor)]
+            assert asyncio.run(play_table(players, seed=3)) == expected
+
+
+def test_many_remote_tables():
+    """Many clients play concurrently against the server with a bot."""
+    server = GameServer([FirstEmptyPlayer], seed=0)
+
+    async def run():
+        tcp = await server.start()
+        port = tcp.sockets[0].getsockname()[1]
+        players = [RandomPlayer() for _ in range(50)]
+        async with tcp:
+            results = await asyncio.gather(*(
+                play_remote(player, "127.0.0.1", port) for player in players
+            ))
+        return players, results
+
+    players, results = asyncio.run(run())
+    assert server.finished == 50 and server.active == 0
+    for player, (score, others) in zip(players, results):
+        assert score == player.board.score()
+        assert player.board.occupied_cells == 25
+        assert len(others) == 1
+
+
+def test_invalid_move():
+    """Invalid positions are reported and the card is sent again."""
+    server = GameServer()
+
+    async def run():
+        tcp = await server.start()
+        port = tcp.sockets[0].getsockname()[1]
+        async with tcp:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            assert (await reader.readline()).startswith(b"MATHEMATICO")
+            card = await reader.readline()
+            replies = []
+            for move in [b"-1 0\n", b"nonsense\n", b"0 0\n", b"0 0\n",
+                         b"1" * 100_000 + b"\n"]:
+                writer.write(move)
+                replies.append(await reader.readline())
+                if replies[-1].startswith(b"ERROR"):
+                    assert await reader.readline() == card
+                else:
+                    card = replies[-1]
+            writer.close()
+            while server.active:
+                await asyncio.sleep(0.01)
+            return replies
+
+    replies = asyncio.run(run())
+    assert [reply.split()[0] for reply in replies] \
+        == [b"ERROR", b"ERROR", b"CARD", b"ERROR", b"ERROR"]
+    assert server.finished == 0
@@ -0,0 +1,100 @@
+import random
+
+import pytest
+
+from mathematico import Mathematico, SimulationPlayer
+
+from .players import random_board
+
+
+def play_game(player: SimulationPlayer, seed: int) -> None:
+    """Play a game with the player and check the final board."""
+    game = Mathematico(seed=seed)
+    game.add_player(player)
+    scores = game.play()
+    player.board.integrity_check()
+    assert player.board.occupied_cells == 25
+    assert sorted(player.board.cells) == sorted(game._available_cards[:25])
+    assert scores == [player.board.score()]
+
+
+def test_rollout_scores_last_cells():
+    """With a single card left in the deck, the rollouts are exact."""
+    np = pytest.importorskip("numpy")
+    from mathematico.players._batch_rollouts import rollout_scores
+
+    board = random_board(23, 0)
+    card, last = 1, 13
+    candidates = list(board.possible_moves())
+    totals = rollout_scores(board, [last], card, candidates, 10,
+                            np.random.default_rng(0))
+    for candidate, other, total in zip(candidates, candidates[::-1], totals):
+        board.make_move(candidate, card)
+        board.make_move(other, last)
+        assert total == 10 * board.score()
+        board.unmake_move(other)
+        board.unmake_move(candidate)
+
+
+def test_player_plays_game():
+    """Simulation player fills the board with the drawn cards."""
+    random.seed(0)
+    play_game(SimulationPlayer(None, 200), seed=1)
+
+
+def test_batched_player_plays_game():
+    """Batched simulation player fills the board with the drawn cards."""
+    pytest.importorskip("numpy")
+    random.seed(0)
+    play_game(SimulationPlayer(None, 2000, batch_size=50), seed=1)
+
+
+def test_parallel_player_plays_game():
+    """Parallel simulation player fills the board with the drawn cards."""
+    random.seed(0)
+    player = SimulationPlayer(None, 200, workers=2)
+    try:
+        play_game(player, seed=2)
+    finally:
+        player.close()
+
+
+def test_unknown_allocation():
+    with pytest.raises(ValueError):
+        SimulationPlayer(None, 100, allocation="best")
+
+
+@pytest.mark.parametrize("allocation", ["ucb", "halving"])
+def test_adaptive_player_plays_game(allocation):
+    """Simulation player with adaptive allocation plays the game."""
+    random.seed(0)
+    player = SimulationPlayer(None, 200, allocation=allocation)
+    play_game(player, seed=3)
+    assert 0 < player.last_simulations <= 200 + 25
+
+
+@pytest.mark.parametrize("allocation", ["ucb", "halving"])
+def test_batched_adaptive_player_plays_game(allocation):
+    """Batched simulation player with adaptive allocation plays the game."""
+    pytest.importorskip("numpy")
+    random.seed(0)
+    player = SimulationPlayer(None, 1000, batch_size=10,
+                              allocation=allocation)
+    play_game(player, seed=3)
+
+
+@pytest.mark.parametrize("allocation", ["ucb", "halving"])
+def test_adaptive_allocation_drops_bad_moves(allocation):
+    """The adaptive allocations give less simulations to the bad moves."""
+    random.seed(0)
+    player = SimulationPlayer(None, 1000, allocation=allocation)
+    # the fourth 5 completes four of a kind in the first row
+    for col, card in enumerate([5, 5, 5, 6, 5]):
+        if col < 4:
+            player.board.make_move((0, col), card)
+        player.deck.remove(card)
+    moves = list(player.board.possible_moves())
+    _, simulations = player._run_simulations(moves, 5, 10**12, 1000)
+    assert sum(simulations) <= 1000 + len(moves)
+    best = simulations[moves.index((0, 4))]
+    assert best == max(simulations) > 2 * min(simulations)
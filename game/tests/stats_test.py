@@ -0,0 +1,54 @@
+import random
+import statistics
+
+import pytest
+
+from mathematico.game import ArenaStats, RunningStats
+
+
+def test_running_stats():
+    """Running statistics agree with the statistics of the whole data."""
+    rng = random.Random(0)
+    data = [10 * rng.randint(0, 40) for _ in range(1001)]
+    stats = RunningStats()
+    for value in data:
+        stats.update(value)
+
+    assert stats.count == len(data)
+    assert stats.mean == pytest.approx(statistics.mean(data))
+    assert stats.variance == pytest.approx(statistics.variance(data))
+    assert stats.min == min(data)
+    assert stats.max == max(data)
+    assert stats.quantile(0.5) == statistics.median(data)
+    assert stats.quantile(0) == min(data)
+    assert stats.quantile(1) == max(data)
+    assert sum(stats.histogram.values()) == len(data)
+
+
+def test_merge():
+    """Merged statistics are the same as the statistics of all data."""
+    rng = random.Random(1)
+    data = [rng.gauss(80, 30) for _ in range(500)]
+    whole, first, second = RunningStats(), RunningStats(), RunningStats()
+    for idx, value in enumerate(data):
+        whole.update(value)
+        (first if idx < 200 else second).update(value)
+    first.merge(second)
+
+    assert first.count == whole.count
+    assert first.mean == pytest.approx(whole.mean)
+    assert first.variance == pytest.approx(whole.variance)
+    assert (first.min, first.max) == (whole.min, whole.max)
+    assert first.histogram == whole.histogram
+
+
+def test_arena_stats():
+    """Statistics are kept for each player."""
+    stats = ArenaStats(2)
+    assert stats.rounds == 0
+    stats.update((10, 20))
+    stats.update((30, 20))
+    assert stats.rounds == 2
+    assert [s["mean"] for s in stats.as_dict()] == [20, 20]
+    assert stats.as_dict()[0]["std"] == pytest.approx(14.142, 1e-3)
+    assert stats.as_dict()[1]["std"] == 0
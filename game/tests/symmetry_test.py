@@ -0,0 +1,97 @@
+from mathematico import Mathematico, SimulationPlayer
+from mathematico.game import Board, TranspositionTable, canonical_form
+from mathematico.game.symmetry import canonical_symmetry, map_cell, \
+    symmetries, transform
+
+from .players import random_board
+
+
+def board_from_cells(cells: bytes) -> Board:
+    board = Board()
+    board.grid = [list(cells[i:i + 5]) for i in range(0, 25, 5)]
+    return board
+
+
+def test_symmetries():
+    syms = symmetries()
+    assert len(syms) == 32
+    assert syms[0] == tuple(range(25))
+    for sym in syms:
+        assert sorted(sym) == list(range(25))
+
+
+def test_symmetries_keep_score():
+    for seed in range(20):
+        board = random_board(25 if seed % 2 else 17, seed)
+        for sym in symmetries():
+            other = board_from_cells(transform(board.cells, sym))
+            assert other.score() == board.score()
+
+
+def test_canonical_form():
+    board = random_board(10, 0)
+    form = canonical_form(board.cells)
+    for sym in symmetries():
+        assert canonical_form(transform(board.cells, sym)) == form
+
+    form, sym = canonical_symmetry(board.cells)
+    assert transform(board.cells, sym) == form
+    for idx, card in enumerate(board.cells):
+        assert form[map_cell(sym, idx)] == card
+
+
+def test_zobrist():
+    board = random_board(12, 1)
+    other = board_from_cells(bytes(board.cells))
+    assert board.zobrist == other.zobrist != 0
+
+    zobrist = board.zobrist
+    for move in list(board.possible_moves()):
+        board.make_move(move, 13)
+        board.integrity_check()
+        assert board.zobrist != zobrist
+        board.unmake_move(move)
+    assert board.zobrist == zobrist
+    assert Board().zobrist == 0
+
+
+def test_transposition_table():
+    table = TranspositionTable(maxsize=2)
+    assert table.get("a") is None
+    table.add("a", 10, 1)
+    table.add("a", 20, 2)
+    assert table.get("a") == (30, 3)
+    table.add("b", 1, 1)
+    table.get("a")
+    table.add("c", 1, 1)  # evicts "b", the least recently used
+    assert len(table) == 2
+    assert "a" in table and "c" in table and "b" not in table
+    assert table.hits == 2 and table.misses == 1
+
+
+def test_simulation_player_with_transpositions():
+    table = TranspositionTable()
+    player = SimulationPlayer(None, 50, transpositions=table)
+    board = player.board
+    # on the empty board, 25 cells fall into 4 classes: center, the rest
+    # of the diagonals, the middle row and column, and the other cells
+    _, keys = player._candidates(list(board.possible_moves()), 1)
+    assert len(keys) == 4
+
+    for seed in range(2):
+        player.reset()
+        game = Mathematico(seed=seed)
+        game.add_player(player)
+        assert game.play() == [player.board.score()]
+    assert len(table) > 0
+
+
+def test_transpositions_do_not_filter_moves():
+    """Estimates from the table do not exclude the less simulated moves."""
+    table = TranspositionTable()
+    player = SimulationPlayer(None, 40, transpositions=table)
+    moves, keys = player._candidates(list(player.board.possible_moves()), 1)
+    # one class with many poor simulations from the previous searches
+    table.add(keys[0], 0, 10_000)
+    player.move(1)
+    assert player.board.is_empty(*moves[0])
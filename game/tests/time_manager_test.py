@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from mathematico import Mathematico, SimulationPlayer
+from mathematico.players._time_manager import TimeManager
+
+
+def test_budget_split():
+    """The shares of the moves sum up to the game time."""
+    manager = TimeManager(10**9)
+    budgets = []
+    for candidates in range(25, 0, -1):
+        budget, limit = manager.budget(candidates)
+        assert budget <= limit <= 2 * budget
+        budgets.append(budget)
+        manager.remaining -= budget
+    assert budgets[-1] == 0
+    assert budgets == sorted(budgets, reverse=True)
+    assert 0 <= manager.remaining < 25
+    assert TimeManager(10**9).budget(3, exact_cells=3) == (0, 0)
+
+
+def test_budget_behind_schedule():
+    """The moves get less time if the previous moves took longer."""
+    manager = TimeManager(10**9)
+    planned, _ = manager.budget(10)
+    manager.remaining = 10**6
+    budget, limit = manager.budget(10)
+    assert budget == limit < planned
+
+
+def test_settled():
+    manager = TimeManager(10**9, min_simulations=10)
+    clear = ([1000, 500], [100_000, 25_500], [10, 10])
+    assert manager.settled(*clear, z=2)
+    assert not manager.settled([100, 50], [1000, 255], [1, 1], z=2)
+    # means 100 and 99 with standard deviation 10
+    close = ([10_000, 9_900], [1_009_900, 989_900], [100, 100])
+    assert not manager.settled(*close, z=2)
+    assert manager.settled(*close, z=0.5)
+    assert manager.settled([10], [100], [1], z=2)
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        SimulationPlayer(None, None, allocation="ucb", game_time=10**9)
+
+
+def test_managed_player_keeps_budget(monkeypatch):
+    random.seed(0)
+    game_time = 3 * 10**8
+    player = SimulationPlayer(None, None, game_time=game_time)
+    manager = player.time_manager
+    assert manager is not None
+    allotted = []
+    budget = manager.budget
+
+    def recorded(*args):
+        share, limit = budget(*args)
+        allotted.append((manager.remaining, share, limit))
+        return share, limit
+
+    monkeypatch.setattr(manager, "budget", recorded)
+    game = Mathematico(seed=5)
+    game.add_player(player)
+    game.play()
+    # the shares sum up to at most the game time, and no move may take
+    # longer than the time remaining before it
+    assert len(allotted) == 24
+    assert sum(share for _, share, _ in allotted) <= game_time
+    for remaining, share, limit in allotted:
+        assert share <= limit <= max(0, remaining)
+    player.reset()
+    assert player.time_manager.remaining == game_time
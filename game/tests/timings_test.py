@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from mathematico import Arena, Mathematico, RandomPlayer, SimulationPlayer
+from mathematico.game import SearchStats, Timings
+from mathematico.game.timings import LatencyHistogram
+
+
+def test_latency_histogram():
+    """Durations fall into power of two buckets."""
+    histogram = LatencyHistogram()
+    for ns in [1, 3, 900, 1000, 1024]:
+        histogram.record(ns)
+    assert histogram.count == 5
+    assert (histogram.min, histogram.max) == (1, 1024)
+    assert histogram.buckets[10] == 2 and histogram.buckets[11] == 1
+    assert histogram.quantile(0.5) == 1024
+    assert histogram.quantile(1.0) == 2048
+
+    other = LatencyHistogram()
+    other.record(5000)
+    histogram.merge(other)
+    assert histogram.count == 6 and histogram.max == 5000
+
+
+def test_game_timings():
+    """Each move, card draw and scoring is timed."""
+    timings = Timings()
+    game = Mathematico(seed=0)
+    game.add_player(RandomPlayer())
+    game.add_player(RandomPlayer())
+    game.play(timings=timings)
+    assert timings.deck.count == 25
+    assert [h.count for h in timings.moves] == [25, 25]
+    assert [h.count for h in timings.scoring] == [1, 1]
+    json.dumps(timings.as_dict())
+
+
+def test_arena_timings():
+    """Rounds are timed also when played by the workers."""
+    arena = Arena()
+    arena.add_player(RandomPlayer())
+    for workers in [None, 2]:
+        timings = Timings()
+        arena.run(rounds=6, verbose=False, seed=0, workers=workers,
+                  timings=timings)
+        assert timings.rounds.count == 6
+        assert timings.moves[0].count == 6 * 25
+
+
+def test_verbose_arena_times_rounds_only(monkeypatch, capsys):
+    """The default verbose run does not time the moves."""
+    play = Mathematico.play
+
+    def untimed(self, verbose=False, timings=None, executor=None):
+        assert timings is None, "the moves are timed"
+        return play(self, verbose, timings, executor)
+
+    monkeypatch.setattr(Mathematico, "play", untimed)
+    arena = Arena()
+    arena.add_player(RandomPlayer())
+    arena.run(rounds=3, seed=0)
+    assert "Round mean" in capsys.readouterr().out
+
+    timings = Timings(per_move=False)
+    arena.run(rounds=3, verbose=False, seed=0, workers=2, timings=timings)
+    assert timings.rounds.count == 3 and timings.moves == []
+
+
+def test_search_stats():
+    """Simulation player counts its simulations."""
+    player = SimulationPlayer(None, 50)
+    player.stats = SearchStats()
+    game = Mathematico(seed=0)
+    game.add_player(player)
+    game.play()
+    # the last move has a single option, and is not searched
+    assert player.stats.moves == 24
+    assert player.stats.simulations >= 24 * 50
+    assert player.stats.budget_exhausted == 0
+    assert player.stats.simulations_per_second > 0
+    json.dumps(player.stats.as_dict())
+
+
+@pytest.mark.parametrize("allocation", ["ucb", "halving"])
+def test_search_stats_adaptive(allocation):
+    """Moves of the adaptive allocations without a time limit are not
+    counted as stopped by it, even with less simulations."""
+    player = SimulationPlayer(None, 70, allocation=allocation)
+    player.stats = SearchStats()
+    game = Mathematico(seed=0)
+    game.add_player(player)
+    game.play()
+    assert player.stats.simulations <= 24 * 70
+    assert player.stats.budget_exhausted == 0
+
+    player = SimulationPlayer(1, 10**9, allocation=allocation)
+    player.stats = SearchStats()
+    player.move(1)
+    assert player.stats.budget_exhausted == 1
@@ -0,0 +1,98 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pytest
+
+from mathematico import Arena, RandomPlayer, SimulationPlayer
+from mathematico.cli import main
+from mathematico.game import Pairing, Tournament
+
+from .players import FirstEmptyPlayer
+
+
+def test_pairing_decide():
+    pair = Pairing(0, 1)
+    for difference in [10, 20, 30, 20]:
+        pair.differences.update(difference)
+    assert pair.decide(z=3) and pair.winner == 0
+
+    pair = Pairing(0, 1)
+    for difference in [-10, 10, -10, 10]:
+        pair.differences.update(difference)
+    assert not pair.decide(z=2, tolerance=5)
+    assert pair.decide(z=2, tolerance=50) and pair.winner is None
+
+
+def test_common_decks():
+    """The scores are the same as in the arena with the same seed."""
+    tournament = Tournament(min_rounds=10, max_rounds=10, look_every=5)
+    arena = Arena()
+    for reverse in [False, True]:
+        tournament.add_player(FirstEmptyPlayer(reverse))
+        arena.add_player(FirstEmptyPlayer(reverse))
+    pair, = tournament.run(seed=7)
+    first, second = arena.run(rounds=10, seed=7, verbose=False)
+    assert tournament.rounds == pair.rounds == 10
+    assert pair.differences.mean == pytest.approx(
+        (sum(first) - sum(second)) / 10)
+    assert tournament.scores[0].mean == pytest.approx(sum(first) / 10)
+
+
+def test_early_stopping():
+    """Clear winners are decided early, the decided players stop."""
+    tournament = Tournament(min_rounds=20, max_rounds=1000, look_every=20)
+    strong = partial(SimulationPlayer, None, 30)
+    tournament.add_player(strong(), strong, "strong")
+    tournament.add_player(RandomPlayer(), RandomPlayer, "random")
+    tournament.add_player(FirstEmptyPlayer(), name="first")
+    tournament.add_player(FirstEmptyPlayer(), name="same")
+    tournament.run(seed=0)
+
+    summary = tournament.as_dict()
+    pairs = {(p["first"], p["second"]): p for p in summary["pairings"]}
+    assert pairs["strong", "random"]["winner"] == "strong"
+    assert pairs["strong", "random"]["rounds"] < 1000
+    # identical deterministic players are tied at once
+    assert pairs["first", "same"]["decided"]
+    assert pairs["first", "same"]["winner"] is None
+    assert pairs["first", "same"]["rounds"] == 20
+    assert summary["ranking"][0] == "strong"
+    assert summary["games"] < 4 * summary["rounds"]
+
+
+def test_one_pool_for_all_looks(monkeypatch):
+    """The looks share one pool of processes and give the same results as
+    the serial run."""
+    pools = []
+
+    class CountedPool(ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            pools.append(self)
+
+    monkeypatch.setattr("mathematico.game.tournament.ProcessPoolExecutor",
+                        CountedPool)
+    monkeypatch.setattr("mathematico.game.arena.ProcessPoolExecutor",
+                        CountedPool)
+    results = []
+    for workers in [None, 2]:
+        tournament = Tournament(min_rounds=10, max_rounds=40, look_every=10)
+        tournament.add_player(RandomPlayer(), RandomPlayer)
+        tournament.add_player(FirstEmptyPlayer(), FirstEmptyPlayer)
+        tournament.run(seed=3, workers=workers)
+        results.append(tournament.as_dict())
+    assert len(pools) == 1
+    assert results[0] == results[1]
+
+
+def test_tournament_cli(tmp_path):
+    output = tmp_path / "tournament.json"
+    assert main(["tournament", "random", "simulation:max_simulations=20",
+                 "--seed", "1", "--max-rounds", "200", "--look-every", "20",
+                 "--output", str(output)]) == 0
+    summary = json.loads(output.read_text())
+    pair, = summary["pairings"]
+    assert pair["first"] == "random"
+    assert pair["winner"] in [None, "simulation:max_simulations=20"]
+    assert summary["rounds"] <= 200